@@ -6,10 +6,15 @@ for integrating with AfricasTalking services.
 
 import os
 import logging
-import requests
+import random
 import json
+import socket
+import uuid
 from datetime import datetime
 from typing import Dict, Optional
+from urllib.parse import urlparse
+
+from utils import LazyService
 
 class AfricasTalkingConfig:
     """
@@ -31,6 +36,13 @@ class AfricasTalkingConfig:
         self.retry_delay = 1.0
         self.rate_limit_per_minute = 100
         
+        # HTTP transport: 'simulated' (in-process fake) or 'http' (pooled requests
+        # session, also used against the local stub server in africastalking_stub.py)
+        self.transport = os.getenv('AFRICASTALKING_TRANSPORT', 'simulated').lower()
+        self.pool_size = int(os.getenv('AFRICASTALKING_POOL_SIZE', 20))
+        self.connect_timeout = float(os.getenv('AFRICASTALKING_CONNECT_TIMEOUT', 3.05))
+        self.read_timeout = float(os.getenv('AFRICASTALKING_READ_TIMEOUT', 10))
+        
         logging.info(f"AfricasTalking configured - Mode: {'Sandbox' if self.is_sandbox else 'Production'}")
     
     def _get_demo_api_key(self) -> str:
@@ -39,6 +51,9 @@ class AfricasTalkingConfig:
     
     def _get_base_url(self) -> str:
         """Get the appropriate base URL based on environment"""
+        override = os.getenv('AFRICASTALKING_BASE_URL')
+        if override:
+            return override.rstrip('/')
         if self.is_sandbox:
             return "https://api.sandbox.africastalking.com/version1"
         else:
@@ -69,117 +84,233 @@ class AfricasTalkingConfig:
         
         return validation
 
-class AfricasTalkingAPI:
+class HTTPTransport:
     """
-    Core API client for AfricasTalking services
+    Pooled keep-alive HTTP transport backed by a requests session
     """
     
-    def __init__(self):
-        self.config = AfricasTalkingConfig()
-        self.session = requests.Session()
-        self.session.headers.update(self.config.get_headers())
+    name = 'http'
+    
+    # Responses meaning the provider did not take the message, so it is safe to
+    # send again; other 5xx may follow an accepted (and billed) SMS
+    RETRY_STATUS_CODES = (429, 503)
+    
+    def __init__(self, config: AfricasTalkingConfig):
+        # Imported here so the simulated transport (and the CLI) skip loading requests
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
         
-        # Request tracking
-        self.request_count = 0
-        self.last_request_time = None
+        self.timeout = (config.connect_timeout, config.read_timeout)
         
-    def _make_request(self, method: str, endpoint: str, data: Dict = None) -> Dict:
+        class SendRetry(Retry):
+            # Only these responses are retried, and only when they carry Retry-After
+            RETRY_AFTER_STATUS_CODES = frozenset(HTTPTransport.RETRY_STATUS_CODES)
+        
+        # Sends are non-idempotent POSTs: retry connection failures (nothing was
+        # sent) and throttling responses, never read timeouts or dropped
+        # connections, after which the message may already have been accepted
+        retry = SendRetry(
+            total=config.max_retries,
+            connect=config.max_retries,
+            read=0,
+            other=0,
+            status=config.max_retries,
+            backoff_factor=config.retry_delay,
+            allowed_methods=None,  # AfricasTalking sends are POSTs
+            respect_retry_after_header=True,
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=config.pool_size, max_retries=retry)
+        
+        self.session = requests.Session()
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers.update(config.get_headers())
+    
+    def request(self, method: str, url: str, data: Dict = None) -> Dict:
         """
-        Make authenticated request to AfricasTalking API
+        Send a request over a pooled connection
         
         Args:
             method: HTTP method (GET, POST, etc.)
-            endpoint: API endpoint path
-            data: Request payload
+            url: Full request URL
+            data: Form payload
             
         Returns:
-            API response as dict
+            Decoded JSON response
         """
-        try:
-            url = f"{self.config.base_url}/{endpoint}"
-            self.request_count += 1
-            self.last_request_time = datetime.now()
-            
-            logging.debug(f"Making {method} request to {url}")
-            
-            # For demo purposes, simulate API responses
-            if "messaging" in endpoint and method.upper() == "POST":
-                return self._simulate_sms_response(data)
-            elif "delivery-reports" in endpoint:
-                return self._simulate_delivery_report()
-            elif "balance" in endpoint:
-                return self._simulate_balance_response()
-            else:
-                return self._simulate_generic_response()
-                
-        except Exception as e:
-            logging.error(f"API request failed: {str(e)}")
-            return {
-                'success': False,
-                'error': str(e),
-                'timestamp': datetime.now().isoformat()
-            }
+        response = self.session.request(method, url, data=data, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
     
-    def _simulate_sms_response(self, data: Dict) -> Dict:
-        """Simulate SMS sending response"""
-        import uuid
-        import random
+    def close(self):
+        """Close pooled connections"""
+        self.session.close()
+
+class SimulatedTransport:
+    """
+    In-process fake returning AfricasTalking-shaped responses
+    """
+    
+    name = 'simulated'
+    
+    def request(self, method: str, url: str, data: Dict = None) -> Dict:
+        """Answer a request without touching the network"""
+        path = urlparse(url).path
         
-        message_id = f"ATXid_{uuid.uuid4().hex[:16]}"
+        if path.endswith('messaging') and method.upper() == 'POST':
+            return self._simulate_sms_response(data or {})
+        elif 'delivery-reports' in path:
+            return self._simulate_delivery_report()
+        elif 'user' in path:
+            return self._simulate_balance_response()
+        else:
+            return self._simulate_generic_response()
+    
+    def _simulate_sms_response(self, data: Dict) -> Dict:
+        """Simulate SMS sending response (comma-separated recipients allowed)"""
+        numbers = [number for number in data.get('to', '+254700000000').split(',') if number]
         cost_options = ["KES 1.00", "KES 2.00", "KES 1.50"]
         cost = random.choice(cost_options)
         
         return {
             'SMSMessageData': {
-                'Message': f'Sent to 1/1 Total Cost: {cost}',
+                'Message': f'Sent to {len(numbers)}/{len(numbers)} Total Cost: {cost}',
                 'Recipients': [{
                     'statusCode': 101,
-                    'number': data.get('to', '+254700000000'),
+                    'number': number,
                     'status': 'Success',
                     'cost': cost,
-                    'messageId': message_id
-                }]
-            },
-            'success': True,
-            'timestamp': datetime.now().isoformat()
+                    'messageId': f"ATXid_{uuid.uuid4().hex[:16]}"
+                } for number in numbers]
+            }
         }
     
     def _simulate_delivery_report(self) -> Dict:
         """Simulate delivery report response"""
-        import random
-        
         statuses = ['Delivered', 'Pending', 'Failed', 'Success']
         status = random.choice(statuses)
         
         return {
             'status': status,
             'deliveredAt': datetime.now().isoformat() if status in ['Delivered', 'Success'] else None,
-            'failureReason': 'Network timeout' if status == 'Failed' else None,
-            'success': True,
-            'timestamp': datetime.now().isoformat()
+            'failureReason': 'Network timeout' if status == 'Failed' else None
         }
     
     def _simulate_balance_response(self) -> Dict:
         """Simulate account balance response"""
-        import random
-        
         return {
             'UserData': {
                 'balance': f"KES {random.randint(100, 1000)}.00"
-            },
-            'success': True,
-            'timestamp': datetime.now().isoformat()
+            }
         }
     
     def _simulate_generic_response(self) -> Dict:
         """Simulate generic API response"""
         return {
             'status': 'success',
-            'message': 'Request processed successfully',
-            'success': True,
-            'timestamp': datetime.now().isoformat()
+            'message': 'Request processed successfully'
         }
     
+    def close(self):
+        """Nothing to release"""
+        pass
+
+def create_transport(config: AfricasTalkingConfig, name: str = None):
+    """
+    Build the HTTP transport selected by AFRICASTALKING_TRANSPORT
+    
+    Args:
+        config: AfricasTalking configuration
+        name: Override the configured transport ('http' or 'simulated')
+        
+    Returns:
+        Transport instance exposing request(method, url, data)
+    """
+    name = (name or config.transport).lower()
+    if name == 'http':
+        return HTTPTransport(config)
+    if name != 'simulated':
+        logging.warning(f"Unknown AfricasTalking transport '{name}', using simulated responses")
+    return SimulatedTransport()
+
+def is_retryable_error(error: Exception) -> bool:
+    """
+    Check whether a failed request is safe to send again
+
+    HTTP errors are retryable for RETRY_STATUS_CODES only. Network errors are
+    retryable only when the connection was never established; after a read
+    timeout or a dropped connection the message may already have been
+    accepted. Anything else - bad credentials, malformed responses, bugs -
+    is permanent.
+    """
+    response = getattr(error, 'response', None)
+    status = getattr(response, 'status_code', None) or getattr(error, 'status', None)
+    if isinstance(status, int):
+        return status in HTTPTransport.RETRY_STATUS_CODES
+    
+    if isinstance(error, (ConnectionRefusedError, socket.gaierror)):
+        return True
+    if not isinstance(error, OSError):
+        return False
+    
+    import requests
+    from urllib3.exceptions import ConnectTimeoutError  # includes NewConnectionError
+    if isinstance(error, requests.ConnectTimeout):
+        return True
+    if isinstance(error, requests.ConnectionError) and error.args:
+        return isinstance(getattr(error.args[0], 'reason', None), ConnectTimeoutError)
+    return False
+
+class AfricasTalkingAPI:
+    """
+    Core API client for AfricasTalking services
+    """
+    
+    # Recipient status codes AfricasTalking reports for accepted messages
+    SUCCESS_STATUS_CODES = (100, 101, 102)
+    
+    def __init__(self, config: AfricasTalkingConfig = None, transport=None):
+        self.config = config or AfricasTalkingConfig()
+        self.transport = transport or create_transport(self.config)
+        
+        # Request tracking
+        self.request_count = 0
+        self.last_request_time = None
+        
+    def _make_request(self, method: str, endpoint: str, data: Dict = None) -> Dict:
+        """
+        Make authenticated request to AfricasTalking API
+        
+        Args:
+            method: HTTP method (GET, POST, etc.)
+            endpoint: API endpoint path
+            data: Request payload
+            
+        Returns:
+            API response as dict
+        """
+        try:
+            url = f"{self.config.base_url}/{endpoint}"
+            self.request_count += 1
+            self.last_request_time = datetime.now()
+            
+            logging.debug(f"Making {method} request to {url} via {self.transport.name} transport")
+            
+            response = self.transport.request(method, url, data)
+            response.setdefault('success', True)
+            response.setdefault('timestamp', datetime.now().isoformat())
+            return response
+                
+        except Exception as e:
+            logging.error(f"API request failed: {str(e)}")
+            return {
+                'success': False,
+                'error': str(e),
+                'timestamp': datetime.now().isoformat()
+            }
+    
     def send_sms(self, to: str, message: str, sender_id: str = None) -> Dict:
         """
         Send SMS message
@@ -199,7 +330,17 @@ class AfricasTalkingAPI:
             'from': sender_id or self.config.sender_id
         }
         
-        return self._make_request('POST', 'messaging', payload)
+        response = self._make_request('POST', 'messaging', payload)
+        
+        recipients = response.get('SMSMessageData', {}).get('Recipients', [])
+        if response['success'] and recipients:
+            recipient = recipients[0]
+            response['success'] = recipient.get('statusCode') in self.SUCCESS_STATUS_CODES
+            response['message_id'] = recipient.get('messageId')
+            response['status'] = recipient.get('status')
+            response['cost'] = recipient.get('cost')
+        
+        return response
     
     def get_delivery_reports(self, message_id: str) -> Dict:
         """Get delivery reports for a message"""
@@ -207,7 +348,7 @@ class AfricasTalkingAPI:
     
     def get_account_balance(self) -> Dict:
         """Get account balance"""
-        return self._make_request('GET', f'users?username={self.config.username}')
+        return self._make_request('GET', f'user?username={self.config.username}')
     
     def get_api_stats(self) -> Dict:
         """Get API usage statistics"""
@@ -215,7 +356,8 @@ class AfricasTalkingAPI:
             'request_count': self.request_count,
             'last_request': self.last_request_time.isoformat() if self.last_request_time else None,
             'config_valid': self.config.validate_config()['all_valid'],
-            'mode': 'sandbox' if self.config.is_sandbox else 'production'
+            'mode': 'sandbox' if self.config.is_sandbox else 'production',
+            'transport': self.transport.name
         }
 
 class PhoneNumberValidator:
@@ -282,4 +424,4 @@ class PhoneNumberValidator:
         return validation
 
 # Global API client instance
-api_client = AfricasTalkingAPI()
\ No newline at end of file
+api_client = LazyService(AfricasTalkingAPI, 'api_client')
\ No newline at end of file
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Local AfricasTalking Stub Server
+A minimal stand-in for the AfricasTalking messaging endpoint, used to exercise
+the real HTTP code paths in tests and benchmarks without sending SMS.
+"""
+
+import re
+import sys
+import json
+import time
+import uuid
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Tuple
+from urllib.parse import parse_qs
+
+VALID_NUMBER = re.compile(r'^\+\d{9,15}$')
+
+class StubRequestHandler(BaseHTTPRequestHandler):
+    """
+    Answers POST .../messaging with an AfricasTalking-shaped response
+    """
+
+    protocol_version = 'HTTP/1.1'  # keep-alive, like the real API
+    disable_nagle_algorithm = True  # headers and body are separate writes
+
+    def log_message(self, format, *args):
+        pass  # Keep benchmark output clean
+
+    def _send_json(self, status: int, body: dict, headers: dict = None):
+        payload = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        form = parse_qs(self.rfile.read(length).decode('utf-8'))
+        self.server.request_count += 1
+
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        
+        if self.server.fail_next > 0:
+            self.server.fail_next -= 1
+            self._send_json(503, {'error': 'Service temporarily unavailable'}, {'Retry-After': '0'})
+            return
+
+        if not self.path.rstrip('/').endswith('messaging'):
+            self._send_json(404, {'error': f'Unknown endpoint {self.path}'})
+            return
+
+        if not self.headers.get('apiKey') or not form.get('username'):
+            self._send_json(401, {'error': 'Missing apiKey or username'})
+            return
+
+        numbers = [number.strip() for number in form.get('to', [''])[0].split(',') if number.strip()]
+        recipients = []
+        for number in numbers:
+            if VALID_NUMBER.match(number):
+                recipients.append({
+                    'statusCode': 101,
+                    'number': number,
+                    'status': 'Success',
+                    'cost': 'KES 0.8000',
+                    'messageId': f"ATXid_{uuid.uuid4().hex[:16]}"
+                })
+            else:
+                recipients.append({
+                    'statusCode': 403,
+                    'number': number,
+                    'status': 'InvalidPhoneNumber',
+                    'cost': '0',
+                    'messageId': 'None'
+                })
+
+        sent = sum(1 for r in recipients if r['statusCode'] == 101)
+        self._send_json(201, {
+            'SMSMessageData': {
+                'Message': f"Sent to {sent}/{len(recipients)} Total Cost: KES {sent * 0.8:.4f}",
+                'Recipients': recipients
+            }
+        })
+
+def start_stub_server(port: int = 0, latency: float = 0.0) -> Tuple[ThreadingHTTPServer, str]:
+    """
+    Start the stub server on a background thread
+
+    Args:
+        port: Port to bind (0 picks a free port)
+        latency: Artificial per-request delay in seconds
+
+    Returns:
+        (server, base_url) - call server.shutdown() when done
+    """
+    server = ThreadingHTTPServer(('127.0.0.1', port), StubRequestHandler)
+    server.daemon_threads = True
+    server.latency = latency
+    server.request_count = 0
+    server.fail_next = 0  # Answer this many requests with 503 to exercise retries
+
+    thread = threading.Thread(target=server.serve_forever, name='africastalking-stub', daemon=True)
+    thread.start()
+
+    return server, f"http://127.0.0.1:{server.server_address[1]}/version1"
+
+def main():
+    """Run the stub server in the foreground"""
+    parser = argparse.ArgumentParser(description='Local AfricasTalking stub server')
+    parser.add_argument('--port', type=int, default=8765, help='Port to listen on')
+    parser.add_argument('--latency', type=float, default=0.0, help='Artificial delay per request (seconds)')
+    args = parser.parse_args()
+
+    server, url = start_stub_server(args.port, args.latency)
+    print(f"📡 AfricasTalking stub listening at {url}")
+    print(f"   export AFRICASTALKING_BASE_URL={url} AFRICASTALKING_TRANSPORT=http")
+
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+        sys.exit(0)
+
+if __name__ == "__main__":
+    main()
@@ -233,13 +233,16 @@ class TextAHBARClient:
     
     # === Transaction Operations ===
     
-    def get_transactions(self, transaction_type: str = None, limit: int = 50) -> Dict:
+    def get_transactions(self, transaction_type: str = None, limit: int = 50,
+                         since: str = None, cursor: int = None) -> Dict:
         """
         Get transaction history
         
         Args:
             transaction_type: Filter by transaction type
-            limit: Maximum number of transactions
+            limit: Maximum number of transactions (page size when paginating)
+            since: Optional ISO timestamp lower bound (enables pagination)
+            cursor: Optional next_cursor from a previous page (enables pagination)
             
         Returns:
             Transaction history
@@ -247,6 +250,10 @@ class TextAHBARClient:
         params = f'?limit={limit}'
         if transaction_type:
             params += f'&type={transaction_type}'
+        if since:
+            params += f'&since={since}'
+        if cursor:
+            params += f'&cursor={cursor}'
         
         return self._make_request('GET', f'/api/transactions{params}')
     
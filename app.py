@@ -1,113 +1,192 @@
-
-from flask import Flask, render_template, request, jsonify
-import re
+from flask import Blueprint, Flask, Response, current_app, render_template, request, jsonify, stream_with_context
 import os
-import boto3
 import logging
+import threading
 import time
 from datetime import datetime
 import uuid
 import random
-from dotenv import load_dotenv
-
-# Load environment variables from .env file
-load_dotenv()
-
-# Hedera imports for token transfers
-from hedera import (
-    Client,
-    AccountId,
-    PrivateKey,
-    TokenId,
-    TransferTransaction,
-    Hbar
-)
+from functools import wraps
 
-# Import our custom SMS and HBAR management modules
+# Import our custom SMS and HBAR management modules (services are created on first use)
 from sms_service import sms_service, SMSTemplates
 from africastalking_client import api_client, PhoneNumberValidator
 from hbar_manager import transaction_service, HederaTokenManager
+from stocks import kenya_stocks, stock_catalog, find_stock, suggest_stocks, list_stocks, generate_stock_advice, price_feed
+from hedera_pool import reset_client_pool
+from chat_store import build_messages, create_chat_session_store
+from response_cache import create_response_cache
+from quote_stream import create_quote_broadcaster
+from http_cache import create_precomputed_response
+from json_provider import FastJSONProvider, dumps as json_dumps
+from bedrock_gateway import create_bedrock_gateway
+from intent_router import classify_message
 from utils import (
-    transaction_logger, sms_rate_limiter, api_rate_limiter,
+    transaction_logger, sms_rate_limiter, api_rate_limiter, LazyService, load_environment, reset_lazy_services,
     PhoneNumberUtils, SMSCostCalculator, ConfigValidator, MessageFormatter
 )
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-app = Flask(__name__)
+# Routes are registered on the app built by create_app()
+bp = Blueprint('textahbar', __name__)
 
 # --- AWS Bedrock Configuration ---
-env_bearer = os.getenv('BEDROCK_BEARER_TOKEN') or os.getenv('AWS_BEARER_TOKEN_BEDROCK')
-if env_bearer:
-    os.environ['AWS_BEARER_TOKEN_BEDROCK'] = env_bearer
-else:
-    logging.error("AWS_BEARER_TOKEN_BEDROCK not found in environment variables!")
-    exit("Exiting: AWS Bearer token is required.")
-
-AWS_REGION = os.getenv('AWS_REGION', 'us-east-1')
-BEDROCK_MODEL_ID = os.getenv('BEDROCK_MODEL_ID', 'anthropic.claude-3-haiku-20240307-v1:0')
-
-try:
-    bedrock_client = boto3.client(
-        service_name="bedrock-runtime",
-        region_name=AWS_REGION
-    )
-    logging.info(f"AWS Bedrock client initialized for region: {AWS_REGION}")
-except Exception as e:
-    logging.critical(f"Failed to initialize AWS Bedrock client: {e}")
-    exit("Exiting: Failed to initialize AWS Bedrock client.")
+def create_bedrock_client():
+    """Create the Bedrock runtime client (boto3 is imported here, not at startup)"""
+    if os.getenv('BEDROCK_CLIENT', 'boto3').lower() == 'stub':
+        from bedrock_stub import StubBedrockClient
+        logging.info("🧪 Using the offline Bedrock stub client")
+        return StubBedrockClient()
+    
+    import boto3
+    from botocore.config import Config
+    
+    region = os.getenv('AWS_REGION', 'us-east-1')
+    try:
+        # Keep botocore's own timeouts and retries inside the gateway deadline
+        # so throttled calls back off instead of piling up
+        client = boto3.client(
+            service_name="bedrock-runtime",
+            region_name=region,
+            config=Config(
+                connect_timeout=3,
+                read_timeout=float(os.getenv('BEDROCK_DEADLINE_SECONDS', 20)),
+                retries={'mode': 'adaptive', 'max_attempts': 2},
+                max_pool_connections=int(os.getenv('BEDROCK_MAX_CONCURRENCY', 8))
+            )
+        )
+        logging.info(f"AWS Bedrock client initialized for region: {region}")
+        return client
+    except Exception as e:
+        logging.critical(f"Failed to initialize AWS Bedrock client: {e}")
+        raise
+
+bedrock_client = LazyService(create_bedrock_client, 'bedrock_client')
+# All model calls go through the gateway: bounded concurrency, deadlines, coalescing
+bedrock_gateway = LazyService(lambda: create_bedrock_gateway(bedrock_client), 'bedrock_gateway')
+
+CHAT_INFERENCE_CONFIG = {
+    "temperature": 0.7,
+    "topP": 0.9,
+    "maxTokens": 300,
+}
+CHAT_FALLBACK_REPLY = 'Sorry, I am having trouble connecting to the AI at the moment.'
+
+chat_sessions = LazyService(create_chat_session_store, 'chat_sessions')
+response_cache = LazyService(create_response_cache, 'response_cache')  # None when CHAT_CACHE_ENABLED=false
+# Live quote fan-out for /api/stocks/stream, fed by the price feed thread
+quote_broadcaster = LazyService(lambda: create_quote_broadcaster(price_feed.get_instance()), 'quote_broadcaster')
+QUOTE_STREAM_KEEPALIVE_SECONDS = float(os.getenv('QUOTE_STREAM_KEEPALIVE_SECONDS', 15))
 
-chat_sessions = {}
 pending_mpesa_confirmations = {}
 pending_purchases = {}
 user_balances = {"default_user_session": 400.00}
 
-# --- Hedera Configuration ---
-my_account_id_str = os.getenv('MY_ACCOUNT_ID')
-my_private_key_str = os.getenv('MY_PRIVATE_KEY')
-token_id_str = os.getenv('TOKEN_ID')
-
-if not my_account_id_str or not my_private_key_str or not token_id_str:
-    logging.error("Missing required Hedera environment variables!")
-    exit("Exiting: MY_ACCOUNT_ID, MY_PRIVATE_KEY, and TOKEN_ID are required.")
-
-MY_ACCOUNT_ID = AccountId.fromString(my_account_id_str)
-MY_PRIVATE_KEY = PrivateKey.fromString(my_private_key_str)
-TOKEN_ID = TokenId.fromString(token_id_str)
-
-# Initialize Hedera client
-hedera_client = Client.forTestnet()
-hedera_client.setOperator(MY_ACCOUNT_ID, MY_PRIVATE_KEY)
-logging.info(f"🚀 Connected to Hedera Testnet with Token ID: {TOKEN_ID}")
-
-# --- Kenya Stocks Database ---
-kenya_stocks = [
-    {'ticker': 'SAF', 'name': 'Safaricom PLC', 'price': 22.50, 'sector': 'Telecommunications', 'market_cap': '902B KES'},
-    {'ticker': 'EQTY', 'name': 'Equity Group Holdings', 'price': 45.75, 'sector': 'Banking', 'market_cap': '172B KES'},
-    {'ticker': 'KCB', 'name': 'KCB Group', 'price': 38.25, 'sector': 'Banking', 'market_cap': '156B KES'},
-    {'ticker': 'EABL', 'name': 'East African Breweries', 'price': 185.00, 'sector': 'Consumer Goods', 'market_cap': '140B KES'},
-    {'ticker': 'BAT', 'name': 'British American Tobacco Kenya', 'price': 425.00, 'sector': 'Consumer Goods', 'market_cap': '85B KES'},
-    {'ticker': 'COOP', 'name': 'Co-operative Bank', 'price': 14.50, 'sector': 'Banking', 'market_cap': '95B KES'},
-    {'ticker': 'ABSA', 'name': 'ABSA Bank Kenya', 'price': 12.80, 'sector': 'Banking', 'market_cap': '72B KES'},
-    {'ticker': 'BAMB', 'name': 'Bamburi Cement', 'price': 28.50, 'sector': 'Construction', 'market_cap': '35B KES'},
-    {'ticker': 'KPLC', 'name': 'Kenya Power & Lighting', 'price': 1.85, 'sector': 'Energy', 'market_cap': '12B KES'},
-    {'ticker': 'SCBK', 'name': 'Standard Chartered Bank Kenya', 'price': 165.00, 'sector': 'Banking', 'market_cap': '58B KES'},
-    {'ticker': 'DTBK', 'name': 'Diamond Trust Bank', 'price': 65.00, 'sector': 'Banking', 'market_cap': '26B KES'},
-    {'ticker': 'NBK', 'name': 'National Bank of Kenya', 'price': 6.50, 'sector': 'Banking', 'market_cap': '8B KES'},
-    {'ticker': 'SASINI', 'name': 'Sasini PLC', 'price': 11.25, 'sector': 'Agriculture', 'market_cap': '4B KES'},
-    {'ticker': 'TOTL', 'name': 'TotalEnergies Marketing Kenya', 'price': 4.20, 'sector': 'Energy', 'market_cap': '3.5B KES'},
-    {'ticker': 'UNGA', 'name': 'Unga Group', 'price': 32.00, 'sector': 'Consumer Goods', 'market_cap': '6B KES'},
-]
+def check_required_environment():
+    """Exit early if Bedrock or Hedera credentials are missing"""
+    env_bearer = os.getenv('BEDROCK_BEARER_TOKEN') or os.getenv('AWS_BEARER_TOKEN_BEDROCK')
+    if env_bearer:
+        os.environ['AWS_BEARER_TOKEN_BEDROCK'] = env_bearer
+    elif os.getenv('BEDROCK_CLIENT', 'boto3').lower() == 'stub':
+        logging.warning("AWS_BEARER_TOKEN_BEDROCK not set - fine with the offline Bedrock stub")
+    else:
+        logging.error("AWS_BEARER_TOKEN_BEDROCK not found in environment variables!")
+        exit("Exiting: AWS Bearer token is required.")
+    
+    # --- Hedera Configuration ---
+    my_account_id_str = os.getenv('MY_ACCOUNT_ID')
+    my_private_key_str = os.getenv('MY_PRIVATE_KEY')
+    token_id_str = os.getenv('TOKEN_ID')
+    
+    if not my_account_id_str or not my_private_key_str or not token_id_str:
+        logging.error("Missing required Hedera environment variables!")
+        exit("Exiting: MY_ACCOUNT_ID, MY_PRIVATE_KEY, and TOKEN_ID are required.")
+    
+    # Hedera clients come from the shared pool in hedera_pool.py and are created on first use
+    logging.info(f"🚀 Hedera configured with Token ID: {token_id_str}")
+
+def create_app():
+    """
+    Build the Flask application
+    
+    Loads .env, checks required configuration and registers the routes.
+    Bedrock, Hedera, SMS and the transaction log are created on first use,
+    so building the app does not start the JVM or import boto3.
+    
+    Returns:
+        Configured Flask app
+    """
+    load_environment()
+    check_required_environment()
+    
+    app = Flask(__name__)
+    app.json = FastJSONProvider(app)
+    app.config['BEDROCK_MODEL_ID'] = os.getenv('BEDROCK_MODEL_ID', 'anthropic.claude-3-haiku-20240307-v1:0')
+    app.register_blueprint(bp)
+    return app
+
+_app_lock = threading.Lock()
+
+def __getattr__(name):
+    """
+    Create the module-level `app` on first access
+    
+    Keeps `gunicorn app:app`, `flask run` and `from app import app` working;
+    importing the module alone still builds nothing.
+    """
+    if name != 'app':
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    with _app_lock:
+        if 'app' not in globals():
+            globals()['app'] = create_app()
+    return globals()['app']
+
+def preload_shared_resources():
+    """
+    Warm fork-safe, read-only state in the gunicorn master (preload mode)
+    
+    Only module code and parsed data are loaded here - no sessions, threads,
+    file handles or JVM - so workers share these pages copy-on-write.
+    """
+    import requests  # noqa: F401 - module import only, sessions are per worker
+    
+    try:
+        import boto3
+        # Parsing the service model into boto3's default session lets every
+        # worker build its Bedrock client from the shared, already-loaded data
+        boto3.client(service_name="bedrock-runtime", region_name=os.getenv('AWS_REGION', 'us-east-1'))
+    except Exception as e:
+        logging.warning(f"Could not preload Bedrock service model: {e}")
+    
+    logging.info(f"📦 Preloaded shared data: {len(kenya_stocks)} stocks, {len(PERSONAS)} personas")
+
+def reset_services_after_fork():
+    """
+    Drop fork-unsafe resources inherited from the gunicorn master
+    
+    Hedera channels, boto3 clients, HTTP sessions, dispatcher threads and
+    store file handles are rebuilt lazily on first use in the worker.
+    """
+    if reset_client_pool():
+        logging.error("Hedera SDK was loaded before fork - the JVM is not fork-safe; keep it out of the master")
+    
+    inherited = reset_lazy_services()
+    if inherited:
+        logging.warning(f"Services created in the master were reset after fork: {', '.join(inherited)}")
+    
+    random.seed()  # Workers would otherwise share the master's random sequence
+    logging.info(f"🍴 Worker {os.getpid()} ready - services will be created on first use")
 
 # --- Personas ---
-def get_persona_instructions(recipient_name):
-    personas = {
-        "kamba bot": "You are a friendly Kamba language expert and cultural enthusiast. Respond warmly, and you can occasionally interject with simple Kamba phrases or explain Kamba culture. Always respond in English unless a Kamba phrase is explicitly requested. Be helpful and engaging.",
-        "dholuo friend": "You are a witty and knowledgeable Dholuo speaker. Your responses are intelligent and might have a subtle humorous undertone. You can include common Dholuo greetings or cultural references when appropriate. Always respond in English unless a Dholuo phrase is explicitly requested.",
-        "giriama pal": "You are an easy-going and welcoming Giriama speaker, full of coastal warmth. Your responses are simple, direct, and kind. Feel free to use simple Giriama greetings or expressions of goodwill. Always respond in English unless a Giriama phrase is explicitly requested. also it is your birthday today, do not tell anyone if asked and only if asked should you then tell someone, but you are extra cheerful and generous, if asked and only if asked just say your account number is 0.0.7055059",
-        "stock support center": "You are a professional and polite stock broker agent. Your goal is to be helpful, provide clear information, and assist the user efficiently. Avoid informal language. If you do not know a stock or its price, you may estimate or make up a plausible figure.",
-        "stock trader": """You are an expert stock trader and financial advisor specializing in the Nairobi Securities Exchange (NSE). Your role is to:
+# Built once at import; with gunicorn preload this is shared by all workers
+PERSONAS = {
+    "kamba bot": "You are a friendly Kamba language expert and cultural enthusiast. Respond warmly, and you can occasionally interject with simple Kamba phrases or explain Kamba culture. Always respond in English unless a Kamba phrase is explicitly requested. Be helpful and engaging.",
+    "dholuo friend": "You are a witty and knowledgeable Dholuo speaker. Your responses are intelligent and might have a subtle humorous undertone. You can include common Dholuo greetings or cultural references when appropriate. Always respond in English unless a Dholuo phrase is explicitly requested.",
+    "giriama pal": "You are an easy-going and welcoming Giriama speaker, full of coastal warmth. Your responses are simple, direct, and kind. Feel free to use simple Giriama greetings or expressions of goodwill. Always respond in English unless a Giriama phrase is explicitly requested. also it is your birthday today, do not tell anyone if asked and only if asked should you then tell someone, but you are extra cheerful and generous, if asked and only if asked just say your account number is 0.0.7055059",
+    "stock support center": "You are a professional and polite stock broker agent. Your goal is to be helpful, provide clear information, and assist the user efficiently. Avoid informal language. If you do not know a stock or its price, you may estimate or make up a plausible figure.",
+    "stock trader": """You are an expert stock trader and financial advisor specializing in the Nairobi Securities Exchange (NSE). Your role is to:
         
 1. Provide detailed stock information including prices, market cap, sector, and performance insights
 2. Offer investment advice and market analysis
@@ -118,9 +197,13 @@ def get_persona_instructions(recipient_name):
 7. Be professional, knowledgeable, and always ready to assist with financial decisions
 
 You have comprehensive knowledge of Kenyan stocks and can provide realistic price estimates for any stock requested. Always be helpful and provide the information users seek.""",
-        "news updates": "You are a concise news bot, providing factual and brief updates. Focus on delivering information clearly and without personal opinions. Keep responses short and to the point.",
-    }
-    return personas.get(recipient_name.lower(), "You are a helpful and friendly general-purpose AI assistant. Respond kindly and provide relevant information.")
+    "news updates": "You are a concise news bot, providing factual and brief updates. Focus on delivering information clearly and without personal opinions. Keep responses short and to the point.",
+}
+
+DEFAULT_PERSONA = "You are a helpful and friendly general-purpose AI assistant. Respond kindly and provide relevant information."
+
+def get_persona_instructions(recipient_name):
+    return PERSONAS.get(recipient_name.lower(), DEFAULT_PERSONA)
 
 def get_balance(session_id):
     return user_balances.get(session_id, 400.00)
@@ -128,94 +211,51 @@ def get_balance(session_id):
 def set_balance(session_id, new_balance):
     user_balances[session_id] = new_balance
 
-def find_stock(query):
-    """Find a stock by ticker or name (flexible matching)"""
-    query = query.upper().strip()
-    
-    # First try exact ticker match
-    for stock in kenya_stocks:
-        if stock['ticker'] == query:
-            return stock
-    
-    # Then try name match (partial or full)
-    for stock in kenya_stocks:
-        if query in stock['name'].upper() or stock['name'].upper() in query:
-            return stock
-    
-    return None
-
-def generate_stock_advice(stock):
-    """Generate realistic stock advice"""
-    advice_templates = [
-        f"{stock['name']} is showing stable performance in the {stock['sector']} sector.",
-        f"With a market cap of {stock['market_cap']}, {stock['name']} is a solid choice for medium-term investment.",
-        f"{stock['name']} has been performing well in recent trading sessions.",
-        f"As a leader in {stock['sector']}, {stock['name']} offers good growth potential.",
-        f"{stock['name']} is a blue-chip stock worth considering for your portfolio."
-    ]
-    return random.choice(advice_templates)
-
-def transfer_hedera_tokens(recipient_account_id, amount, stock_name):
+def transfer_hedera_tokens(recipient_account_id, amount, stock_name, on_complete=None):
     """
-    Transfer Hedera tokens to a recipient account with SMS notifications.
+    Submit a Hedera token transfer to a recipient account.
+    
+    Returns as soon as the network accepts the transaction; the receipt is
+    resolved in the background, which then logs the outcome and sends the
+    token delivery SMS. Poll /api/hedera/tx/<transfer_id> for progress.
     
     Args:
         recipient_account_id: String like "0.0.1234"
         amount: Integer number of tokens to send
         stock_name: Name of the stock for the memo
+        on_complete: Optional callback run with the PendingTransfer once the
+            receipt resolves
         
     Returns:
-        dict with 'success': bool, 'message': str, 'transaction_id': str (if successful)
+        dict with 'success': bool, 'message': str, 'transfer_id': str and
+        'transaction_id': str (None while queued for a delivery batch)
     """
-    try:
-        logging.info(f"📦 Attempting to send {amount} token units to {recipient_account_id}")
-        
-        # Parse recipient account
-        friend_account = AccountId.fromString(recipient_account_id)
-        
-        # Create and execute transfer transaction
-        tx = (
-            TransferTransaction()
-            .addTokenTransfer(TOKEN_ID, MY_ACCOUNT_ID, -amount)   # sender (debit)
-            .addTokenTransfer(TOKEN_ID, friend_account, amount)   # recipient (credit)
-            .setTransactionMemo(f"{stock_name} stock token transfer of {amount} units.")
-        )
-        
-        tx_response = tx.execute(hedera_client)
-        receipt = tx_response.getReceipt(hedera_client)
-        transaction_id = str(tx_response.transactionId)
-        
-        logging.info(f"✅ Transfer complete! Status: {receipt.status}")
-        
-        # Send SMS notification about successful token transfer
-        try:
-            # Get recipient phone number from session or use demo number
-            recipient_phone = get_user_phone_from_session() or "+254700000000"
-            
-            # Send token transfer notification SMS
-            sms_result = sms_service.notify_token_transfer(
-                recipient_phone, amount, recipient_account_id, transaction_id
-            )
-            
-            logging.info(f"📱 SMS notification sent - Success: {sms_result.get('success', False)}")
-            
-        except Exception as sms_error:
-            logging.warning(f"SMS notification failed: {sms_error}")
-        
-        return {
-            'success': True,
-            'message': f"Successfully transferred {amount} token units to {recipient_account_id}",
-            'transaction_id': transaction_id,
-            'status': str(receipt.status)
-        }
-        
-    except Exception as e:
-        logging.error(f"❌ Token transfer failed: {e}", exc_info=True)
+    logging.info(f"📦 Submitting transfer of {amount} token units to {recipient_account_id}")
+    
+    # Get recipient phone number from session or use demo number
+    recipient_phone = get_user_phone_from_session() or "+254700000000"
+    
+    result = transaction_service.submit_token_transfer(
+        recipient_account_id, amount, f"{stock_name} stock token transfer of {amount} units.",
+        notify_phone=recipient_phone, log_data={'stock_name': stock_name}, on_complete=on_complete
+    )
+    
+    if not result.get('success'):
+        logging.error(f"❌ Token transfer failed: {result.get('error')}")
         return {
             'success': False,
-            'message': f"Transfer failed: {str(e)}",
-            'transaction_id': None
+            'message': f"Transfer failed: {result.get('error')}",
+            'transaction_id': None,
+            'transfer_id': None
         }
+    
+    return {
+        'success': True,
+        'message': f"Transfer of {amount} token units to {recipient_account_id} submitted",
+        'transaction_id': result['transaction_id'],
+        'transfer_id': result['transfer_id'],
+        'status': result['status']
+    }
 
 def get_user_phone_from_session():
     """
@@ -256,7 +296,51 @@ def send_africastalking_sms(phone_number, message, sender_id="TEXTAHBAR"):
             'error': str(e)
         }
 
-@app.route('/')
+def get_client_identifier():
+    """Identify the caller for rate limiting (API key, else client address)"""
+    api_key = request.headers.get('X-API-Key')
+    if api_key:
+        return f"key:{api_key}"
+    return f"ip:{request.access_route[0] if request.access_route else request.remote_addr}"
+
+def rate_limited(limiter, cost=None):
+    """
+    Decorator that rejects requests over the limiter's budget with HTTP 429
+    
+    Args:
+        limiter: RateLimiter instance shared by the decorated routes
+        cost: Optional callable giving the number of requests this request counts as (default 1)
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            identifier = get_client_identifier()
+            count = cost() if cost else 1
+            
+            if count > limiter.max_requests:
+                return jsonify({
+                    'success': False,
+                    'error': f'Request counts as {count} against a limit of {limiter.max_requests} per window',
+                    'timestamp': datetime.now().isoformat()
+                }), 400
+            
+            if not limiter.try_acquire(identifier, count):
+                retry_after = max(1, int(limiter.retry_after(identifier, count) + 0.999))
+                logging.warning(f"Rate limit exceeded for {identifier} on {request.path}")
+                response = jsonify({
+                    'success': False,
+                    'error': 'Too Many Requests - Rate limit exceeded',
+                    'retry_after': retry_after,
+                    'timestamp': datetime.now().isoformat()
+                })
+                response.headers['Retry-After'] = str(retry_after)
+                return response, 429
+            
+            return view(*args, **kwargs)
+        return wrapper
+    return decorator
+
+@bp.route('/')
 def index():
     """
     API Root endpoint with service information
@@ -286,12 +370,11 @@ def index():
         'timestamp': datetime.now().isoformat()
     })
 
-@app.route('/api/docs', methods=['GET'])
-def api_documentation():
+def build_api_docs():
     """
-    Complete API documentation
+    Complete API documentation payload (static, so it is serialized once)
     """
-    docs = {
+    return {
         'TextAHBAR API Documentation': {
             'version': '2.0.0',
             'base_url': 'https://your-domain.com',
@@ -305,7 +388,8 @@ def api_documentation():
                 'parameters': {
                     'message': 'string - The message to send',
                     'recipient_type': 'string - Type of recipient (stock_trader, kamba_bot, etc.)',
-                    'phone_number': 'string - Optional phone for SMS notifications'
+                    'phone_number': 'string - Optional phone for SMS notifications',
+                    'stream': 'boolean - Stream AI replies as text/event-stream (delta events, then done)'
                 },
                 'example': {
                     'message': 'What is the price of Safaricom stock?',
@@ -333,6 +417,21 @@ def api_documentation():
                     'ticker': 'string - Stock ticker symbol'
                 }
             },
+            '/api/stocks/history': {
+                'method': 'GET',
+                'description': 'Get recent price ticks from the live feed',
+                'parameters': {
+                    'ticker': 'string - Stock ticker symbol',
+                    'limit': 'integer - Optional number of most recent ticks'
+                }
+            },
+            '/api/stocks/stream': {
+                'method': 'GET',
+                'description': 'Server-sent events with live quote changes (each open stream uses a server thread; 503 with Retry-After when all stream slots are taken)',
+                'parameters': {
+                    'tickers': 'string - Optional comma-separated tickers (default all)'
+                }
+            },
             '/api/stocks/buy': {
                 'method': 'POST',
                 'description': 'Purchase stocks with HBAR tokens',
@@ -343,6 +442,21 @@ def api_documentation():
                     'hedera_account': 'string - Hedera account for token delivery'
                 }
             },
+            '/api/sms/bulk': {
+                'method': 'POST',
+                'description': 'Send SMS to many recipients in multi-recipient batches (each recipient counts against the SMS rate limit)',
+                'parameters': {
+                    'recipients': 'array - Recipient phone numbers (with message)',
+                    'message': 'string - SMS content shared by all recipients',
+                    'messages': 'array - Alternatively, objects with to, message and optional sender_id',
+                    'sender_id': 'string - Optional sender ID',
+                    'mode': 'string - batched (default, multi-recipient requests) or concurrent (async per-message sends)'
+                }
+            },
+            '/api/sms/dispatch/<dispatch_id>': {
+                'method': 'GET',
+                'description': 'Poll the delivery status of a queued SMS notification'
+            },
             '/api/hedera/balance': {
                 'method': 'GET',
                 'description': 'Get Hedera account balance',
@@ -357,8 +471,14 @@ def api_documentation():
                     'to_account': 'string - Recipient Hedera account',
                     'amount': 'integer - Token amount',
                     'memo': 'string - Transaction memo',
-                    'notify_phone': 'string - Phone for SMS notification'
+                    'notify_phone': 'string - Phone for SMS notification (sent once the receipt resolves)',
+                    'wait': 'boolean - Wait for the receipt instead of returning after submission',
+                    'timeout': 'number - Seconds to wait when wait is set'
                 }
+            },
+            '/api/hedera/tx/<transfer_id>': {
+                'method': 'GET',
+                'description': 'Poll the receipt status of a submitted token transfer (resolved transfers are read from the transaction store, so any worker can answer)'
             }
         },
         'response_format': {
@@ -375,301 +495,245 @@ def api_documentation():
             '500': 'Internal Server Error - Server error'
         }
     }
-    
-    return jsonify(docs)
 
-@app.route('/api/chat', methods=['POST'])
-def send_message():
-    data = request.get_json()
-    user_message = data.get('message', '').strip()
-    conversation_id = data.get('convo_id', None)
-    recipient_name = data.get('recipient_name', 'Unknown Recipient')
-    recipient_number = data.get('recipient_number', 'Unknown Number')
-    user_session_id = 'default_user_session'
+api_docs_response = create_precomputed_response(build_api_docs, max_age_env='API_DOCS_MAX_AGE', default_max_age=3600)
 
-    logging.info(f"Received message for convo_id: {conversation_id}, recipient: {recipient_name}, message: {user_message}")
+@bp.route('/api/docs', methods=['GET'])
+def api_documentation():
+    """
+    Complete API documentation
+    """
+    return api_docs_response.respond()
 
-    # === HEDERA ACCOUNT ID PROCESSING (HIGHEST PRIORITY - CHECK FIRST) ===
-    account_match = re.match(r'^(0\.\d+\.\d+)$', user_message.strip())
-    if account_match:
-        account_id = account_match.group(1)
-        logging.info(f"🆔 HEDERA ACCOUNT ID DETECTED: {account_id}")
-        logging.info(f"📋 Pending purchases: {pending_purchases}")
-        logging.info(f"👤 User session ID: {user_session_id}")
-        
-        # Check if we have a pending purchase for this session
-        if user_session_id in pending_purchases:
-            purchase = pending_purchases[user_session_id]
-            logging.info(f"📦 Purchase details: {purchase}")
-            logging.info(f"✅ MPESA confirmed: {purchase.get('mpesa_confirmed', False)}")
-            
-            if not purchase.get('mpesa_confirmed', False):
-                # Payment not yet confirmed
-                return jsonify({
-                    'type': 'chat_reply', 
-                    'reply': "❌ Payment not confirmed yet. Please complete the M-PESA STK push first by entering your PIN."
-                })
-            
-            # Payment confirmed - proceed with token transfer
-            stock_name = purchase.get('stock_name', purchase.get('stock_requested', 'Unknown Stock'))
-            qty = purchase.get('qty', 1)
-            
-            logging.info(f"🚀 Initiating Hedera token transfer: {qty} units to {account_id} for {stock_name}")
-            
-            # Execute actual Hedera token transfer (1 token per stock unit)
-            tokens_to_send = qty  # Send 1 token per stock unit
-            transfer_result = transfer_hedera_tokens(account_id, tokens_to_send, stock_name)
-            
-            if transfer_result['success']:
-                # Log the successful transaction
-                transaction_data = {
-                    'stock_name': stock_name,
-                    'quantity': qty,
-                    'tokens_sent': tokens_to_send,
-                    'recipient_account': account_id,
-                    'hedera_transaction_id': transfer_result['transaction_id'],
-                    'success': True
-                }
-                
-                tx_log_id = transaction_logger.log_transaction('stock_purchase', transaction_data)
-                
-                # Send comprehensive SMS notification
-                try:
-                    recipient_phone = get_user_phone_from_session()
-                    
-                    # Send stock purchase confirmation SMS
-                    purchase_total = purchase.get('total_amount', qty * 100)  # Fallback price
-                    sms_result = sms_service.notify_stock_purchase(
-                        recipient_phone, stock_name, qty, purchase_total, tx_log_id
-                    )
-                    
-                    logging.info(f"📱 Stock purchase SMS sent - Success: {sms_result.get('success', False)}")
-                    
-                except Exception as sms_error:
-                    logging.warning(f"SMS notification failed: {sms_error}")
-                
-                # Transfer succeeded
-                ack_message = (
-                    f"🎉 **Stock Purchase Complete!** 🎉\n\n"
-                    f"✅ **{stock_name}**: {qty} unit(s) purchased\n"
-                    f"💰 **Tokens Sent**: {tokens_to_send} token units\n"
-                    f"📧 **To Account**: {account_id}\n"
-                    f"🔗 **Transaction ID**: {transfer_result['transaction_id']}\n"
-                    f"📊 **Status**: {transfer_result['status']}\n"
-                    f"📱 **SMS Confirmation**: Sent to your registered number\n\n"
-                    f"Your tokens have been successfully delivered to your Hedera account!\n"
-                    f"Thank you for trading with us! 📈"
-                )
-                
-                # Clean up pending records
-                pending_purchases.pop(user_session_id, None)
-                pending_mpesa_confirmations.pop(user_session_id, None)
-                
-            else:
-                # Transfer failed
-                ack_message = (
-                    f"⚠️ **Token Delivery Issue** ⚠️\n\n"
-                    f"❌ **Error**: {transfer_result['message']}\n\n"
-                    f"Your purchase of {qty} unit(s) of {stock_name} was confirmed, "
-                    f"but we couldn't deliver tokens to {account_id}.\n\n"
-                    f"Please contact support with your transaction details."
-                )
-            
-            return jsonify({'type': 'chat_reply', 'reply': ack_message})
-            
-        else:
-            # No pending purchase found
+# --- Chat intent handlers ---
+# send_message() classifies each message once and dispatches through
+# CHAT_INTENT_HANDLERS; `chat` carries the request fields (message,
+# recipient_name, recipient_number, session_id)
+
+def handle_hedera_account(chat, account_id):
+    """A Hedera account ID completes a paid purchase by delivering its tokens"""
+    user_session_id = chat['session_id']
+    logging.info(f"🆔 HEDERA ACCOUNT ID DETECTED: {account_id}")
+    logging.info(f"📋 Pending purchases: {pending_purchases}")
+    logging.info(f"👤 User session ID: {user_session_id}")
+    
+    # Check if we have a pending purchase for this session
+    if user_session_id in pending_purchases:
+        purchase = pending_purchases[user_session_id]
+        logging.info(f"📦 Purchase details: {purchase}")
+        logging.info(f"✅ MPESA confirmed: {purchase.get('mpesa_confirmed', False)}")
+        
+        if not purchase.get('mpesa_confirmed', False):
+            # Payment not yet confirmed
             return jsonify({
                 'type': 'chat_reply', 
-                'reply': "❌ No pending purchase found. Please start a new stock purchase with 'buy [quantity] [ticker]'"
+                'reply': "❌ Payment not confirmed yet. Please complete the M-PESA STK push first by entering your PIN."
             })
-
-    is_stock_trader = 'stock trader' in recipient_name.lower()
-
-    # === STOCK TRADER - HANDLE STOCK-SPECIFIC QUERIES ===
-    if is_stock_trader:
-        logging.info("Stock Trader query detected")
         
-        # 1. List/show all stocks
-        if re.search(r'(list|show|top|all|available|kenyan).*stocks?', user_message, re.IGNORECASE):
-            logging.info("List stocks command detected")
-            reply_lines = ["📊 **Available Kenyan Stocks (NSE)**\n"]
-            for idx, s in enumerate(kenya_stocks, start=1):
-                reply_lines.append(f"{idx}. **{s['name']}** ({s['ticker']}) - KES {s['price']:.2f} | {s['sector']}")
-            return jsonify({'type': 'chat_reply', 'reply': '\n'.join(reply_lines)})
-
-        # 2. Stock price/info query - VERY BROAD PATTERNS
-        stock_keywords = ['price', 'quote', 'value', 'cost', 'worth', 'stock', 'share', 'trading']
-        is_stock_query = any(keyword in user_message.lower() for keyword in stock_keywords)
+        # Payment confirmed - proceed with token transfer
+        stock_name = purchase.get('stock_name', purchase.get('stock_requested', 'Unknown Stock'))
+        qty = purchase.get('qty', 1)
         
-        if is_stock_query:
-            logging.info(f"Stock query detected: {user_message}")
-            
-            clean_msg = user_message.lower()
-            for word in ['what', 'is', 'the', 'of', 'for', 'price', 'quote', 'stock', 'share', 'current', 'today', 'trading', 'at', 'how', 'much']:
-                clean_msg = clean_msg.replace(word, ' ')
+        logging.info(f"🚀 Initiating Hedera token transfer: {qty} units to {account_id} for {stock_name}")
+        
+        # Execute actual Hedera token transfer (1 token per stock unit)
+        tokens_to_send = qty  # Send 1 token per stock unit
+        recipient_phone = get_user_phone_from_session()
+        purchase_total = purchase.get('total_amount', qty * 100)  # Fallback price
+        
+        def confirm_purchase(transfer):
+            # Runs on the receipt resolver once delivery is final
+            delivered = transfer.to_dict()['success']
+            transaction_data = {
+                'stock_name': stock_name,
+                'quantity': qty,
+                'tokens_sent': tokens_to_send,
+                'recipient_account': account_id,
+                'hedera_transaction_id': transfer.transaction_id,
+                'transfer_id': transfer.transfer_id,
+                'receipt_status': transfer.status,
+                'error': transfer.error,
+                'success': delivered
+            }
             
-            potential_stock = ' '.join(clean_msg.split()).strip()
-            logging.info(f"Extracted potential stock: '{potential_stock}'")
+            tx_log_id = transaction_logger.log_transaction('stock_purchase', transaction_data)
             
-            if potential_stock:
-                stock = find_stock(potential_stock)
-                
-                if stock:
-                    logging.info(f"Stock found: {stock['name']}")
-                    reply = (
-                        f"📈 **{stock['name']} ({stock['ticker']})**\n\n"
-                        f"💰 Current Price: KES {stock['price']:.2f}\n"
-                        f"🏢 Sector: {stock['sector']}\n"
-                        f"📊 Market Cap: {stock['market_cap']}\n\n"
-                        f"💡 {generate_stock_advice(stock)}\n\n"
-                        f"Would you like to buy {stock['ticker']}? Reply 'buy [quantity] {stock['ticker']}'"
-                    )
-                    return jsonify({'type': 'chat_reply', 'reply': reply})
-                else:
-                    logging.info(f"Stock not found in database, generating estimate for: {potential_stock}")
-                    made_up_price = round(random.uniform(10, 500), 2)
-                    sectors = ['Technology', 'Banking', 'Energy', 'Manufacturing', 'Retail', 'Agriculture']
-                    sector = random.choice(sectors)
-                    reply = (
-                        f"📈 **{potential_stock.title()}**\n\n"
-                        f"💰 Current Price: KES {made_up_price:.2f}\n"
-                        f"🏢 Sector: {sector}\n\n"
-                        f"This stock is currently trading at KES {made_up_price:.2f}. "
-                        f"Would you like more information or to place an order?"
-                    )
-                    return jsonify({'type': 'chat_reply', 'reply': reply})
-
-        # 3. Buy command
-        buy_match = re.search(r'buy\s+(\d+)\s+(?:units?\s+(?:of\s+)?)?([A-Za-z0-9\s]+)', user_message, re.IGNORECASE)
-        if buy_match:
-            logging.info("Buy command detected")
-            qty = int(buy_match.group(1))
-            ticker = buy_match.group(2).strip().upper()
-            stock = find_stock(ticker)
+            if not delivered:
+                return
             
-            if stock:
-                unit_price = stock['price']
-                total = unit_price * qty
-                pending_purchases[user_session_id] = {
-                    'ticker': stock['ticker'],
-                    'qty': qty,
-                    'unit_price': unit_price,
-                    'total_amount': total,
-                    'recipient_name': recipient_name,
-                    'recipient_number': recipient_number,
-                    'stock_name': stock['name'],
-                    'mpesa_confirmed': False
-                }
-                # Trigger STK push simulation for the total amount (UI will handle PIN entry)
-                transaction_id = "TJTG" + ''.join(random.choices("ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789", k=6))
-                current_time = datetime.now().strftime("%d/%m/%y at %I:%M %p")
-                old_balance = get_balance(user_session_id)
-                new_balance = max(0, old_balance - total)
-                # deduct only at STK success; but keep previous behavior of reserving funds by deducting now:
-                set_balance(user_session_id, new_balance)
-                
-                # Enhanced M-PESA confirmation message
-                confirmation_message_text = (
-                    f"{transaction_id} Confirmed. Ksh{total:.2f} sent to "
-                    f"{stock['name']} {recipient_number} on {current_time}. "
-                    f"New M-pesa balance is ksh{new_balance:.2f}. Transaction cost, Ksh0.00. "
-                    "Amount you can transact within the day is 499,230."
+            # Send comprehensive SMS notification
+            try:
+                sms_result = sms_service.notify_stock_purchase(
+                    recipient_phone, stock_name, qty, purchase_total, tx_log_id, background=True
                 )
                 
-                # Log M-PESA transaction
-                mpesa_data = {
-                    'amount': total,
-                    'recipient': stock['name'],
-                    'recipient_number': recipient_number,
-                    'transaction_id': transaction_id,
-                    'new_balance': new_balance,
-                    'success': True
-                }
+                logging.info(f"📱 Stock purchase SMS queued - Dispatch ID: {sms_result.get('dispatch_id')}")
                 
-                transaction_logger.log_transaction('mpesa_payment', mpesa_data)
-                pending_mpesa_confirmations[user_session_id] = {
-                    'message': confirmation_message_text,
-                    'recipient_name': 'M-PESA',
-                    'purchase_ref': user_session_id
-                }
-                return jsonify({
-                    'type': 'stk_prompt',
-                    'amount': total,
-                    'recipient': stock['name'],
-                    'recipient_number': recipient_number,
-                    'prompt_message': f"STK Push for Ksh {total:.2f} to {stock['name']} ({recipient_number}). Enter PIN."
-                })
-            else:
-                return jsonify({'type': 'chat_reply', 'reply': f"Sorry, I couldn't find stock ticker '{ticker}'. Please check the ticker and try again."})
-
-        # 4. Natural language payment (e.g., "pay 20 for safaricom")
-        pay_match = re.search(r'pay\s+([\d\.]+)\s+for\s+(.+)', user_message, re.IGNORECASE)
-        if pay_match:
-            logging.info("Pay command detected")
-            amount = float(pay_match.group(1))
-            target = pay_match.group(2).strip()
-            stock = find_stock(target)
+            except Exception as sms_error:
+                logging.warning(f"SMS notification failed: {sms_error}")
+        
+        transfer_result = transfer_hedera_tokens(account_id, tokens_to_send, stock_name,
+                                                 on_complete=confirm_purchase)
+        
+        if transfer_result['success']:
+            # Transfer submitted; the receipt is still pending
+            ack_message = (
+                f"⏳ **Stock Purchase Submitted** ⏳\n\n"
+                f"✅ **{stock_name}**: {qty} unit(s) purchased\n"
+                f"💰 **Tokens**: {tokens_to_send} token units\n"
+                f"📧 **To Account**: {account_id}\n"
+                f"🔗 **Transfer ID**: {transfer_result['transaction_id'] or transfer_result['transfer_id']}\n"
+                f"📊 **Status**: {transfer_result['status']} (delivery pending)\n"
+                f"📱 **SMS Confirmation**: Sent to your registered number once delivery is confirmed\n\n"
+                f"Your token delivery has been submitted and is pending network confirmation.\n"
+                f"Thank you for trading with us! 📈"
+            )
             
-            if stock:
-                transaction_id = "TJTG" + ''.join(random.choices("ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789", k=6))
-                current_time = datetime.now().strftime("%d/%m/%y at %I:%M %p")
-                old_balance = get_balance(user_session_id)
-                new_balance = max(0, old_balance - amount)
-                set_balance(user_session_id, new_balance)
-                
-                confirmation_message_text = (
-                    f"{transaction_id} Confirmed. Ksh{amount:.2f} sent to "
-                    f"{stock['name']} {recipient_number} on {current_time}. "
-                    f"New M-pesa balance is ksh{new_balance:.2f}. Transaction cost, Ksh0.00. "
-                    "Amount you can transact within the day is 499,230."
-                )
-                
-                pending_purchases[user_session_id] = {
-                    'ticker': stock['ticker'],
-                    'qty': 1,
-                    'unit_price': amount,
-                    'total_amount': amount,
-                    'recipient_name': recipient_name,
-                    'recipient_number': recipient_number,
-                    'stock_requested': stock['name'],
-                    'stock_name': stock['name'],
-                    'mpesa_confirmed': False
-                }
-                
-                pending_mpesa_confirmations[user_session_id] = {
-                    'message': confirmation_message_text,
-                    'recipient_name': 'M-PESA',
-                    'stock_requested': stock['name'],
-                    'purchase_ref': user_session_id
-                }
-                
-                return jsonify({
-                    'type': 'stk_prompt',
-                    'amount': amount,
-                    'recipient': stock['name'],
-                    'recipient_number': recipient_number,
-                    'prompt_message': f"STK Push for Ksh {amount:.2f} to {stock['name']} ({recipient_number}). Enter PIN."
-                })
+            # Clean up pending records
+            pending_purchases.pop(user_session_id, None)
+            pending_mpesa_confirmations.pop(user_session_id, None)
+            
+        else:
+            # Transfer failed
+            ack_message = (
+                f"⚠️ **Token Delivery Issue** ⚠️\n\n"
+                f"❌ **Error**: {transfer_result['message']}\n\n"
+                f"Your purchase of {qty} unit(s) of {stock_name} was confirmed, "
+                f"but we couldn't deliver tokens to {account_id}.\n\n"
+                f"Please contact support with your transaction details."
+            )
+        
+        return jsonify({'type': 'chat_reply', 'reply': ack_message})
+        
+    else:
+        # No pending purchase found
+        return jsonify({
+            'type': 'chat_reply', 
+            'reply': "❌ No pending purchase found. Please start a new stock purchase with 'buy [quantity] [ticker]'"
+        })
+
+def handle_list_stocks(chat):
+    logging.info("List stocks command detected")
+    reply_lines = ["📊 **Available Kenyan Stocks (NSE)**\n"]
+    for idx, s in enumerate(list_stocks(), start=1):
+        reply_lines.append(f"{idx}. **{s['name']}** ({s['ticker']}) - KES {s['price']:.2f} | {s['sector']}")
+    return jsonify({'type': 'chat_reply', 'reply': '\n'.join(reply_lines)})
+
+def did_you_mean(query):
+    """A "Did you mean ...?" sentence for a stock query that matched nothing exactly ('' if nothing is close)"""
+    suggestions = suggest_stocks(query)
+    if not suggestions:
+        return ''
+    return "Did you mean " + ", ".join(f"{s['name']} ({s['ticker']})" for s in suggestions) + "?"
+
+def handle_stock_query(chat, query):
+    logging.info(f"Stock query detected: {chat['message']} -> '{query}'")
+    stock = find_stock(query)
+    
+    if stock:
+        logging.info(f"Stock found: {stock['name']}")
+        reply = (
+            f"📈 **{stock['name']} ({stock['ticker']})**\n\n"
+            f"💰 Current Price: KES {stock['price']:.2f}\n"
+            f"🏢 Sector: {stock['sector']}\n"
+            f"📊 Market Cap: {stock['market_cap']}\n\n"
+            f"💡 {generate_stock_advice(stock)}\n\n"
+            f"Would you like to buy {stock['ticker']}? Reply 'buy [quantity] {stock['ticker']}'"
+        )
+        return jsonify({'type': 'chat_reply', 'reply': reply})
+    else:
+        logging.info(f"Stock not found in database, generating estimate for: {query}")
+        made_up_price = round(random.uniform(10, 500), 2)
+        sectors = ['Technology', 'Banking', 'Energy', 'Manufacturing', 'Retail', 'Agriculture']
+        sector = random.choice(sectors)
+        reply = (
+            f"📈 **{query.title()}**\n\n"
+            f"💰 Current Price: KES {made_up_price:.2f}\n"
+            f"🏢 Sector: {sector}\n\n"
+            f"This stock is currently trading at KES {made_up_price:.2f}. "
+            f"Would you like more information or to place an order?"
+        )
+        suggestion = did_you_mean(query)
+        if suggestion:
+            reply += f"\n\n🔎 {suggestion}"
+        return jsonify({'type': 'chat_reply', 'reply': reply})
+
+def handle_buy_stock(chat, qty, ticker):
+    user_session_id = chat['session_id']
+    recipient_name = chat['recipient_name']
+    recipient_number = chat['recipient_number']
+    
+    logging.info("Buy command detected")
+    stock = find_stock(ticker)
+    
+    if stock:
+        unit_price = stock['price']
+        total = unit_price * qty
+        pending_purchases[user_session_id] = {
+            'ticker': stock['ticker'],
+            'qty': qty,
+            'unit_price': unit_price,
+            'total_amount': total,
+            'recipient_name': recipient_name,
+            'recipient_number': recipient_number,
+            'stock_name': stock['name'],
+            'mpesa_confirmed': False
+        }
+        # Trigger STK push simulation for the total amount (UI will handle PIN entry)
+        transaction_id = "TJTG" + ''.join(random.choices("ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789", k=6))
+        current_time = datetime.now().strftime("%d/%m/%y at %I:%M %p")
+        old_balance = get_balance(user_session_id)
+        new_balance = max(0, old_balance - total)
+        # deduct only at STK success; but keep previous behavior of reserving funds by deducting now:
+        set_balance(user_session_id, new_balance)
         
-        # 5. If it's stock trader but no specific command matched, provide helpful default
-        logging.info("Stock trader query but no specific pattern matched, providing general help")
-        default_reply = (
-            "👋 Welcome to Stock Trader!\n\n"
-            "I'm your personal stock trading assistant. I can help you with:\n\n"
-            "📊 Check stock prices (e.g., 'Safaricom stock price' or 'price of SAF')\n"
-            "📈 List available stocks ('list stocks' or 'top Kenyan stocks')\n"
-            "💰 Buy stocks ('buy 5 SAF')\n"
-            "💡 Investment advice and market insights\n"
-            "📉 Sector analysis and portfolio recommendations\n\n"
-            "What would you like to know about the market today?"
+        # Enhanced M-PESA confirmation message
+        confirmation_message_text = (
+            f"{transaction_id} Confirmed. Ksh{total:.2f} sent to "
+            f"{stock['name']} {recipient_number} on {current_time}. "
+            f"New M-pesa balance is ksh{new_balance:.2f}. Transaction cost, Ksh0.00. "
+            "Amount you can transact within the day is 499,230."
         )
-        return jsonify({'type': 'chat_reply', 'reply': default_reply})
+        
+        # Log M-PESA transaction
+        mpesa_data = {
+            'amount': total,
+            'recipient': stock['name'],
+            'recipient_number': recipient_number,
+            'transaction_id': transaction_id,
+            'new_balance': new_balance,
+            'success': True
+        }
+        
+        transaction_logger.log_transaction('mpesa_payment', mpesa_data)
+        pending_mpesa_confirmations[user_session_id] = {
+            'message': confirmation_message_text,
+            'recipient_name': 'M-PESA',
+            'purchase_ref': user_session_id
+        }
+        return jsonify({
+            'type': 'stk_prompt',
+            'amount': total,
+            'recipient': stock['name'],
+            'recipient_number': recipient_number,
+            'prompt_message': f"STK Push for Ksh {total:.2f} to {stock['name']} ({recipient_number}). Enter PIN."
+        })
+    else:
+        reply = f"Sorry, I couldn't find stock ticker '{ticker}'. Please check the ticker and try again."
+        suggestion = did_you_mean(ticker)
+        if suggestion:
+            reply += f" {suggestion} Reply 'buy {qty} [ticker]' to order."
+        return jsonify({'type': 'chat_reply', 'reply': reply})
 
-    # === GENERAL STK PUSH COMMAND (non-stock) ===
-    stk_match = re.match(r'^(pay|PAY)\s+([\d\.]+)\s*$', user_message, re.IGNORECASE)
-    if stk_match:
-        amount = float(stk_match.group(2))
+def handle_pay_for_stock(chat, amount, target):
+    user_session_id = chat['session_id']
+    recipient_name = chat['recipient_name']
+    recipient_number = chat['recipient_number']
+    
+    logging.info("Pay command detected")
+    stock = find_stock(target)
+    
+    if stock:
         transaction_id = "TJTG" + ''.join(random.choices("ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789", k=6))
         current_time = datetime.now().strftime("%d/%m/%y at %I:%M %p")
         old_balance = get_balance(user_session_id)
@@ -678,68 +742,223 @@ def send_message():
         
         confirmation_message_text = (
             f"{transaction_id} Confirmed. Ksh{amount:.2f} sent to "
-            f"{recipient_name} {recipient_number} on {current_time}. "
+            f"{stock['name']} {recipient_number} on {current_time}. "
             f"New M-pesa balance is ksh{new_balance:.2f}. Transaction cost, Ksh0.00. "
             "Amount you can transact within the day is 499,230."
         )
         
+        pending_purchases[user_session_id] = {
+            'ticker': stock['ticker'],
+            'qty': 1,
+            'unit_price': amount,
+            'total_amount': amount,
+            'recipient_name': recipient_name,
+            'recipient_number': recipient_number,
+            'stock_requested': stock['name'],
+            'stock_name': stock['name'],
+            'mpesa_confirmed': False
+        }
+        
         pending_mpesa_confirmations[user_session_id] = {
             'message': confirmation_message_text,
-            'recipient_name': 'M-PESA'
+            'recipient_name': 'M-PESA',
+            'stock_requested': stock['name'],
+            'purchase_ref': user_session_id
         }
         
         return jsonify({
             'type': 'stk_prompt',
             'amount': amount,
-            'recipient': recipient_name,
+            'recipient': stock['name'],
             'recipient_number': recipient_number,
-            'prompt_message': f"STK Push for Ksh {amount:.2f} to {recipient_name} ({recipient_number}). Enter PIN."
+            'prompt_message': f"STK Push for Ksh {amount:.2f} to {stock['name']} ({recipient_number}). Enter PIN."
         })
 
-    # === BEDROCK AI CHAT (for all other non-stock queries) ===
-    if conversation_id not in chat_sessions:
-        logging.info(f"Initializing new chat session for convo_id: {conversation_id}")
-        chat_sessions[conversation_id] = {
-            'history': [],
-            'persona_instruction': get_persona_instructions(recipient_name)
-        }
-        
-        chat_sessions[conversation_id]['history'].append({
-            'role': 'user',
-            'content': [{'text': chat_sessions[conversation_id]['persona_instruction']}]
-        })
-        chat_sessions[conversation_id]['history'].append({
-            'role': 'assistant',
-            'content': [{'text': "Acknowledged. I will now respond as per my instructions."}]
+    suggestion = did_you_mean(target)
+    if suggestion:
+        return jsonify({
+            'type': 'chat_reply',
+            'reply': f"Sorry, I couldn't find stock '{target}'. {suggestion} Reply 'pay {amount:g} for [ticker]' to pay."
         })
+    return handle_trader_help(chat)
+
+def handle_trader_help(chat):
+    logging.info("Stock trader query but no specific pattern matched, providing general help")
+    default_reply = (
+        "👋 Welcome to Stock Trader!\n\n"
+        "I'm your personal stock trading assistant. I can help you with:\n\n"
+        "📊 Check stock prices (e.g., 'Safaricom stock price' or 'price of SAF')\n"
+        "📈 List available stocks ('list stocks' or 'top Kenyan stocks')\n"
+        "💰 Buy stocks ('buy 5 SAF')\n"
+        "💡 Investment advice and market insights\n"
+        "📉 Sector analysis and portfolio recommendations\n\n"
+        "What would you like to know about the market today?"
+    )
+    return jsonify({'type': 'chat_reply', 'reply': default_reply})
+
+def handle_stk_push(chat, amount):
+    user_session_id = chat['session_id']
+    recipient_name = chat['recipient_name']
+    recipient_number = chat['recipient_number']
+    
+    transaction_id = "TJTG" + ''.join(random.choices("ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789", k=6))
+    current_time = datetime.now().strftime("%d/%m/%y at %I:%M %p")
+    old_balance = get_balance(user_session_id)
+    new_balance = max(0, old_balance - amount)
+    set_balance(user_session_id, new_balance)
+    
+    confirmation_message_text = (
+        f"{transaction_id} Confirmed. Ksh{amount:.2f} sent to "
+        f"{recipient_name} {recipient_number} on {current_time}. "
+        f"New M-pesa balance is ksh{new_balance:.2f}. Transaction cost, Ksh0.00. "
+        "Amount you can transact within the day is 499,230."
+    )
+    
+    pending_mpesa_confirmations[user_session_id] = {
+        'message': confirmation_message_text,
+        'recipient_name': 'M-PESA'
+    }
+    
+    return jsonify({
+        'type': 'stk_prompt',
+        'amount': amount,
+        'recipient': recipient_name,
+        'recipient_number': recipient_number,
+        'prompt_message': f"STK Push for Ksh {amount:.2f} to {recipient_name} ({recipient_number}). Enter PIN."
+    })
 
-    chat_session_data = chat_sessions[conversation_id]
-    messages_for_api = chat_session_data['history'] + [{'role': 'user', 'content': [{'text': user_message}]}]
+CHAT_INTENT_HANDLERS = {
+    'hedera_account': handle_hedera_account,
+    'list_stocks': handle_list_stocks,
+    'stock_query': handle_stock_query,
+    'buy_stock': handle_buy_stock,
+    'pay_for_stock': handle_pay_for_stock,
+    'trader_help': handle_trader_help,
+    'stk_push': handle_stk_push
+}
+
+@bp.route('/api/chat', methods=['POST'])
+@rate_limited(api_rate_limiter)
+def send_message():
+    data = request.get_json()
+    user_message = data.get('message', '').strip()
+    conversation_id = data.get('convo_id', None)
+    recipient_name = data.get('recipient_name', 'Unknown Recipient')
+    recipient_number = data.get('recipient_number', 'Unknown Number')
+    user_session_id = 'default_user_session'
+
+    logging.info(f"Received message for convo_id: {conversation_id}, recipient: {recipient_name}, message: {user_message}")
+
+    intent = classify_message(user_message, recipient_name)
+    handler = CHAT_INTENT_HANDLERS.get(intent.name)
+    if handler:
+        logging.info(f"Chat intent: {intent.name}")
+        chat = {
+            'message': user_message,
+            'recipient_name': recipient_name,
+            'recipient_number': recipient_number,
+            'session_id': user_session_id
+        }
+        return handler(chat, **intent.args)
+
+    # === BEDROCK AI CHAT (for all other non-stock queries) ===
+    # Sessions are bounded: only the persona preamble and the last CHAT_MAX_TURNS turns are sent
+    session_key = str(conversation_id)
+    chat_session_data = chat_sessions.get_or_create(session_key, get_persona_instructions(recipient_name))
+    messages_for_api = build_messages(chat_session_data, user_message)
+
+    # Repeated FAQ-style questions are answered from the response cache
+    cache = response_cache.get_instance()
+    cache_key = None
+    if cache and cache.caches(recipient_name):
+        cache_key = cache.make_key(chat_session_data, user_message)
+        cached_reply = cache.get(cache_key)
+        if cached_reply is not None:
+            chat_sessions.append_turn(session_key, user_message, cached_reply)
+            if data.get('stream'):
+                return Response(format_sse('delta', {'text': cached_reply}) +
+                                format_sse('done', {'type': 'chat_reply', 'reply': cached_reply, 'cached': True}),
+                                mimetype='text/event-stream', headers={'Cache-Control': 'no-cache'})
+            return jsonify({'type': 'chat_reply', 'reply': cached_reply, 'cached': True})
+
+    if data.get('stream'):
+        return stream_chat_reply(session_key, user_message, messages_for_api, cache_key)
 
     try:
-        response = bedrock_client.converse(
-            modelId=BEDROCK_MODEL_ID,
+        response = bedrock_gateway.converse(
+            modelId=current_app.config['BEDROCK_MODEL_ID'],
             messages=messages_for_api,
-            inferenceConfig={
-                "temperature": 0.7,
-                "topP": 0.9,
-                "maxTokens": 300,
-            }
+            inferenceConfig=CHAT_INFERENCE_CONFIG
         )
         
         bedrock_reply = response['output']['message']['content'][0]['text']
         
-        
-        chat_session_data['history'].append({'role': 'user', 'content': [{'text': user_message}]})
-        chat_session_data['history'].append({'role': 'assistant', 'content': [{'text': bedrock_reply}]})
+        chat_sessions.append_turn(session_key, user_message, bedrock_reply)
+        if cache_key:
+            cache.put(cache_key, bedrock_reply)
 
         return jsonify({'type': 'chat_reply', 'reply': bedrock_reply})
 
+    except TimeoutError as e:
+        logging.warning(f"Bedrock budget exceeded, sending fallback reply: {e}")
+        return jsonify({'type': 'chat_reply', 'reply': CHAT_FALLBACK_REPLY})
     except Exception as e:
         logging.error(f"Error communicating with AWS Bedrock API: {e}", exc_info=True)
-        return jsonify({'type': 'chat_reply', 'reply': 'Sorry, I am having trouble connecting to the AI at the moment.'})
+        return jsonify({'type': 'chat_reply', 'reply': CHAT_FALLBACK_REPLY})
 
-@app.route('/enter_pin', methods=['POST'])
+def format_sse(event, payload):
+    """Format one server-sent event"""
+    return f"event: {event}\ndata: {json_dumps(payload)}\n\n"
+
+def stream_chat_reply(session_key, user_message, messages_for_api, cache_key=None):
+    """
+    Stream a Bedrock reply as server-sent events
+    
+    Emits a 'delta' event per generated chunk and a final 'done' event with
+    the full reply (same shape as the JSON chat_reply). The assembled reply
+    is appended to the session history (and cached under cache_key) only
+    once the stream completes.
+    """
+    model_id = current_app.config['BEDROCK_MODEL_ID']
+    
+    def generate():
+        stream = None
+        parts = []
+        try:
+            stream = bedrock_gateway.converse_stream(
+                modelId=model_id,
+                messages=messages_for_api,
+                inferenceConfig=CHAT_INFERENCE_CONFIG
+            )['stream']
+            
+            for event in stream:
+                text = event.get('contentBlockDelta', {}).get('delta', {}).get('text')
+                if text:
+                    parts.append(text)
+                    yield format_sse('delta', {'text': text})
+            
+            bedrock_reply = ''.join(parts)
+            chat_sessions.append_turn(session_key, user_message, bedrock_reply)
+            if cache_key and bedrock_reply:
+                response_cache.put(cache_key, bedrock_reply)
+            yield format_sse('done', {'type': 'chat_reply', 'reply': bedrock_reply})
+        
+        except TimeoutError as e:
+            logging.warning(f"Bedrock budget exceeded mid-stream, sending fallback reply: {e}")
+            yield format_sse('error', {'type': 'chat_reply', 'reply': CHAT_FALLBACK_REPLY})
+        except Exception as e:
+            logging.error(f"Error streaming from AWS Bedrock API: {e}", exc_info=True)
+            yield format_sse('error', {'type': 'chat_reply', 'reply': CHAT_FALLBACK_REPLY})
+        
+        finally:
+            # Release the HTTP connection if the client went away mid-stream
+            if hasattr(stream, 'close'):
+                stream.close()
+    
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@bp.route('/enter_pin', methods=['POST'])
 def enter_pin():
     data = request.get_json()
     pin = data.get('pin', '')
@@ -778,7 +997,7 @@ def enter_pin():
     else:
         return jsonify({'status': 'error', 'message': 'Incorrect PIN. Transaction failed.'})
 
-@app.route('/sms_status', methods=['GET'])
+@bp.route('/sms_status', methods=['GET'])
 def sms_status():
     """
     Get SMS service status and recent activity
@@ -812,7 +1031,7 @@ def sms_status():
             'timestamp': datetime.now().isoformat()
         })
 
-@app.route('/send_test_sms', methods=['POST'])
+@bp.route('/send_test_sms', methods=['POST'])
 def send_test_sms():
     """
     Send a test SMS message (for debugging/testing)
@@ -838,7 +1057,7 @@ def send_test_sms():
             'timestamp': datetime.now().isoformat()
         })
 
-@app.route('/hedera_status', methods=['GET'])
+@bp.route('/hedera_status', methods=['GET'])
 def hedera_status():
     """
     Get Hedera network status and account information
@@ -852,6 +1071,8 @@ def hedera_status():
         
         # Get configuration validation
         config_validation = transaction_service.token_manager.config.validate_config()
+        client_pool = transaction_service.token_manager.client_pool
+        batcher = transaction_service.token_manager.batcher
         
         hedera_info = {
             'network': transaction_service.token_manager.config.network,
@@ -860,6 +1081,11 @@ def hedera_status():
             'balance_info': balance_info,
             'recent_transactions': transaction_history[-5:],  # Last 5 transactions
             'config_validation': config_validation,
+            'client_pool': client_pool.get_stats() if client_pool else None,
+            'delivery_batching': {
+                **batcher.get_stats(),
+                'fallbacks': transaction_service.token_manager.batch_fallbacks
+            } if batcher else None,
             'service_status': 'active' if config_validation.get('all_valid') else 'configuration_error',
             'timestamp': datetime.now().isoformat()
         }
@@ -874,7 +1100,7 @@ def hedera_status():
             'timestamp': datetime.now().isoformat()
         })
 
-@app.route('/api/dashboard', methods=['GET'])
+@bp.route('/api/dashboard', methods=['GET'])
 def api_dashboard():
     """
     Comprehensive API status dashboard
@@ -883,16 +1109,17 @@ def api_dashboard():
         # Get configuration report
         config_report = ConfigValidator.get_configuration_report()
         
-        # Get transaction statistics
-        all_transactions = transaction_logger.get_transactions(limit=100)
+        # Get transaction statistics (running aggregates over the whole history)
+        aggregates = transaction_logger.get_statistics()
+        type_counts = aggregates['transaction_types']
         
         transaction_stats = {
-            'total_transactions': len(all_transactions),
-            'sms_transactions': len([tx for tx in all_transactions if tx['type'] == 'sms']),
-            'stock_purchases': len([tx for tx in all_transactions if tx['type'] == 'stock_purchase']),
-            'mpesa_payments': len([tx for tx in all_transactions if tx['type'] == 'mpesa_payment']),
-            'token_transfers': len([tx for tx in all_transactions if tx['type'] == 'token_transfer']),
-            'recent_activity': all_transactions[-10:] if all_transactions else []
+            **aggregates,
+            'sms_transactions': type_counts.get('sms', 0),
+            'stock_purchases': type_counts.get('stock_purchase', 0),
+            'mpesa_payments': type_counts.get('mpesa_payment', 0),
+            'token_transfers': type_counts.get('token_transfer', 0),
+            'recent_activity': transaction_logger.get_transactions(limit=10)
         }
         
         # Get SMS service stats
@@ -921,7 +1148,12 @@ def api_dashboard():
             'statistics': {
                 'transactions': transaction_stats,
                 'sms': sms_stats,
-                'hedera': hedera_stats
+                'hedera': hedera_stats,
+                'chat_sessions': chat_sessions.get_stats(),
+                'chat_cache': response_cache.get_stats() if response_cache.get_instance() else None,
+                'bedrock': bedrock_gateway.get_stats() if bedrock_gateway.is_initialized() else None,
+                'price_feed': price_feed.get_stats(),
+                'quote_stream': quote_broadcaster.get_stats() if quote_broadcaster.is_initialized() else None
             },
             'services': {
                 'sms_service': 'active' if sms_stats['service_enabled'] else 'inactive',
@@ -942,7 +1174,7 @@ def api_dashboard():
             'timestamp': datetime.now().isoformat()
         })
 
-@app.route('/api/phone/validate', methods=['POST'])
+@bp.route('/api/phone/validate', methods=['POST'])
 def validate_phone_number():
     """
     Validate and format phone number
@@ -983,21 +1215,30 @@ def validate_phone_number():
             'timestamp': datetime.now().isoformat()
         })
 
-@app.route('/api/stocks/list', methods=['GET'])
+def build_stocks_list():
+    """Stock list payload; the timestamp is when these prices were serialized (not part of the ETag)"""
+    stocks = list_stocks()
+    return {
+        'success': True,
+        'data': {
+            'stocks': stocks,
+            'total_count': len(stocks),
+            'market': 'Nairobi Securities Exchange (NSE)'
+        },
+        'timestamp': datetime.now().isoformat()
+    }
+
+# Re-serialized only when the price feed publishes new prices
+stocks_list_response = create_precomputed_response(build_stocks_list, version=lambda: price_feed.version,
+                                                   max_age_env='STOCKS_LIST_MAX_AGE', default_max_age=5)
+
+@bp.route('/api/stocks/list', methods=['GET'])
 def get_stocks_list():
     """
     Get list of available stocks on NSE
     """
     try:
-        return jsonify({
-            'success': True,
-            'data': {
-                'stocks': kenya_stocks,
-                'total_count': len(kenya_stocks),
-                'market': 'Nairobi Securities Exchange (NSE)'
-            },
-            'timestamp': datetime.now().isoformat()
-        })
+        return stocks_list_response.respond()
     except Exception as e:
         return jsonify({
             'success': False,
@@ -1005,7 +1246,7 @@ def get_stocks_list():
             'timestamp': datetime.now().isoformat()
         })
 
-@app.route('/api/stocks/price/<ticker>', methods=['GET'])
+@bp.route('/api/stocks/price/<ticker>', methods=['GET'])
 def get_stock_price(ticker):
     """
     Get current price for a specific stock
@@ -1014,13 +1255,14 @@ def get_stock_price(ticker):
         stock = find_stock(ticker)
         
         if stock:
+            tick = price_feed.latest(stock['ticker'])
             return jsonify({
                 'success': True,
                 'data': {
                     'stock': stock,
                     'advice': generate_stock_advice(stock),
                     'market_status': 'open',  # Simulated
-                    'last_updated': datetime.now().isoformat()
+                    'last_updated': datetime.fromtimestamp(tick.timestamp).isoformat() if tick else datetime.now().isoformat()
                 },
                 'timestamp': datetime.now().isoformat()
             })
@@ -1028,6 +1270,7 @@ def get_stock_price(ticker):
             return jsonify({
                 'success': False,
                 'error': f'Stock ticker {ticker} not found',
+                'suggestions': [s['ticker'] for s in suggest_stocks(ticker)],
                 'timestamp': datetime.now().isoformat()
             }), 404
             
@@ -1038,7 +1281,87 @@ def get_stock_price(ticker):
             'timestamp': datetime.now().isoformat()
         })
 
-@app.route('/api/stocks/buy', methods=['POST'])
+@bp.route('/api/stocks/history/<ticker>', methods=['GET'])
+def get_stock_history(ticker):
+    """
+    Get recent price ticks for a stock from the live feed
+    """
+    try:
+        stock = find_stock(ticker)
+        if not stock:
+            return jsonify({
+                'success': False,
+                'error': f'Stock ticker {ticker} not found',
+                'timestamp': datetime.now().isoformat()
+            }), 404
+        
+        limit = request.args.get('limit', type=int)
+        ticks = price_feed.history(stock['ticker'], limit)
+        return jsonify({
+            'success': True,
+            'data': {
+                'ticker': stock['ticker'],
+                'ticks': [{'price': t.price, 'volume': t.volume, 'time': datetime.fromtimestamp(t.timestamp).isoformat()}
+                          for t in ticks],
+                'count': len(ticks)
+            },
+            'timestamp': datetime.now().isoformat()
+        })
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e),
+            'timestamp': datetime.now().isoformat()
+        })
+
+@bp.route('/api/stocks/stream', methods=['GET'])
+def stream_stock_prices():
+    """
+    Stream live quote changes as server-sent events
+    
+    Sends a 'quote' event per ticker with the current prices, then one per
+    price change. A 'lagged' event reports quotes dropped because the client
+    fell behind; comment lines keep idle connections alive. The connection
+    holds this request thread until the client disconnects.
+    """
+    requested = [t.strip().upper() for t in request.args.get('tickers', '').split(',') if t.strip()]
+    unknown = [t for t in requested if stock_catalog.get(t) is None]
+    if unknown:
+        return jsonify({
+            'success': False,
+            'error': f'Unknown stock tickers: {", ".join(unknown)}',
+            'timestamp': datetime.now().isoformat()
+        }), 404
+    
+    subscription = quote_broadcaster.subscribe(requested)
+    if subscription is None:
+        response = jsonify({
+            'success': False,
+            'error': 'Too many open price streams, try again shortly',
+            'timestamp': datetime.now().isoformat()
+        })
+        response.headers['Retry-After'] = str(max(1, int(QUOTE_STREAM_KEEPALIVE_SECONDS)))
+        return response, 503
+    
+    def generate():
+        try:
+            yield ''.join(quote_broadcaster.snapshot(requested))
+            reported_drops = 0
+            while True:
+                frames = subscription.get(QUOTE_STREAM_KEEPALIVE_SECONDS)
+                if subscription.dropped != reported_drops:
+                    yield format_sse('lagged', {'dropped': subscription.dropped - reported_drops})
+                    reported_drops = subscription.dropped
+                yield ''.join(frames) if frames else ': keepalive\n\n'
+        finally:
+            # Runs when the client disconnects (detected on the next write)
+            subscription.close()
+    
+    return Response(generate(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@bp.route('/api/stocks/buy', methods=['POST'])
 def buy_stock_api():
     """
     Purchase stocks via API with SMS and HBAR integration
@@ -1076,6 +1399,7 @@ def buy_stock_api():
             return jsonify({
                 'success': False,
                 'error': f'Stock ticker {ticker} not found',
+                'suggestions': [s['ticker'] for s in suggest_stocks(ticker)],
                 'timestamp': datetime.now().isoformat()
             }), 404
         
@@ -1101,7 +1425,10 @@ def buy_stock_api():
                 'hedera_transaction': result.get('token_transfer', {}),
                 'sms_notifications': result.get('sms_notifications', [])
             },
-            'message': 'Stock purchase completed successfully' if result.get('success') else 'Stock purchase failed',
+            'message': {
+                'completed': 'Stock purchase completed successfully',
+                'processing': 'Stock purchase accepted - tokens are being delivered'
+            }.get(result.get('overall_status'), 'Stock purchase failed'),
             'timestamp': datetime.now().isoformat()
         })
         
@@ -1113,7 +1440,8 @@ def buy_stock_api():
             'timestamp': datetime.now().isoformat()
         })
 
-@app.route('/api/sms/send', methods=['POST'])
+@bp.route('/api/sms/send', methods=['POST'])
+@rate_limited(sms_rate_limiter)
 def send_sms_api():
     """
     Send SMS message via AfricasTalking API
@@ -1170,7 +1498,120 @@ def send_sms_api():
             'timestamp': datetime.now().isoformat()
         })
 
-@app.route('/api/hedera/balance/<account_id>', methods=['GET'])
+def bulk_sms_cost():
+    """SMS quota a bulk request uses: one per recipient"""
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return 1
+    for field in ('messages', 'recipients'):
+        if isinstance(data.get(field), list) and data[field]:
+            return len(data[field])
+    return 1
+
+@bp.route('/api/sms/bulk', methods=['POST'])
+@rate_limited(sms_rate_limiter, cost=bulk_sms_cost)
+def send_bulk_sms_api():
+    """
+    Send SMS to many recipients using multi-recipient AfricasTalking requests
+    """
+    try:
+        data = request.get_json()
+        
+        # Either one message for many recipients, or individual messages
+        messages = data.get('messages')
+        if not messages:
+            if not data.get('recipients') or not data.get('message'):
+                return jsonify({
+                    'success': False,
+                    'error': 'Provide messages, or recipients and message',
+                    'timestamp': datetime.now().isoformat()
+                }), 400
+            
+            messages = [
+                {'to': recipient, 'message': data['message'], 'sender_id': data.get('sender_id', 'TEXTAHBAR')}
+                for recipient in data['recipients']
+            ]
+        
+        mode = data.get('mode', 'batched')
+        if mode not in ('batched', 'concurrent'):
+            return jsonify({
+                'success': False,
+                'error': 'mode must be batched or concurrent',
+                'timestamp': datetime.now().isoformat()
+            }), 400
+        
+        results = [None] * len(messages)
+        valid_messages, valid_positions = [], []
+        
+        for position, item in enumerate(messages):
+            if not item.get('to') or not item.get('message'):
+                results[position] = {'success': False, 'error': 'Missing to or message', 'status': 'failed',
+                                     'recipient': item.get('to')}
+            elif not PhoneNumberValidator.validate_phone_number(
+                    PhoneNumberValidator.format_phone_number(item['to']))['is_valid']:
+                results[position] = {'success': False, 'error': 'Invalid phone number format', 'status': 'failed',
+                                     'recipient': item['to']}
+            else:
+                valid_messages.append({
+                    'to': PhoneNumberValidator.format_phone_number(item['to']),
+                    'message': item['message'],
+                    'sender_id': item.get('sender_id', data.get('sender_id', 'TEXTAHBAR'))
+                })
+                valid_positions.append(position)
+        
+        if valid_messages:
+            for position, result in zip(valid_positions, sms_service.send_bulk(valid_messages, mode)):
+                results[position] = result
+        
+        sent = sum(1 for result in results if result.get('success'))
+        
+        return jsonify({
+            'success': sent > 0,
+            'data': {
+                'total': len(results),
+                'sent': sent,
+                'failed': len(results) - sent,
+                'results': [{
+                    'recipient': result.get('recipient'),
+                    'success': result.get('success', False),
+                    'message_id': result.get('message_id'),
+                    'cost': result.get('cost'),
+                    'error': result.get('error')
+                } for result in results]
+            },
+            'message': f'Bulk SMS accepted for {sent}/{len(results)} recipients ({mode})',
+            'timestamp': datetime.now().isoformat()
+        })
+        
+    except Exception as e:
+        logging.error(f"Bulk SMS API error: {e}")
+        return jsonify({
+            'success': False,
+            'error': str(e),
+            'timestamp': datetime.now().isoformat()
+        })
+
+@bp.route('/api/sms/dispatch/<dispatch_id>', methods=['GET'])
+def get_sms_dispatch_status(dispatch_id):
+    """
+    Poll the delivery status of a background (queued) SMS
+    """
+    status = sms_service.get_dispatch_status(dispatch_id)
+    
+    if not status:
+        return jsonify({
+            'success': False,
+            'error': f'Unknown dispatch ID {dispatch_id}',
+            'timestamp': datetime.now().isoformat()
+        }), 404
+    
+    return jsonify({
+        'success': True,
+        'data': status,
+        'timestamp': datetime.now().isoformat()
+    })
+
+@bp.route('/api/hedera/balance/<account_id>', methods=['GET'])
 def get_hedera_balance_api(account_id):
     """
     Get Hedera account balance
@@ -1199,7 +1640,7 @@ def get_hedera_balance_api(account_id):
             'timestamp': datetime.now().isoformat()
         })
 
-@app.route('/api/hedera/transfer', methods=['POST'])
+@bp.route('/api/hedera/transfer', methods=['POST'])
 def transfer_hedera_api():
     """
     Transfer HBAR tokens between accounts
@@ -1231,28 +1672,31 @@ def transfer_hedera_api():
                 'timestamp': datetime.now().isoformat()
             }), 400
         
-        # Transfer tokens
-        result = transaction_service.token_manager.transfer_tokens(to_account, amount, memo)
+        # Submit the transfer; the receipt and SMS notification are handled in the background
+        result = transaction_service.submit_token_transfer(to_account, amount, memo, notify_phone=notify_phone)
         
-        # Send SMS notification if phone provided
-        sms_result = None
-        if notify_phone and result.get('success'):
-            try:
-                sms_result = sms_service.notify_token_transfer(
-                    notify_phone, amount, to_account, result.get('transaction_id', '')
-                )
-            except Exception as sms_error:
-                logging.warning(f"SMS notification failed: {sms_error}")
+        # Optionally hold the request until the receipt resolves
+        if data.get('wait') and result.get('success'):
+            timeout = float(data.get('timeout', transaction_service.token_manager.config.transaction_timeout))
+            transfer = transaction_service.token_manager.receipt_resolver.get(result['transfer_id'])
+            result = transfer.wait(timeout)
+        
+        if not result.get('success'):
+            message = 'Token transfer failed'
+        elif result.get('pending'):
+            message = 'Token transfer submitted'
+        else:
+            message = 'Token transfer completed'
         
         return jsonify({
             'success': result.get('success', False),
             'data': {
                 'transfer': result,
-                'sms_notification': sms_result
+                'status_url': f"/api/hedera/tx/{result['transfer_id']}" if result.get('transfer_id') else None
             },
-            'message': 'Token transfer completed' if result.get('success') else 'Token transfer failed',
+            'message': message,
             'timestamp': datetime.now().isoformat()
-        })
+        }), 202 if result.get('pending') else 200
         
     except Exception as e:
         logging.error(f"Hedera transfer API error: {e}")
@@ -1262,7 +1706,26 @@ def transfer_hedera_api():
             'timestamp': datetime.now().isoformat()
         })
 
-@app.route('/api/transactions', methods=['GET'])
+@bp.route('/api/hedera/tx/<transfer_id>', methods=['GET'])
+def get_hedera_transaction_api(transfer_id):
+    """
+    Get the progress of a submitted Hedera token transfer
+    """
+    status = transaction_service.get_transfer_status(transfer_id)
+    if status is None:
+        return jsonify({
+            'success': False,
+            'error': f'Unknown transfer ID {transfer_id}',
+            'timestamp': datetime.now().isoformat()
+        }), 404
+    
+    return jsonify({
+        'success': True,
+        'data': status,
+        'timestamp': datetime.now().isoformat()
+    })
+
+@bp.route('/api/transactions', methods=['GET'])
 def get_transactions_api():
     """
     Get transaction history with filtering options
@@ -1271,31 +1734,32 @@ def get_transactions_api():
         # Get query parameters
         transaction_type = request.args.get('type')  # sms, stock_purchase, token_transfer
         limit = int(request.args.get('limit', 50))
-        
-        transactions = transaction_logger.get_transactions(transaction_type, limit)
-        
-        # Calculate statistics
-        stats = {
-            'total_transactions': len(transactions),
-            'successful_transactions': len([tx for tx in transactions if tx.get('status')]),
-            'failed_transactions': len([tx for tx in transactions if not tx.get('status')]),
-            'transaction_types': {}
-        }
-        
-        # Count by type
-        for tx in transactions:
-            tx_type = tx.get('type', 'unknown')
-            stats['transaction_types'][tx_type] = stats['transaction_types'].get(tx_type, 0) + 1
+        since = request.args.get('since')  # ISO timestamp lower bound
+        cursor = request.args.get('cursor', type=int)  # next_cursor from the previous page
+        
+        next_cursor = None
+        if since or cursor:
+            # Paginated mode: stream history page by page in log order
+            transactions, next_cursor = transaction_logger.get_transactions_page(
+                transaction_type, since, cursor, limit
+            )
+        else:
+            transactions = transaction_logger.get_transactions(transaction_type, limit)
         
         return jsonify({
             'success': True,
             'data': {
                 'transactions': transactions,
-                'statistics': stats,
+                'count': len(transactions),
+                # Whole-history statistics (for the type filter), kept up to date at write time
+                'statistics': transaction_logger.get_statistics(transaction_type),
                 'filters': {
                     'type': transaction_type,
-                    'limit': limit
-                }
+                    'limit': limit,
+                    'since': since,
+                    'cursor': cursor
+                },
+                'next_cursor': next_cursor
             },
             'timestamp': datetime.now().isoformat()
         })
@@ -1307,7 +1771,7 @@ def get_transactions_api():
             'timestamp': datetime.now().isoformat()
         })
 
-@app.route('/api/webhook/sms', methods=['POST'])
+@bp.route('/api/webhook/sms', methods=['POST'])
 def sms_webhook():
     """
     Webhook endpoint for SMS delivery reports from AfricasTalking
@@ -1349,6 +1813,8 @@ def sms_webhook():
 
 
 if __name__ == '__main__':
+    app = create_app()
+    
     # Log startup information
     logging.info("🚀 TextAHBAR app starting up...")
     logging.info("=" * 50)
@@ -0,0 +1,189 @@
+"""
+Async SMS Module
+asyncio-native AfricasTalking SMS client for high-fanout notification bursts,
+with a thread-backed sync facade so Flask routes can submit batches.
+"""
+
+import os
+import asyncio
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Dict, List, Optional
+
+from africastalking_client import AfricasTalkingConfig, HTTPTransport
+from sms_service import AfricasTalkingSMS
+
+# aiohttp is optional - without it, HTTP sends fall back to the pooled
+# requests transport on the default executor
+try:
+    import aiohttp
+    AIOHTTP_AVAILABLE = True
+except ImportError:
+    AIOHTTP_AVAILABLE = False
+    logging.warning("aiohttp not available - async SMS will use threaded requests")
+
+class AsyncAfricasTalkingSMS(AfricasTalkingSMS):
+    """
+    asyncio SMS client returning the same result dicts as AfricasTalkingSMS.send_sms
+    """
+
+    def __init__(self, config: AfricasTalkingConfig = None, transport=None, concurrency: int = None):
+        super().__init__(config, transport)
+        self.concurrency = concurrency or int(os.getenv('SMS_ASYNC_CONCURRENCY', 100))
+        self.use_aiohttp = AIOHTTP_AVAILABLE and isinstance(self.transport, HTTPTransport)
+
+        # Created inside the running loop on first use
+        self._session = None
+        self._semaphore = None
+
+    async def _get_session(self):
+        """Get the shared aiohttp session, creating it on first use"""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.concurrency, keepalive_timeout=30)
+            timeout = aiohttp.ClientTimeout(sock_connect=self.config.connect_timeout,
+                                            sock_read=self.config.read_timeout)
+            self._session = aiohttp.ClientSession(connector=connector, timeout=timeout,
+                                                  headers=self.config.get_headers())
+        return self._session
+
+    async def _post_messaging_async(self, payload: Dict) -> Dict:
+        """
+        POST to the messaging endpoint without blocking the event loop
+
+        Like HTTPTransport, retries only 429/503 responses carrying Retry-After.
+        """
+        if not self.use_aiohttp:
+            if self.transport.name == 'simulated':
+                return self.transport.request('POST', self.base_url, payload)
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(None, self.transport.request, 'POST', self.base_url, payload)
+
+        session = await self._get_session()
+        for attempt in range(self.config.max_retries + 1):
+            async with session.post(self.base_url, data=payload) as response:
+                retry_after = response.headers.get('Retry-After')
+                if (response.status in HTTPTransport.RETRY_STATUS_CODES and retry_after and
+                        attempt < self.config.max_retries):
+                    delay = float(retry_after) if retry_after.isdigit() else self.config.retry_delay * (2 ** attempt)
+                    logging.warning(f"SMS request got HTTP {response.status}, retrying in {delay:.1f}s")
+                    await asyncio.sleep(delay)
+                    continue
+                response.raise_for_status()
+                return await response.json(content_type=None)
+
+    async def send_sms_async(self, to: str, message: str, sender_id: str = None) -> Dict:
+        """
+        Send SMS message, bounded by the client's concurrency semaphore
+
+        Args:
+            to: Phone number in international format (+254XXXXXXXXX)
+            message: SMS message content
+            sender_id: Optional sender ID (shortcode or alphanumeric)
+
+        Returns:
+            Dict with status, message_id, cost, and delivery info
+        """
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+
+        try:
+            to = self._normalize_number(to)
+            payload = self._build_payload(to, message, sender_id)
+
+            async with self._semaphore:
+                api_response = await self._post_messaging_async(payload)
+
+            return self._send_result(to, api_response)
+
+        except Exception as e:
+            logging.error(f"Failed to send SMS to {to}: {str(e)}")
+            return {
+                'success': False,
+                'error': str(e),
+                'status': 'failed',
+                'recipient': to
+            }
+
+    async def send_many_async(self, messages: List[Dict]) -> List[Dict]:
+        """
+        Send individual messages concurrently
+
+        Args:
+            messages: Dicts with 'to', 'message' and optional 'sender_id'
+
+        Returns:
+            One result per message, in input order
+        """
+        return await asyncio.gather(*(
+            self.send_sms_async(item['to'], item['message'], item.get('sender_id'))
+            for item in messages
+        ))
+
+    async def close(self):
+        """Close the aiohttp session"""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+class AsyncSMSSender:
+    """
+    Sync facade running an AsyncAfricasTalkingSMS on a background event loop
+    """
+
+    def __init__(self, client: AsyncAfricasTalkingSMS = None):
+        self.client = client or AsyncAfricasTalkingSMS()
+        self._loop = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        """Start the event loop thread on first use"""
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=self._loop.run_forever,
+                                                name='sms-async-loop', daemon=True)
+                self._thread.start()
+        return self._loop
+
+    def submit_batch(self, messages: List[Dict]) -> Future:
+        """
+        Queue a batch on the event loop without waiting
+
+        Returns:
+            concurrent.futures.Future resolving to the list of results
+        """
+        return asyncio.run_coroutine_threadsafe(self.client.send_many_async(messages), self._ensure_loop())
+
+    def send_batch(self, messages: List[Dict], timeout: Optional[float] = None) -> List[Dict]:
+        """
+        Send a batch concurrently and wait for every result
+
+        Args:
+            messages: Dicts with 'to', 'message' and optional 'sender_id'
+            timeout: Seconds to wait before giving up
+
+        Returns:
+            One result per message, in input order
+        """
+        logging.info(f"Sending {len(messages)} SMS concurrently (limit {self.client.concurrency})")
+        return self.submit_batch(messages).result(timeout)
+
+    def send_sms(self, to: str, message: str, sender_id: str = None) -> Dict:
+        """Send one message through the event loop and wait for the result"""
+        return asyncio.run_coroutine_threadsafe(
+            self.client.send_sms_async(to, message, sender_id), self._ensure_loop()
+        ).result()
+
+    def shutdown(self):
+        """Close the session and stop the event loop thread"""
+        with self._lock:
+            if self._loop is None:
+                return
+            asyncio.run_coroutine_threadsafe(self.client.close(), self._loop).result(5)
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(5)
+            self._loop.close()
+            self._loop = None
+            self._thread = None
@@ -0,0 +1,279 @@
+"""
+Bedrock Gateway Module
+Wraps the Bedrock runtime client so bursts of chat traffic cannot pile up on
+the model: calls share a bounded number of slots, every call has a deadline
+covering both queueing and generation, and identical in-flight requests are
+coalesced into one model call.
+"""
+
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from bisect import bisect_left
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Iterator
+
+# Upper bounds (ms) of the latency histogram buckets; the last bucket is open-ended
+LATENCY_BUCKETS_MS = (100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+class LatencyTracker:
+    """
+    Latency histogram plus a rolling window of samples for percentiles
+    """
+
+    def __init__(self, window: int = 1000):
+        self._samples = deque(maxlen=window)
+        self._buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        milliseconds = seconds * 1000
+        with self._lock:
+            self._samples.append(milliseconds)
+            self._buckets[bisect_left(LATENCY_BUCKETS_MS, milliseconds)] += 1
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            samples = sorted(self._samples)
+            buckets = list(self._buckets)
+
+        def percentile(fraction):
+            return round(samples[min(len(samples) - 1, int(len(samples) * fraction))], 1) if samples else None
+
+        labels = [f"le_{bound}ms" for bound in LATENCY_BUCKETS_MS] + [f"gt_{LATENCY_BUCKETS_MS[-1]}ms"]
+        return {
+            'samples': len(samples),
+            'p50_ms': percentile(0.50),
+            'p95_ms': percentile(0.95),
+            'p99_ms': percentile(0.99),
+            'histogram': dict(zip(labels, buckets))
+        }
+
+class BedrockGateway:
+    """
+    Concurrency-limited, deadline-bounded access to a Bedrock runtime client
+
+    At most max_concurrency model calls run at once. A call that cannot get a
+    slot, or whose answer does not arrive, before its deadline raises
+    TimeoutError so the caller can fall back immediately; the abandoned model
+    call keeps its slot until it actually finishes, so the limit stays honest.
+    """
+
+    def __init__(self, client, max_concurrency: int = 8, deadline: float = 20.0):
+        """
+        Args:
+            client: bedrock-runtime client (or anything with converse/converse_stream)
+            max_concurrency: Model calls allowed in flight at once
+            deadline: Default seconds a call may take, including waiting for a slot
+        """
+        self.client = client
+        self.max_concurrency = max(1, max_concurrency)
+        self.deadline = deadline
+
+        self._slots = threading.BoundedSemaphore(self.max_concurrency)
+        self._executor = None
+        self._in_flight = {}  # coalescing key -> Future
+        self._lock = threading.Lock()
+
+        self._counters = {'calls': 0, 'coalesced': 0, 'rejected': 0, 'timeouts': 0, 'errors': 0, 'streams': 0}
+        self._active = 0
+        self.latency = LatencyTracker()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Start the call pool on first use (one thread per slot, so submissions never queue)"""
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency,
+                                                    thread_name_prefix='bedrock-call')
+            return self._executor
+
+    def _count(self, name: str):
+        with self._lock:
+            self._counters[name] += 1
+
+    def _acquire_slot(self, expires_at: float):
+        """Wait for a free slot until the deadline"""
+        if not self._slots.acquire(timeout=max(0.0, expires_at - time.monotonic())):
+            self._count('rejected')
+            raise TimeoutError(f"No Bedrock slot free within the deadline ({self.max_concurrency} calls in flight)")
+        with self._lock:
+            self._active += 1
+
+    def _release_slot(self):
+        with self._lock:
+            self._active -= 1
+        self._slots.release()
+
+    @staticmethod
+    def coalescing_key(request: Dict) -> str:
+        """Identify requests that would produce the same model call"""
+        return hashlib.sha256(json.dumps(request, sort_keys=True).encode('utf-8')).hexdigest()
+
+    def _call(self, request: Dict) -> Dict:
+        try:
+            return self.client.converse(**request)
+        finally:
+            self._release_slot()
+
+    def converse(self, deadline: float = None, **request) -> Dict:
+        """
+        Call converse through the gateway
+
+        Args:
+            deadline: Seconds allowed for this call (defaults to the gateway deadline)
+            **request: converse arguments (modelId, messages, inferenceConfig, ...)
+
+        Returns:
+            converse response dict
+
+        Raises:
+            TimeoutError: No slot or no answer within the deadline
+        """
+        start = time.monotonic()
+        expires_at = start + (deadline if deadline is not None else self.deadline)
+        key = self.coalescing_key(request)
+
+        with self._lock:
+            self._counters['calls'] += 1
+            future = self._in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = self._in_flight[key] = Future()
+            else:
+                self._counters['coalesced'] += 1
+
+        if leader:
+            try:
+                self._acquire_slot(expires_at)
+                call = self._get_executor().submit(self._call, request)
+            except Exception as e:
+                with self._lock:
+                    self._in_flight.pop(key, None)
+                future.set_exception(e)
+            else:
+                def finish(done: Future):
+                    with self._lock:
+                        self._in_flight.pop(key, None)
+                    if done.exception() is not None:
+                        future.set_exception(done.exception())
+                    else:
+                        future.set_result(done.result())
+                call.add_done_callback(finish)
+
+        try:
+            response = future.result(timeout=max(0.0, expires_at - time.monotonic()))
+        except Exception as e:
+            # On Python 3.11+ a result() timeout and a rejected slot are both TimeoutError
+            if not future.done():
+                self._count('timeouts')
+                raise TimeoutError(f"Bedrock did not answer within {expires_at - start:.1f}s") from None
+            if not isinstance(e, TimeoutError):
+                self._count('errors')
+            raise
+
+        self.latency.record(time.monotonic() - start)
+        return response
+
+    def converse_stream(self, deadline: float = None, **request) -> Dict:
+        """
+        Call converse_stream through the gateway
+
+        Streams are not coalesced. The slot is held until the stream is
+        exhausted or closed, and the deadline is checked between events.
+
+        Returns:
+            Dict with 'stream' iterating converse_stream events
+
+        Raises:
+            TimeoutError: No slot within the deadline (raised here) or the
+                stream outran it (raised while iterating)
+        """
+        start = time.monotonic()
+        expires_at = start + (deadline if deadline is not None else self.deadline)
+
+        with self._lock:
+            self._counters['streams'] += 1
+        self._acquire_slot(expires_at)
+        try:
+            response = self.client.converse_stream(**request)
+        except Exception:
+            self._release_slot()
+            self._count('errors')
+            raise
+
+        return {**response, 'stream': GuardedStream(self, response['stream'], start, expires_at)}
+
+    def get_stats(self) -> Dict:
+        """Get gateway counters and latency percentiles"""
+        with self._lock:
+            stats = dict(self._counters)
+            stats.update({
+                'in_flight': self._active,
+                'max_concurrency': self.max_concurrency,
+                'deadline_seconds': self.deadline
+            })
+        stats['latency'] = self.latency.get_stats()
+        return stats
+
+class GuardedStream:
+    """
+    converse_stream events that enforce the call deadline and give the
+    gateway slot back exactly once, when exhausted or closed
+    """
+
+    def __init__(self, gateway: BedrockGateway, stream, start: float, expires_at: float):
+        self._gateway = gateway
+        self._stream = stream
+        self._events = iter(stream)
+        self._start = start
+        self._expires_at = expires_at
+        self._closed = False
+
+    def __iter__(self) -> Iterator[Dict]:
+        return self
+
+    def __next__(self) -> Dict:
+        if self._closed:
+            raise StopIteration
+        try:
+            event = next(self._events)
+        except StopIteration:
+            self._gateway.latency.record(time.monotonic() - self._start)
+            self.close()
+            raise
+        except Exception:
+            self._gateway._count('errors')
+            self.close()
+            raise
+
+        if time.monotonic() > self._expires_at:
+            self._gateway._count('timeouts')
+            self.close()
+            raise TimeoutError(f"Bedrock stream exceeded its {self._expires_at - self._start:.1f}s deadline")
+        return event
+
+    def close(self):
+        """Close the underlying stream and release the gateway slot"""
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            if hasattr(self._stream, 'close'):
+                self._stream.close()
+        finally:
+            self._gateway._release_slot()
+
+def create_bedrock_gateway(client) -> BedrockGateway:
+    """Wrap a Bedrock client with limits from BEDROCK_MAX_CONCURRENCY and BEDROCK_DEADLINE_SECONDS"""
+    gateway = BedrockGateway(
+        client,
+        max_concurrency=int(os.getenv('BEDROCK_MAX_CONCURRENCY', 8)),
+        deadline=float(os.getenv('BEDROCK_DEADLINE_SECONDS', 20))
+    )
+    logging.info(f"Bedrock gateway ready - {gateway.max_concurrency} concurrent calls, "
+                 f"{gateway.deadline:.0f}s deadline")
+    return gateway
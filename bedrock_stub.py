@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Local Bedrock Stub Client
+An offline stand-in for the boto3 bedrock-runtime client, implementing
+converse and converse_stream with the same response shapes so chat and
+streaming code paths can be exercised without AWS credentials.
+
+Select it with BEDROCK_CLIENT=stub.
+"""
+
+import os
+import sys
+import time
+import argparse
+import threading
+from typing import Dict, Iterator, List
+
+class ThrottlingException(Exception):
+    """Raised like botocore's ThrottlingException when too many calls are in flight"""
+
+class StubBedrockClient:
+    """
+    Fake bedrock-runtime client with configurable generation latency
+    """
+
+    def __init__(self, first_token_latency: float = None, chunk_delay: float = None, max_concurrency: int = None):
+        """
+        Args:
+            first_token_latency: Seconds before the first chunk (model queueing and prompt processing)
+            chunk_delay: Seconds between streamed chunks (generation speed)
+            max_concurrency: Calls in flight before further calls are throttled (0 = unlimited)
+        """
+        self.first_token_latency = first_token_latency if first_token_latency is not None \
+            else float(os.getenv('BEDROCK_STUB_LATENCY', 0.3))
+        self.chunk_delay = chunk_delay if chunk_delay is not None \
+            else float(os.getenv('BEDROCK_STUB_CHUNK_DELAY', 0.02))
+        self.max_concurrency = max_concurrency if max_concurrency is not None \
+            else int(os.getenv('BEDROCK_STUB_MAX_CONCURRENCY', 0))
+        self.calls = 0
+        self.throttled = 0
+        self._active = 0
+        self._lock = threading.Lock()
+
+    def _enter(self):
+        with self._lock:
+            self.calls += 1
+            if self.max_concurrency and self._active >= self.max_concurrency:
+                self.throttled += 1
+                raise ThrottlingException("Too many requests, please wait before trying again.")
+            self._active += 1
+
+    def _exit(self):
+        with self._lock:
+            self._active -= 1
+
+    def _reply_chunks(self, messages: List[Dict]) -> List[str]:
+        """Build a deterministic reply from the last user message, split like model output"""
+        question = messages[-1]['content'][0]['text'] if messages else ''
+        reply = (f"This is the offline Bedrock stub answering \"{question}\". "
+                 f"The conversation so far has {len(messages)} messages. "
+                 f"Set BEDROCK_CLIENT=boto3 to talk to the real model.")
+        words = reply.split(' ')
+        return [' '.join(words[i:i + 3]) + ' ' for i in range(0, len(words), 3)]
+
+    def _usage(self, messages: List[Dict], chunks: List[str]) -> Dict:
+        input_tokens = sum(len(m['content'][0]['text'].split()) for m in messages)
+        output_tokens = sum(len(chunk.split()) for chunk in chunks)
+        return {'inputTokens': input_tokens, 'outputTokens': output_tokens,
+                'totalTokens': input_tokens + output_tokens}
+
+    def converse(self, modelId: str, messages: List[Dict], inferenceConfig: Dict = None, **kwargs) -> Dict:
+        """Return the whole reply once generation finishes, like bedrock-runtime converse"""
+        self._enter()
+        try:
+            chunks = self._reply_chunks(messages)
+            time.sleep(self.first_token_latency + self.chunk_delay * len(chunks))
+        finally:
+            self._exit()
+
+        return {
+            'output': {'message': {'role': 'assistant', 'content': [{'text': ''.join(chunks).rstrip()}]}},
+            'stopReason': 'end_turn',
+            'usage': self._usage(messages, chunks),
+            'metrics': {'latencyMs': int((self.first_token_latency + self.chunk_delay * len(chunks)) * 1000)}
+        }
+
+    def converse_stream(self, modelId: str, messages: List[Dict], inferenceConfig: Dict = None, **kwargs) -> Dict:
+        """Return an event stream shaped like bedrock-runtime converse_stream"""
+        self._enter()
+        return {'stream': self._events(messages)}
+
+    def _events(self, messages: List[Dict]) -> Iterator[Dict]:
+        try:
+            chunks = self._reply_chunks(messages)
+            chunks[-1] = chunks[-1].rstrip()
+
+            time.sleep(self.first_token_latency)
+            yield {'messageStart': {'role': 'assistant'}}
+            for chunk in chunks:
+                yield {'contentBlockDelta': {'delta': {'text': chunk}, 'contentBlockIndex': 0}}
+                time.sleep(self.chunk_delay)
+            yield {'contentBlockStop': {'contentBlockIndex': 0}}
+            yield {'messageStop': {'stopReason': 'end_turn'}}
+            yield {'metadata': {'usage': self._usage(messages, chunks), 'metrics': {'latencyMs': 0}}}
+        finally:
+            self._exit()
+
+def main():
+    """Print a streamed stub reply to the terminal"""
+    parser = argparse.ArgumentParser(description='Offline Bedrock stub client')
+    parser.add_argument('message', nargs='?', default='What is the price of Safaricom stock?')
+    parser.add_argument('--latency', type=float, default=0.3, help='Seconds before the first chunk')
+    parser.add_argument('--chunk-delay', type=float, default=0.05, help='Seconds between chunks')
+    args = parser.parse_args()
+
+    client = StubBedrockClient(args.latency, args.chunk_delay)
+    response = client.converse_stream(modelId='stub', messages=[{'role': 'user', 'content': [{'text': args.message}]}])
+    for event in response['stream']:
+        if 'contentBlockDelta' in event:
+            sys.stdout.write(event['contentBlockDelta']['delta']['text'])
+            sys.stdout.flush()
+    print()
+
+if __name__ == "__main__":
+    main()
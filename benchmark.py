@@ -0,0 +1,905 @@
+#!/usr/bin/env python3
+"""
+TextAHBAR Performance Benchmarks
+Micro-benchmarks for hot paths, run from the command line
+"""
+
+import sys
+import os
+import time
+import socket
+import argparse
+import tempfile
+import subprocess
+import multiprocessing
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from statistics import median
+
+# Add the app directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+def percentile(samples, fraction):
+    """Get a percentile from a list of samples"""
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+def print_latency(label, samples):
+    """Print a latency summary in microseconds"""
+    print(f"   {label}:")
+    print(f"      p50: {median(samples) * 1e6:8.1f} µs")
+    print(f"      p99: {percentile(samples, 0.99) * 1e6:8.1f} µs")
+    print(f"      max: {max(samples) * 1e6:8.1f} µs")
+
+def _rate_limit_worker(db_path, max_requests, attempts, results):
+    """Hammer the shared limiter from a separate process"""
+    from utils import RateLimiter, SQLiteRateLimitStore
+    limiter = RateLimiter(max_requests=max_requests, name='bench', store=SQLiteRateLimitStore(db_path))
+    results.put(sum(1 for _ in range(attempts) if limiter.try_acquire('shared-caller')))
+
+def bench_rate_limit(args):
+    """Benchmark rate limit check latency and verify cross-process limits"""
+    from utils import RateLimiter, SQLiteRateLimitStore
+
+    print(f"🚦 Rate limiter check latency ({args.iterations} checks)")
+    db_path = os.path.join(tempfile.mkdtemp(prefix='textahbar-bench-'), 'ratelimit.db')
+
+    limiters = {
+        'memory (per process)': RateLimiter(max_requests=args.iterations * 2, name='bench'),
+        'sqlite (shared)': RateLimiter(max_requests=args.iterations * 2, name='bench',
+                                       store=SQLiteRateLimitStore(db_path)),
+    }
+
+    for label, limiter in limiters.items():
+        samples = []
+        for i in range(args.iterations):
+            identifier = f"caller-{i % 50}"
+            start = time.perf_counter()
+            limiter.try_acquire(identifier)
+            samples.append(time.perf_counter() - start)
+        print_latency(label, samples)
+
+    print(f"\n👥 Shared limit across {args.processes} processes (limit {args.limit} per window)")
+    results = multiprocessing.Queue()
+    workers = [
+        multiprocessing.Process(target=_rate_limit_worker,
+                                args=(db_path, args.limit, args.limit, results))
+        for _ in range(args.processes)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    allowed = sum(results.get() for _ in workers)
+    print(f"   Attempts: {args.limit * args.processes}")
+    print(f"   Allowed: {allowed} {'✅' if allowed <= args.limit else '❌'}")
+
+def _stub_server_worker(latency, urls):
+    """Run the AfricasTalking stub in its own process so it does not share our GIL"""
+    from africastalking_stub import start_stub_server
+    server, url = start_stub_server(latency=latency)
+    urls.put(url)
+    while True:
+        time.sleep(3600)
+
+def start_stub_process(latency):
+    """Start the stub server in a child process and return (process, base_url)"""
+    urls = multiprocessing.Queue()
+    process = multiprocessing.Process(target=_stub_server_worker, args=(latency, urls), daemon=True)
+    process.start()
+    return process, urls.get(timeout=10)
+
+def bench_sms_transport(args):
+    """Benchmark SMS send throughput over the pooled transport against the local stub"""
+    import logging
+    import requests
+    from africastalking_client import AfricasTalkingConfig, create_transport
+    from sms_service import AfricasTalkingSMS
+
+    logging.disable(logging.INFO)  # Per-message log lines would dominate the timings
+    server, url = start_stub_process(args.latency)
+    config = AfricasTalkingConfig()
+    config.base_url = url
+    config.pool_size = max(config.pool_size, args.threads)
+
+    class UnpooledTransport:
+        """New connection per request, like a bare requests.post"""
+        name = 'unpooled'
+        def request(self, method, url, data=None):
+            response = requests.request(method, url, data=data, headers=config.get_headers(),
+                                        timeout=(config.connect_timeout, config.read_timeout))
+            response.raise_for_status()
+            return response.json()
+
+    transports = {
+        'pooled keep-alive': create_transport(config, 'http'),
+        'new connection per request': UnpooledTransport(),
+    }
+
+    print(f"📨 SMS send throughput ({args.messages} messages, {args.threads} threads, "
+          f"{args.latency * 1000:.0f} ms stub latency)")
+    try:
+        for label, transport in transports.items():
+            client = AfricasTalkingSMS(config, transport)
+            samples = []
+
+            def send(i):
+                start = time.perf_counter()
+                result = client.send_sms(f"+2547{i:08d}", "Benchmark message")
+                samples.append(time.perf_counter() - start)
+                return result['success']
+
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=args.threads) as pool:
+                sent = sum(pool.map(send, range(args.messages)))
+            elapsed = time.perf_counter() - start
+
+            print(f"   {label}: {args.messages / elapsed:,.0f} msg/s ({sent}/{args.messages} sent)")
+            print_latency('send latency', samples)
+    finally:
+        server.terminate()
+
+def bench_sms_async(args):
+    """Benchmark async SMS throughput at several concurrency levels against the local stub"""
+    import asyncio
+    import logging
+    from africastalking_client import AfricasTalkingConfig, create_transport
+    from async_sms import AsyncAfricasTalkingSMS, AIOHTTP_AVAILABLE
+
+    logging.disable(logging.INFO)  # Per-message log lines would dominate the timings
+    server, url = start_stub_process(args.latency)
+    config = AfricasTalkingConfig()
+    config.base_url = url
+    messages = [{'to': f"+2547{i:08d}", 'message': 'Benchmark message'} for i in range(args.messages)]
+
+    print(f"⚡ Async SMS throughput ({args.messages} messages, {args.latency * 1000:.0f} ms stub latency, "
+          f"{'aiohttp' if AIOHTTP_AVAILABLE else 'threaded requests'})")
+
+    async def run(concurrency):
+        client = AsyncAfricasTalkingSMS(config, create_transport(config, 'http'), concurrency=concurrency)
+        try:
+            start = time.perf_counter()
+            results = await client.send_many_async(messages)
+            return time.perf_counter() - start, sum(1 for r in results if r['success'])
+        finally:
+            await client.close()
+
+    try:
+        for concurrency in args.concurrency:
+            elapsed, sent = asyncio.run(run(concurrency))
+            print(f"   concurrency {concurrency:>4}: {args.messages / elapsed:8,.0f} msg/s "
+                  f"({sent}/{args.messages} sent in {elapsed:.2f}s)")
+    finally:
+        server.terminate()
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Commands whose cold start should stay fast
+STARTUP_COMMANDS = {
+    'import app': ['-c', 'import app'],
+    'cli utils phone': ['cli_manager.py', 'utils', 'phone', '0712345678'],
+    'cli stocks list': ['cli_manager.py', 'stocks', 'list'],
+}
+
+# Modules that must not load until a request actually needs them
+HEAVY_MODULES = ('jnius', 'hedera', 'boto3', 'botocore')
+
+def parse_importtime(stderr):
+    """Parse `python -X importtime` output into (module, depth, cumulative_us) rows"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((name.strip(), depth, int(cumulative)))
+    return rows
+
+def bench_startup(args):
+    """Measure cold start wall-clock and import-time breakdown for app and CLI commands"""
+    print(f"🧊 Cold start ({args.runs} runs each)")
+    failures = []
+
+    for label, command in STARTUP_COMMANDS.items():
+        samples = []
+        for _ in range(args.runs):
+            start = time.perf_counter()
+            subprocess.run([sys.executable] + command, cwd=APP_DIR, capture_output=True)
+            samples.append(time.perf_counter() - start)
+
+        traced = subprocess.run([sys.executable, '-X', 'importtime'] + command, cwd=APP_DIR,
+                                capture_output=True, text=True)
+        rows = parse_importtime(traced.stderr)
+        heavy = sorted({name.split('.')[0] for name, _, _ in rows if name.split('.')[0] in HEAVY_MODULES})
+        wall_ms = median(samples) * 1000
+
+        print(f"\n   {label}: {wall_ms:.0f} ms wall-clock (median)")
+        for name, _, cumulative in sorted((r for r in rows if r[1] <= 1), key=lambda r: -r[2])[:args.top]:
+            print(f"      {cumulative / 1000:7.1f} ms  {name}")
+        print(f"      Heavy modules loaded: {', '.join(heavy) if heavy else 'none ✅'}")
+
+        if heavy:
+            failures.append(f"{label} loaded {', '.join(heavy)}")
+        if args.max_ms and wall_ms > args.max_ms:
+            failures.append(f"{label} took {wall_ms:.0f} ms (limit {args.max_ms} ms)")
+
+    if failures:
+        print("\n❌ Startup regressions:")
+        for failure in failures:
+            print(f"   • {failure}")
+        sys.exit(1)
+
+# Read-only requests that touch the stock table, personas and the lazy services
+WARMUP_PATHS = ('/api/stocks/list', '/api/docs', '/sms_status', '/hedera_status', '/api/dashboard')
+
+def read_memory_kb(pid):
+    """Read (RSS, PSS) of a process in kB from /proc; PSS splits shared pages between sharers"""
+    rss = pss = 0
+    with open(f'/proc/{pid}/status') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                rss = int(line.split()[1])
+    try:
+        with open(f'/proc/{pid}/smaps_rollup') as f:
+            for line in f:
+                if line.startswith('Pss:'):
+                    pss = int(line.split()[1])
+    except OSError:
+        pass  # Older kernels have no smaps_rollup
+    return rss, pss
+
+def child_pids(pid):
+    """List direct children of a process (the gunicorn workers)"""
+    with open(f'/proc/{pid}/task/{pid}/children') as f:
+        return [int(child) for child in f.read().split()]
+
+def measure_gunicorn(preload, args):
+    """Start gunicorn with gunicorn_config.py, warm it up and read per-process memory"""
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        port = s.getsockname()[1]
+
+    env = dict(os.environ, PORT=str(port), WEB_CONCURRENCY=str(args.workers),
+               GUNICORN_PRELOAD='true' if preload else 'false')
+    # create_app() refuses to start without credentials; none are used by the warm-up requests
+    for name in ('AWS_BEARER_TOKEN_BEDROCK', 'MY_ACCOUNT_ID', 'MY_PRIVATE_KEY', 'TOKEN_ID'):
+        env.setdefault(name, 'benchmark')
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env.setdefault('TRANSACTION_DB_PATH', os.path.join(tmp, 'transactions.db'))
+        env.setdefault('RATE_LIMIT_DB_PATH', os.path.join(tmp, 'ratelimit.db'))
+        master = subprocess.Popen([sys.executable, '-m', 'gunicorn', '-c', 'gunicorn_config.py'],
+                                  cwd=APP_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            base_url = f'http://127.0.0.1:{port}'
+            deadline = time.monotonic() + 30
+            while True:
+                try:
+                    urllib.request.urlopen(base_url + '/api/stocks/list', timeout=2).read()
+                    break
+                except OSError:
+                    if master.poll() is not None or time.monotonic() > deadline:
+                        raise RuntimeError('gunicorn did not start - run it by hand to see the error')
+                    time.sleep(0.2)
+
+            # Spread warm-up traffic so every worker builds its lazy services
+            for _ in range(args.requests):
+                for path in WARMUP_PATHS:
+                    urllib.request.urlopen(base_url + path, timeout=10).read()
+
+            workers = child_pids(master.pid)
+            return read_memory_kb(master.pid), [read_memory_kb(pid) for pid in workers]
+        finally:
+            master.terminate()
+            master.wait(10)
+
+def bench_workers(args):
+    """Compare per-worker memory with and without gunicorn preload"""
+    if not os.path.exists('/proc/self/smaps_rollup'):
+        print("⚠️  Needs Linux /proc to read process memory")
+        return
+
+    print(f"🧠 gunicorn memory ({args.workers} workers, {args.requests} warm-up rounds)")
+    for preload in (False, True):
+        master, workers = measure_gunicorn(preload, args)
+        avg_rss = sum(rss for rss, _ in workers) / len(workers) / 1024
+        avg_pss = sum(pss for _, pss in workers) / len(workers) / 1024
+        total_pss = (master[1] + sum(pss for _, pss in workers)) / 1024
+
+        print(f"\n   preload {'on ' if preload else 'off'}: master RSS {master[0] / 1024:.1f} MB")
+        print(f"      per worker: RSS {avg_rss:.1f} MB, PSS {avg_pss:.1f} MB")
+        print(f"      total PSS (master + {len(workers)} workers): {total_pss:.1f} MB")
+
+def bench_hedera_batch(args):
+    """Compare Hedera transactions per delivery with and without delivery batching (simulation mode)"""
+    import logging
+    import random
+    logging.disable(logging.ERROR)  # Simulated receipt failures are expected
+    os.environ.setdefault('HEDERA_RECEIPT_WORKERS', str(args.threads))
+    from hbar_manager import HederaTokenManager
+
+    print(f"📦 Hedera token deliveries ({args.deliveries} purchases from {args.threads} threads, simulated consensus)")
+    for window_ms in (0, args.window_ms):
+        os.environ['HEDERA_BATCH_WINDOW_MS'] = str(window_ms)
+        manager = HederaTokenManager()
+        random.seed(42)
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.threads) as pool:
+            results = list(pool.map(lambda i: manager.submit_transfer(f"0.0.{5000 + i % args.accounts}", 1),
+                                    range(args.deliveries)))
+        resolved = [manager.receipt_resolver.get(r['transfer_id']).wait(60) for r in results]
+        elapsed = time.perf_counter() - start
+
+        transactions = len({r['transaction_id'] for r in resolved if r['transaction_id']})
+        delivered = sum(1 for r in resolved if r['success'])
+        label = f"batched ({window_ms:g} ms window)" if window_ms else "unbatched"
+        print(f"   {label:>24}: {transactions} transactions for {delivered}/{args.deliveries} delivered "
+              f"({args.deliveries / max(transactions, 1):.1f} deliveries/tx, "
+              f"{manager.batch_fallbacks} batch fallbacks, {elapsed:.1f}s)")
+        manager.receipt_resolver.shutdown()
+
+def bench_chat_stream(args):
+    """Compare time-to-first-byte of /api/chat with and without streaming, against the Bedrock stub"""
+    import logging
+    logging.disable(logging.INFO)
+    os.environ.update(BEDROCK_CLIENT='stub', BEDROCK_STUB_LATENCY=str(args.latency),
+                      BEDROCK_STUB_CHUNK_DELAY=str(args.chunk_delay), CHAT_SESSION_STORE='memory')
+    for name in ('MY_ACCOUNT_ID', 'MY_PRIVATE_KEY', 'TOKEN_ID'):
+        os.environ.setdefault(name, 'benchmark')
+    from werkzeug.test import Client
+    import app as app_module
+    client = Client(app_module.create_app())
+
+    print(f"💬 /api/chat time-to-first-byte ({args.requests} requests, stub first token "
+          f"{args.latency * 1000:.0f} ms, {args.chunk_delay * 1000:.0f} ms/chunk)")
+    for stream in (False, True):
+        first_byte, total = [], []
+        for i in range(args.requests):
+            body = {'message': f'Tell me about the market {i}', 'convo_id': f'bench-{stream}-{i}', 'stream': stream}
+            start = time.perf_counter()
+            response = client.post('/api/chat', json=body)
+            chunks = response.iter_encoded()
+            next(chunks)
+            first_byte.append(time.perf_counter() - start)
+            for _ in chunks:
+                pass
+            total.append(time.perf_counter() - start)
+        print(f"   {'streamed' if stream else 'buffered':>8}: first byte p50 {median(first_byte) * 1000:6.1f} ms, "
+              f"complete p50 {median(total) * 1000:6.1f} ms")
+
+def bench_bedrock_burst(args):
+    """Compare a burst of chat calls made directly against the Bedrock stub and through the gateway"""
+    from bedrock_stub import StubBedrockClient
+    from bedrock_gateway import BedrockGateway
+
+    # Half the burst repeats a few FAQ-style questions, the rest are unique
+    requests_ = [{
+        'modelId': 'stub',
+        'messages': [{'role': 'user', 'content': [{'text': f"question {i % 5 if i % 2 else i}"}]}],
+        'inferenceConfig': {'maxTokens': 300}
+    } for i in range(args.requests)]
+
+    print(f"🌊 Bedrock burst ({args.requests} calls from {args.threads} threads, stub throttles above "
+          f"{args.stub_limit} in flight, {args.latency * 1000:.0f} ms per call)")
+    for label in ('direct', 'gateway'):
+        client = StubBedrockClient(first_token_latency=args.latency, chunk_delay=0, max_concurrency=args.stub_limit)
+        call = client.converse
+        if label == 'gateway':
+            gateway = BedrockGateway(client, max_concurrency=args.stub_limit, deadline=args.deadline)
+            call = gateway.converse
+
+        def run(request):
+            start = time.perf_counter()
+            try:
+                call(**request)
+                return True, time.perf_counter() - start
+            except Exception:
+                return False, time.perf_counter() - start  # The app would send its fallback reply
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.threads) as pool:
+            results = list(pool.map(run, requests_))
+        elapsed = time.perf_counter() - start
+
+        answered = [latency for ok, latency in results if ok]
+        failed = [latency for ok, latency in results if not ok]
+        answered_ms = sorted(latency * 1000 for latency in answered)
+        print(f"\n   {label}: {len(answered)} answered, {len(failed)} fell back, "
+              f"{client.calls} model calls ({client.throttled} throttled) in {elapsed:.2f}s")
+        if answered_ms:
+            print(f"      answered p50 {percentile(answered_ms, 0.5):.0f} ms, p95 {percentile(answered_ms, 0.95):.0f} ms, "
+                  f"p99 {percentile(answered_ms, 0.99):.0f} ms")
+        if failed:
+            print(f"      fallback after at most {max(failed) * 1000:.0f} ms")
+        if label == 'gateway':
+            stats = gateway.get_stats()
+            print(f"      coalesced {stats['coalesced']}, rejected {stats['rejected']}, timeouts {stats['timeouts']}")
+
+# Realistic /api/chat traffic: (recipient_name, message)
+CHAT_CORPUS = [
+    ('Stock Trader', 'What is the price of Safaricom stock?'),
+    ('Stock Trader', 'price of SAF'),
+    ('Stock Trader', 'How much is KCB trading at today?'),
+    ('Stock Trader', 'equity bank share price'),
+    ('Stock Trader', 'EABL quote'),
+    ('Stock Trader', 'list stocks'),
+    ('Stock Trader', 'show me the top kenyan stocks'),
+    ('Stock Trader', 'buy 5 SAF'),
+    ('Stock Trader', 'buy 10 units of KCB'),
+    ('Stock Trader', 'pay 250 for safaricom'),
+    ('Stock Trader', 'hello'),
+    ('Stock Trader', 'What should I invest in this year?'),
+    ('Stock Trader', 'Is BAT a good dividend stock?'),
+    ('Stock Trader', 'current value of co-op bank'),
+    ('Stock Trader', '0.0.4839210'),
+    ('Mama Mboga', 'Habari yako? Una sukuma leo?'),
+    ('Mama Mboga', 'pay 150'),
+    ('Mama Mboga', 'How much are tomatoes today?'),
+    ('Landlord', 'I will pay the rent on Friday, sorry for the delay'),
+    ('Landlord', 'PAY 15000'),
+    ('Landlord', 'The kitchen sink is leaking again, can you send a plumber?'),
+    ('Boda Boda', 'Niko stage, uko wapi?'),
+    ('Boda Boda', 'pay 200'),
+    ('Friend', "Let's meet at the Java on Kimathi street at 6pm"),
+    ('Friend', 'Did you see the Harambee Stars match last night?'),
+    ('Friend', '0.0.12345'),
+]
+
+def legacy_route(message, recipient_name):
+    """The sequential router send_message used before intent_router: inline patterns, keyword scans, substring stopwords"""
+    import re
+    if re.match(r'^(0\.\d+\.\d+)$', message.strip()):
+        return 'hedera_account'
+    if 'stock trader' in recipient_name.lower():
+        if re.search(r'(list|show|top|all|available|kenyan).*stocks?', message, re.IGNORECASE):
+            return 'list_stocks'
+        stock_keywords = ['price', 'quote', 'value', 'cost', 'worth', 'stock', 'share', 'trading']
+        if any(keyword in message.lower() for keyword in stock_keywords):
+            clean_msg = message.lower()
+            for word in ['what', 'is', 'the', 'of', 'for', 'price', 'quote', 'stock', 'share', 'current', 'today', 'trading', 'at', 'how', 'much']:
+                clean_msg = clean_msg.replace(word, ' ')
+            if ' '.join(clean_msg.split()).strip():
+                return 'stock_query'
+        if re.search(r'buy\s+(\d+)\s+(?:units?\s+(?:of\s+)?)?([A-Za-z0-9\s]+)', message, re.IGNORECASE):
+            return 'buy_stock'
+        if re.search(r'pay\s+([\d\.]+)\s+for\s+(.+)', message, re.IGNORECASE):
+            return 'pay_for_stock'
+        return 'trader_help'
+    if re.match(r'^(pay|PAY)\s+([\d\.]+)\s*$', message, re.IGNORECASE):
+        return 'stk_push'
+    return 'chat'
+
+def bench_intent_router(args):
+    """Compare per-message routing cost of the legacy sequential scan and the precompiled intent router"""
+    from intent_router import classify_message
+
+    routers = [
+        ('legacy sequential scan', legacy_route),
+        ('precompiled router', lambda message, recipient_name: classify_message(message, recipient_name).name)
+    ]
+
+    print(f"🧭 Chat intent routing ({len(CHAT_CORPUS)} messages x {args.iterations} iterations)")
+    for label, route in routers:
+        samples = []
+        for _ in range(args.rounds):
+            start = time.perf_counter()
+            for _ in range(args.iterations):
+                for recipient_name, message in CHAT_CORPUS:
+                    route(message, recipient_name)
+            samples.append((time.perf_counter() - start) / (args.iterations * len(CHAT_CORPUS)))
+        print(f"   {label:>24}: {min(samples) * 1e9:7.0f} ns/message (best of {args.rounds})")
+
+    changed = [(recipient_name, message) for recipient_name, message in CHAT_CORPUS
+               if legacy_route(message, recipient_name) != classify_message(message, recipient_name).name]
+    print(f"   intents that differ: {len(changed)}")
+    for recipient_name, message in changed:
+        print(f"      {recipient_name}: {message!r} {legacy_route(message, recipient_name)} -> "
+              f"{classify_message(message, recipient_name).name}")
+
+def synthetic_catalog(size, seed=7):
+    """NSE stocks padded with generated instruments, like a multi-exchange listing"""
+    import random
+    from stocks import kenya_stocks
+    rng = random.Random(seed)
+    syllables = [consonant + vowel for consonant in 'bcdfghjklmnprstvwyz' for vowel in 'aeiou']
+    suffixes = ['PLC', 'Holdings', 'Group', 'Bank', 'Insurance', 'Kenya', 'Uganda', 'Tanzania', 'Rwanda', 'Limited']
+    stocks = list(kenya_stocks)
+    tickers = {s['ticker'] for s in stocks}
+    while len(stocks) < size:
+        word = ''.join(rng.choice(syllables) for _ in range(rng.randint(2, 4))).title()
+        name = f"{word} {rng.choice(suffixes)}" if rng.random() < 0.8 else f"{word} {word[::-1].title()} {rng.choice(suffixes)}"
+        ticker = word[:4].upper() + str(rng.randint(0, 99))
+        if ticker in tickers:
+            continue
+        tickers.add(ticker)
+        stocks.append({'ticker': ticker, 'name': name, 'price': round(rng.uniform(1, 500), 2),
+                       'sector': 'Generated', 'market_cap': 'n/a'})
+    return stocks
+
+def legacy_find_stock(stocks, query):
+    """The linear two-pass lookup find_stock used before StockCatalog"""
+    query = query.upper().strip()
+    for stock in stocks:
+        if stock['ticker'] == query:
+            return stock
+    for stock in stocks:
+        if query in stock['name'].upper() or stock['name'].upper() in query:
+            return stock
+    return None
+
+def bench_stock_catalog(args):
+    """Compare stock lookups of the linear scan and the indexed StockCatalog on a large catalog"""
+    import random
+    from stocks import StockCatalog
+
+    stocks = synthetic_catalog(args.size)
+    start = time.perf_counter()
+    catalog = StockCatalog(stocks)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    rng = random.Random(11)
+    picks = rng.sample(stocks, 40)
+    queries = ([s['ticker'] for s in picks[:10]] +                          # exact tickers
+               [s['name'].split()[0].lower() for s in picks[10:20]] +        # first word of the name
+               [f"{s['name']} shares" for s in picks[20:30]] +               # name inside a sentence
+               ['apple', 'tesla inc', 'bnak of nowhere', 'xyz'] +            # misses
+               [s['name'].split()[0][:-1] + 'x' for s in picks[30:40]])      # misspellings
+
+    print(f"🔎 Stock lookups ({len(stocks)} instruments, {len(queries)} queries, index built in {build_ms:.0f} ms)")
+    lookups = [
+        ('linear scan', lambda query: legacy_find_stock(stocks, query)),
+        ('catalog (exact)', catalog.find),
+        ('catalog (with fuzzy)', lambda query: catalog.find(query, fuzzy=True))
+    ]
+    for label, lookup in lookups:
+        samples = []
+        for _ in range(args.rounds):
+            for query in queries:
+                start = time.perf_counter()
+                lookup(query)
+                samples.append(time.perf_counter() - start)
+        print_latency(label, samples)
+
+    mismatches = [q for q in queries if legacy_find_stock(stocks, q) is not catalog.find(q)]
+    rescued = [q for q in queries if legacy_find_stock(stocks, q) is None and catalog.find(q, fuzzy=True) is not None]
+    print(f"   exact results differing from the linear scan: {len(mismatches)}")
+    print(f"   misses answered by fuzzy search: {len(rescued)}/{sum(1 for q in queries if legacy_find_stock(stocks, q) is None)}")
+
+def bench_quote_stream(args):
+    """Measure quote fan-out cost per feed batch with many stream subscribers, some of them stalled"""
+    import random
+    import tracemalloc
+    from stocks import kenya_stocks
+    from price_feed import PriceFeedEngine, MockFeedSource
+    from quote_stream import QuoteBroadcaster
+
+    prices = {s['ticker']: s['price'] for s in kenya_stocks}
+    engine = PriceFeedEngine(seed_prices=prices)
+    broadcaster = QuoteBroadcaster(engine, max_subscribers=args.subscribers, queue_size=args.queue_size)
+    source = MockFeedSource(prices, volatility=0.01, activity=1.0)
+    rng = random.Random(3)
+
+    tickers = list(prices)
+    subscriptions = []
+    for i in range(args.subscribers):
+        # A third follow everything, the rest a few tickers each
+        subscriptions.append(broadcaster.subscribe(None if i % 3 == 0 else rng.sample(tickers, 3)))
+    stalled = subscriptions[:int(args.subscribers * args.stalled)]
+    active = subscriptions[len(stalled):]
+
+    print(f"📡 Quote fan-out ({args.subscribers} subscribers, {len(stalled)} stalled, "
+          f"{len(tickers)} tickers, {args.batches} feed batches)")
+    publish_samples, drain_samples = [], []
+    for _ in range(args.batches):
+        batch = source.step(rng)
+        start = time.perf_counter()
+        engine.apply(batch)
+        publish_samples.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        for subscription in active:
+            subscription.get(0)
+        drain_samples.append((time.perf_counter() - start) / len(active))
+
+    # Memory of the same subscribers with every queue full (the worst case for stalled clients)
+    tracemalloc.start()
+    full = QuoteBroadcaster(PriceFeedEngine(seed_prices=prices), args.subscribers, args.queue_size)
+    held = [full.subscribe(None if i % 3 == 0 else rng.sample(tickers, 3)) for i in range(args.subscribers)]
+    for _ in range(args.queue_size):
+        full.engine.apply(source.step(rng))
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"   publish per batch: p50 {median(publish_samples) * 1000:.2f} ms, "
+          f"p99 {percentile(publish_samples, 0.99) * 1000:.2f} ms "
+          f"({median(publish_samples) / args.subscribers * 1e6:.2f} µs per subscriber)")
+    print(f"   drain per subscriber: p50 {median(drain_samples) * 1e6:.2f} µs")
+    print(f"   stalled queues: max {max(len(s._queue) for s in stalled)} queued (cap {args.queue_size}), "
+          f"{sum(s.dropped for s in stalled)} oldest quotes dropped")
+    print(f"   active subscribers delivered {sum(s.delivered for s in active)} quotes, dropped {sum(s.dropped for s in active)}")
+    print(f"   memory with every queue full: {current / 1e6:.1f} MB "
+          f"({current / len(held) / 1024:.1f} KB per subscriber), peak {peak / 1e6:.1f} MB")
+
+def bench_cached_responses(args):
+    """Compare /api/stocks/list and /api/docs rebuilt per request against precomputed, ETag-cached responses"""
+    import logging
+    logging.disable(logging.INFO)
+    os.environ.update(BEDROCK_CLIENT='stub', PRICE_FEED_SOURCE='static')
+    for name in ('MY_ACCOUNT_ID', 'MY_PRIVATE_KEY', 'TOKEN_ID'):
+        os.environ.setdefault(name, 'benchmark')
+    from flask import jsonify
+    from werkzeug.test import EnvironBuilder
+    import app as app_module
+    app = app_module.create_app()
+    # The handlers as they were: build and jsonify the payload on every request
+    app.add_url_rule('/bench/legacy/stocks', 'legacy_stocks', lambda: jsonify(app_module.build_stocks_list()))
+    app.add_url_rule('/bench/legacy/docs', 'legacy_docs', lambda: jsonify(app_module.build_api_docs()))
+
+    def call(environ):
+        """Run one request through the WSGI app, returning (status, headers, body)"""
+        started = []
+        body = b''.join(app(dict(environ), lambda status, headers, exc_info=None: started.append((status, headers))))
+        return started[0][0], dict(started[0][1]), body
+
+    print(f"🗜️  Precomputed JSON responses ({args.requests} requests each, server-side WSGI time)")
+    for label, path, legacy_path in (('/api/stocks/list', '/api/stocks/list', '/bench/legacy/stocks'),
+                                     ('/api/docs', '/api/docs', '/bench/legacy/docs')):
+        etag = call(EnvironBuilder(path=path).get_environ())[1]['ETag']
+        cases = [
+            ('rebuilt per request', legacy_path, {}),
+            ('precomputed', path, {}),
+            ('precomputed, gzip', path, {'Accept-Encoding': 'gzip'}),
+            ('If-None-Match (304)', path, {'If-None-Match': etag})
+        ]
+        print(f"   {label}:")
+        for name, url, headers in cases:
+            environ = EnvironBuilder(path=url, headers=headers).get_environ()
+            samples = []
+            for _ in range(args.requests):
+                start = time.perf_counter()
+                status, _, body = call(environ)
+                samples.append(time.perf_counter() - start)
+            print(f"      {name:>22}: p50 {median(samples) * 1e6:7.1f} µs, "
+                  f"{status.split()[0]} with {len(body):5d} body bytes")
+
+def synthetic_transactions(count, seed=11):
+    """Transaction log entries shaped like the ones TransactionLogger writes"""
+    import random
+    from datetime import datetime, timedelta
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1)
+    entries = []
+    for i in range(count):
+        kind = rng.choice(['sms', 'token_transfer', 'stock_purchase', 'mpesa_payment'])
+        entries.append({
+            'transaction_id': f"{kind.upper()}_{i:08x}",
+            'type': kind,
+            'timestamp': (start + timedelta(seconds=i * 37)).isoformat(),
+            'data': {
+                'success': rng.random() > 0.1,
+                'phone_number': f"+2547{rng.randrange(10 ** 8):08d}",
+                'amount': round(rng.uniform(10, 5000), 2),
+                'message': 'Your purchase of 10 units of Safaricom PLC was successful. Ref: ' + f"{i:06d}",
+                'created_at': start + timedelta(seconds=i * 37)
+            },
+            'status': rng.random() > 0.1
+        })
+    return entries
+
+def bench_json(args):
+    """Compare Flask's stdlib JSON encoding with the fast JSON backend on representative payloads"""
+    import json
+    from flask import Flask
+    from flask.json.provider import DefaultJSONProvider
+    from stocks import list_stocks
+    from json_provider import ORJSON_AVAILABLE, FastJSONProvider, OrjsonJSONBackend, StdlibJSONBackend
+
+    app = Flask('benchmark')
+    transactions = synthetic_transactions(args.transactions)
+    payloads = [
+        ('/api/stocks/list', {'success': True, 'stocks': list_stocks(), 'count': len(list_stocks())}),
+        (f"/api/transactions (limit={args.transactions})",
+         {'success': True, 'transactions': transactions, 'count': len(transactions)}),
+        ('/api/dashboard', {
+            'statistics': {'transactions': {'total_transactions': 100, 'recent_activity': transactions[-10:]}},
+            'configuration': {name: {'configured': True, 'value': '***'} for name in ('AT', 'HEDERA', 'AWS', 'MPESA')},
+            'timestamp': transactions[-1]['data']['created_at']
+        })
+    ]
+
+    encoders = [('flask default (stdlib)', DefaultJSONProvider(app).dumps)]
+    providers = [('fast provider, stdlib', StdlibJSONBackend())]
+    if ORJSON_AVAILABLE:
+        providers.append(('fast provider, orjson', OrjsonJSONBackend()))
+    else:
+        print("   ⚠️  orjson is not installed - only the standard library backend is measured")
+    for name, backend in providers:
+        encoders.append((name, lambda obj, backend=backend: backend.dumps_bytes(obj, sort_keys=FastJSONProvider.sort_keys)))
+
+    def best_of(function, repeat=5):
+        """Best per-call time over `repeat` rounds of args.iterations calls"""
+        rounds = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for _ in range(args.iterations):
+                function()
+            rounds.append((time.perf_counter() - start) / args.iterations)
+        return min(rounds)
+
+    print(f"🧾 JSON encoding ({args.iterations} iterations, best of 5)")
+    for label, payload in payloads:
+        print(f"   {label} ({len(DefaultJSONProvider(app).dumps(payload))} bytes):")
+        baseline = None
+        for name, encode in encoders:
+            elapsed = best_of(lambda: encode(payload))
+            baseline = baseline or elapsed
+            print(f"      {name:>24}: {elapsed * 1e6:8.1f} µs ({baseline / elapsed:4.1f}x)")
+
+    lines = [json.dumps(entry, default=str, separators=(',', ':')).encode('utf-8') for entry in transactions]
+    print(f"   transaction journal, {len(transactions)} entries:")
+    journal_cases = [('json.dumps / json.loads', lambda: [json.dumps(entry, default=str, separators=(',', ':')).encode('utf-8')
+                                                         for entry in transactions],
+                      lambda: [json.loads(line) for line in lines])]
+    for name, backend in providers:
+        journal_cases.append((name, lambda backend=backend: [backend.dumps_bytes(entry) for entry in transactions],
+                              lambda backend=backend: [backend.loads(line) for line in lines]))
+    for name, encode, decode in journal_cases:
+        print(f"      {name:>24}: append {best_of(encode, 3) / len(transactions) * 1e6:6.2f} µs, "
+              f"read {best_of(decode, 3) / len(transactions) * 1e6:6.2f} µs per entry")
+
+def bench_transaction_stats(args):
+    """Compare dashboard transaction statistics recounted from rows against the running aggregates"""
+    import logging
+    logging.disable(logging.INFO)
+    from transaction_store import JournalTransactionStore, SQLiteTransactionStore
+
+    transactions = synthetic_transactions(args.transactions)
+
+    def recount(entries):
+        """The statistics as the routes computed them before"""
+        stats = {'total_transactions': len(entries),
+                 'successful_transactions': len([tx for tx in entries if tx.get('status')]),
+                 'failed_transactions': len([tx for tx in entries if not tx.get('status')]),
+                 'transaction_types': {}}
+        for tx in entries:
+            tx_type = tx.get('type', 'unknown')
+            stats['transaction_types'][tx_type] = stats['transaction_types'].get(tx_type, 0) + 1
+        return stats
+
+    def timed(function, repeat):
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            function()
+            samples.append(time.perf_counter() - start)
+        return median(samples)
+
+    print(f"📊 Transaction statistics ({args.transactions} logged transactions)")
+    with tempfile.TemporaryDirectory() as directory:
+        stores = [('journal', JournalTransactionStore(os.path.join(directory, 'journal'))),
+                  ('sqlite', SQLiteTransactionStore(os.path.join(directory, 'transactions.db')))]
+        for name, store in stores:
+            start = time.perf_counter()
+            for entry in transactions:
+                store.append(entry)
+            append_time = (time.perf_counter() - start) / len(transactions)
+
+            last_100 = timed(lambda: recount(store.latest(None, 100)), 50)
+            everything = timed(lambda: recount(store.latest(None, 0)), 5)
+            aggregated = timed(store.aggregates, 200)
+            assert store.aggregates()['transaction_types'] == recount(store.latest(None, 0))['transaction_types']
+            print(f"   {name}: append {append_time * 1e6:.1f} µs per transaction (aggregates included)")
+            print(f"      {'recount last 100 rows':>28}: {last_100 * 1e6:9.1f} µs")
+            print(f"      {'recount whole history':>28}: {everything * 1e6:9.1f} µs")
+            print(f"      {'running aggregates':>28}: {aggregated * 1e6:9.1f} µs (whole history)")
+            if name == 'journal':
+                store.journal.close()
+
+def setup_cli():
+    """Setup command-line argument parser"""
+    parser = argparse.ArgumentParser(description='TextAHBAR performance benchmarks')
+    subparsers = parser.add_subparsers(dest='benchmark', help='Available benchmarks')
+
+    rate_parser = subparsers.add_parser('ratelimit', help='Rate limiter check latency')
+    rate_parser.add_argument('--iterations', type=int, default=20000, help='Checks per backend')
+    rate_parser.add_argument('--processes', type=int, default=4, help='Concurrent worker processes')
+    rate_parser.add_argument('--limit', type=int, default=100, help='Shared limit per window')
+    rate_parser.set_defaults(handler=bench_rate_limit)
+
+    sms_parser = subparsers.add_parser('sms-transport', help='SMS send throughput against the local stub')
+    sms_parser.add_argument('--messages', type=int, default=2000, help='Messages to send per transport')
+    sms_parser.add_argument('--threads', type=int, default=8, help='Concurrent sender threads')
+    sms_parser.add_argument('--latency', type=float, default=0.0, help='Stub server delay per request (seconds)')
+    sms_parser.set_defaults(handler=bench_sms_transport)
+
+    async_parser = subparsers.add_parser('sms-async', help='Async SMS throughput by concurrency level')
+    async_parser.add_argument('--messages', type=int, default=1000, help='Messages to send per level')
+    async_parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 10, 100],
+                              help='Concurrency levels to measure')
+    async_parser.add_argument('--latency', type=float, default=0.02,
+                              help='Stub server delay per request (seconds) to mimic network round-trips')
+    async_parser.set_defaults(handler=bench_sms_async)
+
+    startup_parser = subparsers.add_parser('startup', help='Cold start time and import breakdown')
+    startup_parser.add_argument('--runs', type=int, default=5, help='Wall-clock runs per command')
+    startup_parser.add_argument('--top', type=int, default=8, help='Slowest top-level imports to show')
+    startup_parser.add_argument('--max-ms', type=float, default=0,
+                                help='Fail if any command is slower than this (0 disables)')
+    startup_parser.set_defaults(handler=bench_startup)
+
+    workers_parser = subparsers.add_parser('workers', help='gunicorn per-worker memory with and without preload')
+    workers_parser.add_argument('--workers', type=int, default=4, help='gunicorn worker processes')
+    workers_parser.add_argument('--requests', type=int, default=20, help='Warm-up rounds over the read-only endpoints')
+    workers_parser.set_defaults(handler=bench_workers)
+
+    batch_parser = subparsers.add_parser('hedera-batch', help='Hedera transactions per token delivery with batching')
+    batch_parser.add_argument('--deliveries', type=int, default=200, help='Token deliveries to submit')
+    batch_parser.add_argument('--threads', type=int, default=32, help='Concurrent purchase threads')
+    batch_parser.add_argument('--accounts', type=int, default=50, help='Distinct recipient accounts')
+    batch_parser.add_argument('--window-ms', type=float, default=50, help='Batch window to compare against')
+    batch_parser.set_defaults(handler=bench_hedera_batch)
+
+    chat_parser = subparsers.add_parser('chat-stream', help='Chat time-to-first-byte with and without streaming')
+    chat_parser.add_argument('--requests', type=int, default=10, help='Chat requests per mode')
+    chat_parser.add_argument('--latency', type=float, default=0.3, help='Stub delay before the first chunk (seconds)')
+    chat_parser.add_argument('--chunk-delay', type=float, default=0.02, help='Stub delay between chunks (seconds)')
+    chat_parser.set_defaults(handler=bench_chat_stream)
+
+    burst_parser = subparsers.add_parser('bedrock-burst', help='Chat call burst with and without the Bedrock gateway')
+    burst_parser.add_argument('--requests', type=int, default=200, help='Calls in the burst')
+    burst_parser.add_argument('--threads', type=int, default=64, help='Concurrent caller threads')
+    burst_parser.add_argument('--stub-limit', type=int, default=8, help='Calls in flight before the stub throttles')
+    burst_parser.add_argument('--latency', type=float, default=0.2, help='Stub seconds per call')
+    burst_parser.add_argument('--deadline', type=float, default=2.0, help='Gateway deadline per call (seconds)')
+    burst_parser.set_defaults(handler=bench_bedrock_burst)
+
+    router_parser = subparsers.add_parser('intent-router', help='Chat intent routing cost per message')
+    router_parser.add_argument('--iterations', type=int, default=2000, help='Passes over the message corpus per round')
+    router_parser.add_argument('--rounds', type=int, default=5, help='Timed rounds (best is reported)')
+    router_parser.set_defaults(handler=bench_intent_router)
+
+    catalog_parser = subparsers.add_parser('stock-catalog', help='Stock lookup latency on a large catalog')
+    catalog_parser.add_argument('--size', type=int, default=5000, help='Instruments in the catalog')
+    catalog_parser.add_argument('--rounds', type=int, default=20, help='Passes over the query set')
+    catalog_parser.set_defaults(handler=bench_stock_catalog)
+
+    stream_parser = subparsers.add_parser('quote-stream', help='Live quote fan-out to many stream subscribers')
+    stream_parser.add_argument('--subscribers', type=int, default=5000, help='Open subscriptions')
+    stream_parser.add_argument('--stalled', type=float, default=0.1, help='Fraction of subscribers that never read')
+    stream_parser.add_argument('--queue-size', type=int, default=100, help='Queued quotes per subscriber')
+    stream_parser.add_argument('--batches', type=int, default=200, help='Feed batches to publish')
+    stream_parser.set_defaults(handler=bench_quote_stream)
+
+    cached_parser = subparsers.add_parser('cached-responses', help='Precomputed stock list and docs responses')
+    cached_parser.add_argument('--requests', type=int, default=2000, help='Requests per case')
+    cached_parser.set_defaults(handler=bench_cached_responses)
+
+    json_parser = subparsers.add_parser('json', help='JSON encoding of API responses and journal entries')
+    json_parser.add_argument('--transactions', type=int, default=500, help='Transactions in the list payload')
+    json_parser.add_argument('--iterations', type=int, default=200, help='Encodes per round')
+    json_parser.set_defaults(handler=bench_json)
+
+    stats_parser = subparsers.add_parser('transaction-stats', help='Dashboard transaction statistics cost')
+    stats_parser.add_argument('--transactions', type=int, default=20000, help='Transactions logged before measuring')
+    stats_parser.set_defaults(handler=bench_transaction_stats)
+
+    return parser
+
+def main():
+    """Main benchmark entry point"""
+    parser = setup_cli()
+    args = parser.parse_args()
+
+    if not args.benchmark:
+        parser.print_help()
+        return
+
+    print("⏱️  TextAHBAR Benchmarks")
+    print("=" * 40)
+    args.handler(args)
+    print("=" * 40)
+
+if __name__ == "__main__":
+    main()
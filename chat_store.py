@@ -0,0 +1,284 @@
+"""
+Chat Session Storage Module
+This module keeps Bedrock chat conversations bounded: sessions are evicted
+by LRU and idle TTL, and each conversation keeps only its most recent turns
+behind the persona preamble. Sessions live in process memory or in a SQLite
+database shared by all worker processes.
+"""
+
+import os
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from json_provider import dumps, loads
+
+PERSONA_ACKNOWLEDGEMENT = "Acknowledged. I will now respond as per my instructions."
+
+def build_messages(session: Dict, user_message: str) -> List[Dict]:
+    """
+    Build the Bedrock converse messages for the next turn
+
+    Args:
+        session: Session dict with 'persona_instruction' and windowed 'history'
+        user_message: The new user message
+
+    Returns:
+        Persona preamble, recent turns and the new message, alternating user/assistant
+    """
+    return [
+        {'role': 'user', 'content': [{'text': session['persona_instruction']}]},
+        {'role': 'assistant', 'content': [{'text': PERSONA_ACKNOWLEDGEMENT}]},
+        *session['history'],
+        {'role': 'user', 'content': [{'text': user_message}]}
+    ]
+
+def append_turn_to_history(history: List[Dict], user_message: str, reply: str, max_turns: int) -> List[Dict]:
+    """Add a user/assistant turn and drop the oldest turns beyond max_turns"""
+    history = history + [
+        {'role': 'user', 'content': [{'text': user_message}]},
+        {'role': 'assistant', 'content': [{'text': reply}]}
+    ]
+    return history[-2 * max_turns:] if max_turns > 0 else []
+
+class ChatSessionStore:
+    """
+    In-process chat sessions with LRU and idle TTL eviction
+
+    Sessions are kept in access order, so both the least recently used and
+    the longest idle sessions sit at the front and are evicted from there.
+    """
+
+    backend = 'memory'
+
+    def __init__(self, max_sessions: int = 1000, ttl_seconds: float = 3600, max_turns: int = 10):
+        """
+        Args:
+            max_sessions: Sessions kept before the least recently used is evicted
+            ttl_seconds: Idle time after which a session is discarded
+            max_turns: User/assistant turns kept per session (the persona preamble is always kept)
+        """
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self.max_turns = max_turns
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+        self._evicted = 0
+        self._expired = 0
+
+    def _evict_locked(self, now: float):
+        while self._sessions:
+            oldest = next(iter(self._sessions.values()))
+            if now - oldest['updated_at'] < self.ttl_seconds:
+                break
+            self._sessions.popitem(last=False)
+            self._expired += 1
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+            self._evicted += 1
+
+    def get_or_create(self, conversation_id: str, persona_instruction: str) -> Dict:
+        """
+        Get a conversation's session, starting a new one if missing or expired
+
+        Returns:
+            Session dict with 'persona_instruction' and 'history'
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._evict_locked(now)
+            session = self._sessions.get(conversation_id)
+            if session is None:
+                logging.info(f"Initializing new chat session for convo_id: {conversation_id}")
+                session = self._sessions[conversation_id] = {
+                    'persona_instruction': persona_instruction,
+                    'history': [],
+                    'updated_at': now
+                }
+                self._evict_locked(now)
+            else:
+                self._sessions.move_to_end(conversation_id)
+                session['updated_at'] = now
+            return {'persona_instruction': session['persona_instruction'], 'history': list(session['history'])}
+
+    def append_turn(self, conversation_id: str, user_message: str, reply: str):
+        """Record a completed turn, keeping only the last max_turns"""
+        with self._lock:
+            session = self._sessions.get(conversation_id)
+            if session is None:
+                return  # Evicted while Bedrock was answering
+            session['history'] = append_turn_to_history(session['history'], user_message, reply, self.max_turns)
+            session['updated_at'] = time.monotonic()
+            self._sessions.move_to_end(conversation_id)
+
+    def delete(self, conversation_id: str) -> bool:
+        """Forget a conversation"""
+        with self._lock:
+            return self._sessions.pop(conversation_id, None) is not None
+
+    def get_stats(self) -> Dict:
+        """Get session store statistics"""
+        with self._lock:
+            return {
+                'backend': self.backend,
+                'sessions': len(self._sessions),
+                'max_sessions': self.max_sessions,
+                'ttl_seconds': self.ttl_seconds,
+                'max_turns': self.max_turns,
+                'evicted': self._evicted,
+                'expired': self._expired
+            }
+
+class SQLiteChatSessionStore:
+    """
+    Chat sessions persisted in SQLite (WAL mode)
+
+    Sessions survive restarts and are shared by every gunicorn worker using
+    the same database file. Turns are appended in one IMMEDIATE transaction
+    so concurrent workers never lose each other's updates.
+    """
+
+    backend = 'sqlite'
+
+    SCHEMA = (
+        """CREATE TABLE IF NOT EXISTS chat_sessions (
+            conversation_id TEXT PRIMARY KEY,
+            persona_instruction TEXT NOT NULL,
+            history TEXT NOT NULL,
+            updated_at REAL NOT NULL
+        )""",
+        "CREATE INDEX IF NOT EXISTS idx_chat_sessions_updated ON chat_sessions (updated_at)",
+    )
+
+    # Expired and excess sessions are swept at most this often
+    CLEANUP_INTERVAL = 30.0
+
+    def __init__(self, db_path: str, max_sessions: int = 1000, ttl_seconds: float = 3600, max_turns: int = 10):
+        self.db_path = db_path
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self.max_turns = max_turns
+        self._local = threading.local()
+        self._next_cleanup = 0.0
+
+        connection = self._connection()
+        for statement in self.SCHEMA:
+            connection.execute(statement)
+
+    def _connection(self) -> sqlite3.Connection:
+        """Get this thread's connection, opening it on first use"""
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.db_path, timeout=5.0, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def _cleanup(self, connection: sqlite3.Connection, now: float):
+        """Drop idle sessions, then the least recently used beyond max_sessions"""
+        connection.execute("DELETE FROM chat_sessions WHERE updated_at < ?", (now - self.ttl_seconds,))
+        connection.execute(
+            """DELETE FROM chat_sessions WHERE conversation_id IN (
+                SELECT conversation_id FROM chat_sessions ORDER BY updated_at DESC LIMIT -1 OFFSET ?
+            )""",
+            (self.max_sessions,)
+        )
+        self._next_cleanup = now + self.CLEANUP_INTERVAL
+
+    def get_or_create(self, conversation_id: str, persona_instruction: str) -> Dict:
+        """
+        Get a conversation's session, starting a new one if missing or expired
+
+        Returns:
+            Session dict with 'persona_instruction' and 'history'
+        """
+        now = time.time()
+        connection = self._connection()
+
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            row = connection.execute(
+                "SELECT persona_instruction, history, updated_at FROM chat_sessions WHERE conversation_id = ?",
+                (conversation_id,)
+            ).fetchone()
+            if row is None or now - row[2] >= self.ttl_seconds:
+                logging.info(f"Initializing new chat session for convo_id: {conversation_id}")
+                connection.execute(
+                    """INSERT OR REPLACE INTO chat_sessions (conversation_id, persona_instruction, history, updated_at)
+                    VALUES (?, ?, '[]', ?)""",
+                    (conversation_id, persona_instruction, now)
+                )
+                session = {'persona_instruction': persona_instruction, 'history': []}
+            else:
+                connection.execute("UPDATE chat_sessions SET updated_at = ? WHERE conversation_id = ?",
+                                   (now, conversation_id))
+                session = {'persona_instruction': row[0], 'history': loads(row[1])}
+            if now >= self._next_cleanup:
+                self._cleanup(connection, now)
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+        return session
+
+    def append_turn(self, conversation_id: str, user_message: str, reply: str):
+        """Record a completed turn, keeping only the last max_turns"""
+        connection = self._connection()
+
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            row = connection.execute("SELECT history FROM chat_sessions WHERE conversation_id = ?",
+                                     (conversation_id,)).fetchone()
+            if row is not None:
+                history = append_turn_to_history(loads(row[0]), user_message, reply, self.max_turns)
+                connection.execute(
+                    "UPDATE chat_sessions SET history = ?, updated_at = ? WHERE conversation_id = ?",
+                    (dumps(history), time.time(), conversation_id)
+                )
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+
+    def delete(self, conversation_id: str) -> bool:
+        """Forget a conversation"""
+        cursor = self._connection().execute("DELETE FROM chat_sessions WHERE conversation_id = ?",
+                                            (conversation_id,))
+        return cursor.rowcount > 0
+
+    def get_stats(self) -> Dict:
+        """Get session store statistics"""
+        count = self._connection().execute("SELECT COUNT(*) FROM chat_sessions").fetchone()[0]
+        return {
+            'backend': self.backend,
+            'sessions': count,
+            'max_sessions': self.max_sessions,
+            'ttl_seconds': self.ttl_seconds,
+            'max_turns': self.max_turns,
+            'db_path': self.db_path
+        }
+
+def create_chat_session_store(backend: str = None):
+    """
+    Create the chat session store selected by CHAT_SESSION_STORE (memory or sqlite)
+
+    Args:
+        backend: Backend name; defaults to the CHAT_SESSION_STORE environment variable
+    """
+    backend = (backend or os.getenv('CHAT_SESSION_STORE', 'memory')).lower()
+    limits = {
+        'max_sessions': int(os.getenv('CHAT_MAX_SESSIONS', 1000)),
+        'ttl_seconds': float(os.getenv('CHAT_SESSION_TTL_MINUTES', 60)) * 60,
+        'max_turns': int(os.getenv('CHAT_MAX_TURNS', 10))
+    }
+
+    if backend == 'memory':
+        return ChatSessionStore(**limits)
+    if backend == 'sqlite':
+        return SQLiteChatSessionStore(os.getenv('CHAT_SESSION_DB_PATH', 'chat_sessions.db'), **limits)
+
+    raise ValueError(f"Unknown chat session store backend: {backend}")
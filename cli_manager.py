@@ -6,6 +6,7 @@ Command-line interface for managing SMS, HBAR, and stock operations
 
 import sys
 import os
+import csv
 import json
 import argparse
 from datetime import datetime
@@ -17,7 +18,7 @@ from sms_service import sms_service
 from africastalking_client import api_client, PhoneNumberValidator
 from hbar_manager import transaction_service
 from utils import (
-    transaction_logger, PhoneNumberUtils, SMSCostCalculator,
+    transaction_logger, load_environment, PhoneNumberUtils, SMSCostCalculator,
     ConfigValidator, MessageFormatter
 )
 
@@ -36,6 +37,12 @@ def setup_cli():
     send_sms_parser.add_argument('--message', required=True, help='SMS message content')
     send_sms_parser.add_argument('--sender-id', default='TEXTAHBAR', help='Sender ID')
     
+    # Bulk SMS
+    bulk_sms_parser = sms_subparsers.add_parser('bulk', help='Send SMS to numbers listed in a CSV file')
+    bulk_sms_parser.add_argument('--file', required=True, help='CSV file with a phone column (and optional message column)')
+    bulk_sms_parser.add_argument('--message', help='SMS content for rows without a message column')
+    bulk_sms_parser.add_argument('--sender-id', default='TEXTAHBAR', help='Sender ID')
+    
     # SMS Status
     sms_subparsers.add_parser('status', help='Check SMS service status')
     
@@ -58,6 +65,9 @@ def setup_cli():
     transfer_parser.add_argument('--memo', help='Transaction memo')
     transfer_parser.add_argument('--notify', help='Phone number for SMS notification')
     
+    # Client Pool
+    hbar_subparsers.add_parser('pool', help='Check the shared Hedera client pool')
+    
     # Stock Commands
     stock_parser = subparsers.add_parser('stocks', help='Stock operations')
     stock_subparsers = stock_parser.add_subparsers(dest='stock_action')
@@ -92,6 +102,9 @@ def setup_cli():
     tx_parser.add_argument('--type', help='Filter by transaction type')
     tx_parser.add_argument('--limit', type=int, default=20, help='Number of transactions')
     
+    # Journal Compaction
+    util_subparsers.add_parser('compact', help='Compact the transaction store (stop the app first)')
+    
     # Cost Calculator
     cost_parser = util_subparsers.add_parser('cost', help='Calculate SMS cost')
     cost_parser.add_argument('--phone', required=True, help='Phone number')
@@ -99,6 +112,51 @@ def setup_cli():
     
     return parser
 
+def read_bulk_sms_file(path, default_message=None, sender_id=None):
+    """
+    Read bulk SMS recipients from a CSV file
+    
+    The file either has a header row with a phone/number/to column and an
+    optional message column, or lists one phone number per row.
+    """
+    messages = []
+    
+    with open(path, newline='') as f:
+        rows = [row for row in csv.reader(f) if row and row[0].strip()]
+    
+    if not rows:
+        return messages
+    
+    header = [cell.strip().lower() for cell in rows[0]]
+    phone_columns = [i for i, name in enumerate(header) if name in ('phone', 'phone_number', 'number', 'to')]
+    if phone_columns:
+        phone_column = phone_columns[0]
+        message_column = header.index('message') if 'message' in header else None
+        rows = rows[1:]
+    else:
+        phone_column, message_column = 0, None
+    
+    for row in rows:
+        phone = row[phone_column].strip()
+        message = row[message_column].strip() if message_column is not None and len(row) > message_column else ''
+        message = message or default_message
+        
+        if not message:
+            print(f"   ⚠️ Skipping {phone}: no message (use --message)")
+            continue
+        formatted = PhoneNumberValidator.format_phone_number(phone)
+        if not PhoneNumberValidator.validate_phone_number(formatted)['is_valid']:
+            print(f"   ⚠️ Skipping invalid phone number: {phone}")
+            continue
+        
+        messages.append({
+            'to': formatted,
+            'message': message,
+            'sender_id': sender_id
+        })
+    
+    return messages
+
 def handle_sms_commands(args):
     """Handle SMS-related commands"""
     if args.sms_action == 'send':
@@ -125,6 +183,22 @@ def handle_sms_commands(args):
         else:
             print(f"❌ SMS sending failed: {result.get('error', 'Unknown error')}")
     
+    elif args.sms_action == 'bulk':
+        messages = read_bulk_sms_file(args.file, args.message, args.sender_id)
+        if not messages:
+            print(f"❌ No valid recipients found in {args.file}")
+            return
+        
+        print(f"📨 Sending bulk SMS to {len(messages)} recipients...")
+        results = sms_service.send_bulk(messages)
+        
+        sent = sum(1 for result in results if result.get('success'))
+        print(f"✅ Accepted: {sent}/{len(results)}")
+        
+        for result in results:
+            if not result.get('success'):
+                print(f"   ❌ {result.get('recipient')}: {result.get('error', 'Unknown error')}")
+    
     elif args.sms_action == 'status':
         print("📊 SMS Service Status:")
         api_stats = api_client.get_api_stats()
@@ -192,15 +266,31 @@ def handle_hbar_commands(args):
         else:
             print(f"❌ Transfer failed: {result.get('error', 'Unknown error')}")
 
+    elif args.hbar_action == 'pool':
+        pool = transaction_service.token_manager.client_pool
+        if not pool:
+            print("⚠️  Hedera not configured - running in simulation mode")
+            return
+
+        print("🔌 Checking Hedera client pool...")
+        try:
+            with pool.lease():
+                pass
+            print("✅ Client ready")
+        except Exception as e:
+            print(f"❌ Could not create a Hedera client: {e}")
+
+        for key, value in pool.get_stats().items():
+            print(f"   {key.replace('_', ' ').title()}: {value}")
+
 def handle_stock_commands(args):
     """Handle stock-related commands"""
     if args.stock_action == 'list':
         print("📈 Available Kenyan Stocks (NSE):")
         
-        # Import kenya_stocks from app
-        from app import kenya_stocks
+        from stocks import list_stocks
         
-        for i, stock in enumerate(kenya_stocks, 1):
+        for i, stock in enumerate(list_stocks(), 1):
             print(f"   {i:2}. {stock['name']} ({stock['ticker']})")
             print(f"       Price: KES {stock['price']:.2f} | Sector: {stock['sector']}")
             print(f"       Market Cap: {stock['market_cap']}")
@@ -209,7 +299,7 @@ def handle_stock_commands(args):
     elif args.stock_action == 'price':
         print(f"💹 Getting price for {args.ticker.upper()}...")
         
-        from app import find_stock, generate_stock_advice
+        from stocks import find_stock, generate_stock_advice
         stock = find_stock(args.ticker.upper())
         
         if stock:
@@ -224,7 +314,7 @@ def handle_stock_commands(args):
     elif args.stock_action == 'buy':
         print(f"🛒 Purchasing {args.quantity} shares of {args.ticker.upper()}...")
         
-        from app import find_stock
+        from stocks import find_stock
         stock = find_stock(args.ticker.upper())
         
         if not stock:
@@ -314,6 +404,13 @@ def handle_util_commands(args):
                     print(f"      {key.title()}: {value}")
             print()
     
+    elif args.util_action == 'compact':
+        print(f"🗜️ Compacting transaction store ({transaction_logger.store.backend})...")
+        stats = transaction_logger.compact_logs()
+        
+        for key, value in stats.items():
+            print(f"   {key.replace('_', ' ').title()}: {value}")
+    
     elif args.util_action == 'cost':
         print(f"💰 Calculating SMS cost...")
         cost_info = SMSCostCalculator.calculate_cost(args.phone, len(args.message))
@@ -335,6 +432,8 @@ def main():
         parser.print_help()
         return
     
+    load_environment()
+    
     print("🚀 TextAHBAR CLI Tool")
     print("=" * 40)
     
@@ -0,0 +1,51 @@
+"""
+Gunicorn Configuration
+Preloads the app in the master so read-only data (stock table, personas,
+parsed botocore models) is shared copy-on-write by every worker, and
+re-creates fork-unsafe resources in each worker after fork.
+
+Usage: gunicorn -c gunicorn_config.py
+"""
+
+import os
+
+from utils import load_environment
+
+# Read .env before the defaults below, which must not override it
+load_environment()
+
+wsgi_app = 'app:create_app()'
+bind = f"0.0.0.0:{os.getenv('PORT', '8080')}"
+workers = int(os.getenv('WEB_CONCURRENCY', 2))
+# gthread serves each connection on a pool thread. Event-loop workers (gevent,
+# eventlet) are not supported: Hedera SDK calls block in native code and would
+# stall every connection in the worker
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gthread')
+threads = int(os.getenv('GUNICORN_THREADS', 4))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 60))
+preload_app = os.getenv('GUNICORN_PRELOAD', 'true').lower() == 'true'
+
+# The journal store keeps its index in process memory and assumes a single
+# writer, and in-memory chat sessions would be split across workers, so
+# multiple workers default to the shared SQLite stores
+if workers > 1:
+    os.environ.setdefault('TRANSACTION_STORE', 'sqlite')
+    os.environ.setdefault('CHAT_SESSION_STORE', 'sqlite')
+
+# An open /api/stocks/stream connection holds a gthread pool thread for its
+# whole lifetime, so keep at least half of the threads for ordinary requests.
+# Stream capacity per node is therefore WEB_CONCURRENCY * GUNICORN_THREADS / 2
+if worker_class == 'gthread':
+    os.environ.setdefault('QUOTE_STREAM_MAX_SUBSCRIBERS', str(max(1, threads // 2)))
+
+def when_ready(server):
+    """Warm shared read-only state in the master before workers fork"""
+    if preload_app:
+        from app import preload_shared_resources
+        preload_shared_resources()
+    server.log.info(f"Master ready (preload={'on' if preload_app else 'off'}, workers={workers})")
+
+def post_fork(server, worker):
+    """Drop clients, sessions and threads inherited from the master"""
+    from app import reset_services_after_fork
+    reset_services_after_fork()
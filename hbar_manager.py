@@ -7,22 +7,19 @@ integrated with SMS notifications.
 import os
 import logging
 import json
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple
+from typing import Callable, Dict, List, Optional, Tuple
 import uuid
 import random
 
-# Hedera SDK imports
-try:
-    from hedera import (
-        Client, AccountId, PrivateKey, TokenId, 
-        TransferTransaction, Hbar, AccountBalanceQuery,
-        TokenAssociateTransaction, TokenCreateTransaction
-    )
-    HEDERA_AVAILABLE = True
-except ImportError:
-    logging.warning("Hedera SDK not available - using simulation mode")
-    HEDERA_AVAILABLE = False
+# The Hedera SDK starts a JVM, so it is only loaded when a client is first leased
+from hedera_pool import (get_client_pool, hedera_sdk_installed, is_channel_failure, is_precheck_rejection,
+                         load_hedera_sdk, receipt_failure_status)
+from utils import LazyService
 
 class HederaConfig:
     """
@@ -40,7 +37,7 @@ class HederaConfig:
         self.memo_prefix = "TextAHBAR-"
         
         # Transaction settings
-        self.max_transaction_fee = Hbar(2) if HEDERA_AVAILABLE else "2 HBAR"
+        self.max_transaction_fee_hbar = 2
         self.transaction_timeout = 30  # seconds
         
         logging.info(f"Hedera configured - Network: {self.network}, Account: {self.my_account_id}")
@@ -51,12 +48,286 @@ class HederaConfig:
             'account_id_set': bool(self.my_account_id and self.my_account_id != 'your_account_here'),
             'private_key_set': bool(self.my_private_key and self.my_private_key != 'your_private_key_here'),
             'token_id_set': bool(self.token_id and self.token_id != 'your_token_here'),
-            'sdk_available': HEDERA_AVAILABLE,
+            'sdk_available': hedera_sdk_installed(),
             'network_valid': self.network in ['testnet', 'mainnet']
         }
         
         validation['all_valid'] = all(validation.values())
         return validation
+    
+    @property
+    def max_transaction_fee(self):
+        """Max transaction fee as an SDK Hbar (loads the SDK)"""
+        sdk = load_hedera_sdk()
+        return sdk.Hbar(self.max_transaction_fee_hbar) if sdk else f"{self.max_transaction_fee_hbar} HBAR"
+
+class PendingTransfer:
+    """
+    Pollable handle for a submitted transfer awaiting its receipt
+    """
+    
+    def __init__(self, transaction_id: Optional[str], recipient: str, amount: int, memo: str,
+                 explorer_url: Optional[str], simulation: bool = False, transfer_id: str = None):
+        self.transaction_id = transaction_id  # None while queued for a delivery batch
+        self.transfer_id = transfer_id or transaction_id  # Stable lookup key
+        self.recipient = recipient
+        self.amount = amount
+        self.memo = memo
+        self.explorer_url = explorer_url
+        self.simulation = simulation
+        self.batch_size = None
+        # QUEUED (batched only), SUBMITTED, then the receipt status (SUCCESS, ...) or FAILED
+        self.status = 'SUBMITTED' if transaction_id else 'QUEUED'
+        self.error = None
+        self.submitted_at = datetime.now().isoformat()
+        self.resolved_at = None
+        self._done = threading.Event()
+    
+    def done(self) -> bool:
+        """Check whether the receipt has been resolved"""
+        return self._done.is_set()
+    
+    def wait(self, timeout: float = None) -> Dict:
+        """Block until the receipt resolves (or timeout) and return the transfer result"""
+        self._done.wait(timeout)
+        return self.to_dict()
+    
+    def _submitted(self, transaction_id: str, explorer_url: str, batch_size: int = None):
+        self.transaction_id = transaction_id
+        self.explorer_url = explorer_url
+        self.batch_size = batch_size
+        self.status = 'SUBMITTED'
+    
+    def _resolve(self, status: str, error: str = None):
+        self.status = status
+        self.error = error
+        self.resolved_at = datetime.now().isoformat()
+        self._done.set()
+    
+    def to_dict(self) -> Dict:
+        """Serialize the transfer in the same shape as transfer_tokens results"""
+        result = {
+            'success': self.status != 'FAILED' and self.error is None,
+            'transaction_id': self.transaction_id,
+            'transfer_id': self.transfer_id,
+            'status': self.status,
+            'pending': not self.done(),
+            'recipient': self.recipient,
+            'amount': self.amount,
+            'memo': self.memo,
+            'submitted_at': self.submitted_at,
+            'resolved_at': self.resolved_at,
+            'timestamp': datetime.now().isoformat(),
+            'explorer_url': self.explorer_url
+        }
+        if self.error:
+            result['error'] = self.error
+        if self.batch_size:
+            result['batch_size'] = self.batch_size
+        if self.simulation:
+            result['simulation'] = True
+        return result
+
+class ReceiptResolver:
+    """
+    Background pool that waits on transfer receipts off the request thread
+    """
+    
+    def __init__(self, workers: int = 4, max_tracked: int = 10000):
+        """
+        Args:
+            workers: Receipt resolver threads
+            max_tracked: Transfers kept for status polling
+        """
+        self.workers = workers
+        self.max_tracked = max_tracked
+        self._executor = None
+        self._transfers = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Start the resolver pool on first use"""
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers,
+                                                    thread_name_prefix='hedera-receipt')
+            return self._executor
+    
+    def register(self, transfer: PendingTransfer):
+        """Make a transfer available for status polling"""
+        with self._lock:
+            self._transfers[transfer.transfer_id] = transfer
+            while len(self._transfers) > self.max_tracked:
+                self._transfers.popitem(last=False)
+    
+    def run(self, fn: Callable, *args):
+        """Run blocking Hedera work (submission or receipt) on the resolver pool"""
+        return self._get_executor().submit(fn, *args)
+    
+    def track(self, transfer: PendingTransfer, resolve: Callable[[], str],
+              on_complete: Callable[[PendingTransfer], None] = None):
+        """
+        Resolve a submitted transfer in the background
+        
+        Args:
+            transfer: Handle returned to the caller
+            resolve: Blocking callable returning the receipt status string
+            on_complete: Optional callback run on the resolver thread when done
+        """
+        self.register(transfer)
+        self.run(self._run, transfer, resolve, on_complete)
+    
+    def _run(self, transfer: PendingTransfer, resolve: Callable[[], str],
+             on_complete: Callable[[PendingTransfer], None]):
+        try:
+            status = resolve()
+            self.complete(transfer, status, on_complete=on_complete)
+        except Exception as e:
+            logging.error(f"❌ Receipt resolution failed for {transfer.transaction_id}: {e}")
+            self.complete(transfer, 'FAILED', str(e), on_complete)
+    
+    def complete(self, transfer: PendingTransfer, status: str, error: str = None,
+                 on_complete: Callable[[PendingTransfer], None] = None):
+        """Resolve a transfer with its receipt status and run its callback"""
+        if status != 'SUCCESS' and error is None:
+            error = f"Receipt status {status}"
+        transfer._resolve(status, error)
+        if transfer.transaction_id:
+            logging.info(f"✅ Receipt resolved for {transfer.transaction_id[:20]}... - Status: {status}")
+        
+        if on_complete:
+            try:
+                on_complete(transfer)
+            except Exception as e:
+                logging.error(f"Transfer completion callback failed for {transfer.transfer_id}: {e}")
+    
+    def get(self, transfer_id: str) -> Optional[PendingTransfer]:
+        """Look up a tracked transfer by its transfer ID"""
+        with self._lock:
+            return self._transfers.get(transfer_id)
+    
+    def shutdown(self, wait: bool = True):
+        """Stop the resolver pool"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor:
+            executor.shutdown(wait=wait)
+
+# Hedera caps a transfer at 10 token account-amount legs, one of which is the
+# operator debit
+MAX_BATCH_RECIPIENTS = 9
+
+class TransferBatcher:
+    """
+    Collects token deliveries for a short window and hands them over in batches
+    
+    A batch is flushed when its window expires or when it reaches
+    max_recipients distinct accounts, whichever comes first.
+    """
+    
+    def __init__(self, dispatch: Callable[[List[Tuple[PendingTransfer, Callable]]], None],
+                 window: float = 0.05, max_recipients: int = MAX_BATCH_RECIPIENTS):
+        """
+        Args:
+            dispatch: Called with each batch of (transfer, on_complete) pairs
+            window: Seconds to wait for more deliveries after the first one arrives
+            max_recipients: Distinct recipient accounts per batch (capped at the network limit)
+        """
+        self.dispatch = dispatch
+        self.window = window
+        self.max_recipients = max(1, min(max_recipients, MAX_BATCH_RECIPIENTS))
+        
+        self._pending = []
+        self._accounts = set()
+        self._deadline = None
+        self._cond = threading.Condition()
+        self._thread = None
+        
+        self._batches = 0
+        self._deliveries = 0
+    
+    def add(self, transfer: PendingTransfer, on_complete: Callable[[PendingTransfer], None] = None):
+        """Queue a delivery for the next batch"""
+        with self._cond:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='hedera-batcher', daemon=True)
+                self._thread.start()
+            
+            if not self._pending:
+                self._deadline = time.monotonic() + self.window
+            self._pending.append((transfer, on_complete))
+            self._accounts.add(transfer.recipient)
+            self._cond.notify()
+    
+    def _is_full(self) -> bool:
+        return len(self._accounts) >= self.max_recipients
+    
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                
+                remaining = self._deadline - time.monotonic()
+                while remaining > 0 and not self._is_full():
+                    self._cond.wait(remaining)
+                    remaining = self._deadline - time.monotonic()
+                
+                # Deliveries to an account already in the batch add no legs,
+                # so only split when the distinct recipients exceed the cap
+                batch, accounts = [], set()
+                while self._pending:
+                    transfer, on_complete = self._pending[0]
+                    if transfer.recipient not in accounts and len(accounts) >= self.max_recipients:
+                        break
+                    accounts.add(transfer.recipient)
+                    batch.append(self._pending.pop(0))
+                self._accounts = {transfer.recipient for transfer, _ in self._pending}
+                self._deadline = time.monotonic() + self.window
+                
+                self._batches += 1
+                self._deliveries += len(batch)
+            
+            try:
+                self.dispatch(batch)
+            except Exception as e:
+                logging.error(f"❌ Failed to dispatch delivery batch: {e}")
+                for transfer, on_complete in batch:
+                    transfer._resolve('FAILED', str(e))
+                    if on_complete:
+                        try:
+                            on_complete(transfer)
+                        except Exception as callback_error:
+                            logging.error(f"Transfer completion callback failed for {transfer.transfer_id}: {callback_error}")
+    
+    def get_stats(self) -> Dict:
+        """Get batching statistics"""
+        with self._cond:
+            return {
+                'window_ms': int(self.window * 1000),
+                'max_recipients': self.max_recipients,
+                'queued': len(self._pending),
+                'batches': self._batches,
+                'deliveries': self._deliveries,
+                'avg_batch_size': round(self._deliveries / self._batches, 2) if self._batches else 0
+            }
+
+def net_token_transfers(operator_account: str, deliveries: List[Tuple[str, int]]) -> Dict[str, int]:
+    """
+    Net a set of deliveries into one token transfer list
+    
+    Args:
+        operator_account: Account paying for every delivery
+        deliveries: (recipient_account, amount) pairs
+        
+    Returns:
+        Account -> signed amount; sums to zero, one debit for the operator
+    """
+    legs = {operator_account: 0}
+    for recipient, amount in deliveries:
+        legs[operator_account] -= amount
+        legs[recipient] = legs.get(recipient, 0) + amount
+    return {account: amount for account, amount in legs.items() if amount}
 
 class HederaTokenManager:
     """
@@ -65,104 +336,256 @@ class HederaTokenManager:
     
     def __init__(self):
         self.config = HederaConfig()
-        self.client = None
         self.transaction_history = []
+        self.receipt_resolver = ReceiptResolver(workers=int(os.getenv('HEDERA_RECEIPT_WORKERS', 4)))
+        
+        # Deliveries arriving within the window share one multi-leg transaction
+        batch_window_ms = float(os.getenv('HEDERA_BATCH_WINDOW_MS', 50))
+        self.batcher = None
+        if batch_window_ms > 0:
+            self.batcher = TransferBatcher(
+                self._dispatch_batch,
+                window=batch_window_ms / 1000,
+                max_recipients=int(os.getenv('HEDERA_BATCH_MAX_RECIPIENTS', MAX_BATCH_RECIPIENTS))
+            )
+        self.batch_fallbacks = 0
         
-        if HEDERA_AVAILABLE and self.config.validate_config()['all_valid']:
-            self._initialize_client()
+        # Shared operator clients, created on first use
+        self.client_pool = None
+        if self.config.validate_config()['all_valid']:
+            self.client_pool = get_client_pool(self.config)
         else:
             logging.warning("Using Hedera simulation mode - check configuration")
     
-    def _initialize_client(self):
-        """Initialize Hedera client with proper network and credentials"""
+    def _use_network(self) -> bool:
+        """Check whether real Hedera clients are available (loads the SDK on first call)"""
+        return self.client_pool is not None and self.client_pool.available()
+    
+    def _resolve_receipt(self, tx_response) -> str:
+        """
+        Wait for a receipt, retrying once on a fresh client after a channel failure
+        
+        Returns:
+            The receipt status; a failure status (the SDK raises
+            ReceiptStatusException for those) is returned, not raised
+        """
+        for attempt in range(2):
+            try:
+                with self.client_pool.lease() as client:
+                    return str(tx_response.getReceipt(client).status)
+            except Exception as e:
+                status = receipt_failure_status(e)
+                if status:
+                    return status
+                if attempt or not is_channel_failure(e):
+                    raise
+                logging.warning(f"Receipt query hit a channel failure, retrying: {e}")
+    
+    def _execute_transfer(self, recipient_account: str, amount: int, memo: str) -> Tuple[str, Callable[[], str]]:
+        """
+        Submit one single-recipient transfer to the network
+        
+        Returns:
+            (transaction_id, resolve) where resolve blocks until the receipt status is known
+        """
+        if not self._use_network():
+            transaction_id = self._simulate_transaction_id()
+            logging.info(f"🚀 Simulated token transfer submitted: {amount} tokens to {recipient_account}")
+            return transaction_id, self._simulate_receipt
+        
+        sdk = load_hedera_sdk()
+        recipient_id = sdk.AccountId.fromString(recipient_account)
+        sender_id = sdk.AccountId.fromString(self.config.my_account_id)
+        token_id = sdk.TokenId.fromString(self.config.token_id)
+        
+        logging.info(f"🚀 Submitting token transfer: {amount} tokens to {recipient_account}")
+        
+        # Create transfer transaction
+        transfer_tx = (
+            sdk.TransferTransaction()
+            .addTokenTransfer(token_id, sender_id, -amount)
+            .addTokenTransfer(token_id, recipient_id, amount)
+            .setTransactionMemo(memo)
+            .setMaxTransactionFee(self.config.max_transaction_fee)
+        )
+        
+        # Execute returns once the node accepts the transaction; the
+        # receipt (consensus) is awaited in the background
+        with self.client_pool.lease() as client:
+            tx_response = transfer_tx.execute(client)
+        
+        return str(tx_response.transactionId), lambda: self._resolve_receipt(tx_response)
+    
+    def _execute_batch(self, transfers: List[PendingTransfer]) -> Tuple[str, Callable[[], str]]:
+        """
+        Submit several deliveries as one atomic multi-leg transfer
+        
+        Returns:
+            (transaction_id, resolve) where resolve blocks until the receipt status is known
+        """
+        legs = net_token_transfers(self.config.my_account_id,
+                                   [(transfer.recipient, transfer.amount) for transfer in transfers])
+        memo = f"{self.config.memo_prefix}Batch of {len(transfers)} deliveries"
+        
+        if not self._use_network():
+            transaction_id = self._simulate_transaction_id()
+            logging.info(f"🚀 Simulated batch transfer submitted: {len(transfers)} deliveries, {len(legs)} legs")
+            return transaction_id, self._simulate_receipt
+        
+        sdk = load_hedera_sdk()
+        token_id = sdk.TokenId.fromString(self.config.token_id)
+        
+        logging.info(f"🚀 Submitting batch transfer: {len(transfers)} deliveries, {len(legs)} legs")
+        
+        transfer_tx = sdk.TransferTransaction()
+        for account, amount in legs.items():
+            transfer_tx.addTokenTransfer(token_id, sdk.AccountId.fromString(account), amount)
+        transfer_tx.setTransactionMemo(memo).setMaxTransactionFee(self.config.max_transaction_fee)
+        
+        with self.client_pool.lease() as client:
+            tx_response = transfer_tx.execute(client)
+        
+        return str(tx_response.transactionId), lambda: self._resolve_receipt(tx_response)
+    
+    def _submit_single(self, transfer: PendingTransfer, on_complete: Callable[[PendingTransfer], None]):
+        """Submit a queued delivery on its own and track its receipt"""
         try:
-            if self.config.network == 'testnet':
-                self.client = Client.forTestnet()
-            else:
-                self.client = Client.forMainnet()
-            
-            # Set operator account
-            account_id = AccountId.fromString(self.config.my_account_id)
-            private_key = PrivateKey.fromString(self.config.my_private_key)
-            
-            self.client.setOperator(account_id, private_key)
-            
-            logging.info(f"✅ Hedera client initialized for {self.config.network}")
-            
+            transaction_id, resolve = self._execute_transfer(transfer.recipient, transfer.amount, transfer.memo)
         except Exception as e:
-            logging.error(f"Failed to initialize Hedera client: {e}")
-            self.client = None
+            logging.error(f"❌ Token transfer submission failed: {e}")
+            self.receipt_resolver.complete(transfer, 'FAILED', str(e), on_complete)
+            return
+        
+        transfer._submitted(transaction_id, self._get_explorer_url(transaction_id))
+        self.receipt_resolver.track(transfer, resolve, on_complete)
     
-    def transfer_tokens(self, recipient_account: str, amount: int, memo: str = None) -> Dict:
+    def _dispatch_batch(self, batch: List[Tuple[PendingTransfer, Callable]]):
+        """Hand a batch to the resolver pool, surfacing unexpected submission errors"""
+        def check(future):
+            error = future.exception()
+            if error is None:
+                return
+            logging.error(f"❌ Delivery batch submission crashed: {error}")
+            # Deliveries never sent can safely be failed; submitted ones resolve on their own
+            for transfer, on_complete in batch:
+                if transfer.status == 'QUEUED':
+                    self.receipt_resolver.complete(transfer, 'FAILED', str(error), on_complete)
+        
+        self.receipt_resolver.run(self._submit_batch, batch).add_done_callback(check)
+    
+    def _submit_batch(self, batch: List[Tuple[PendingTransfer, Callable]]):
+        """
+        Submit a batch of queued deliveries and fan the receipt out to each one
+        
+        A batch applies atomically, so one bad recipient (e.g. not associated
+        with the token) fails every leg. When the batch is known not to have
+        applied (rejected at precheck, or a receipt with a failure status),
+        each delivery is retried on its own so the rest still land. Any other
+        error (timeouts, transport errors, a failed receipt query) leaves the
+        outcome unknown, so the deliveries fail closed and are never resent,
+        as that could deliver twice.
+        """
+        if len(batch) == 1:
+            self._submit_single(*batch[0])
+            return
+        
+        transfers = [transfer for transfer, _ in batch]
+        try:
+            transaction_id, resolve = self._execute_batch(transfers)
+        except Exception as e:
+            if not is_precheck_rejection(e):
+                # The node may or may not have accepted it
+                logging.error(f"❌ Batch of {len(batch)} submission outcome unknown: {e}")
+                for transfer, on_complete in batch:
+                    self.receipt_resolver.complete(transfer, 'FAILED', f"Batch submission failed: {e}", on_complete)
+                return
+            logging.warning(f"Batch of {len(batch)} rejected ({e}) - submitting deliveries individually")
+            status = None
+        else:
+            explorer_url = self._get_explorer_url(transaction_id)
+            for transfer in transfers:
+                transfer._submitted(transaction_id, explorer_url, batch_size=len(batch))
+            
+            try:
+                status = resolve()
+            except Exception as e:
+                if transfers[0].simulation:
+                    status = str(e)  # Simulated receipts raise the failure reason
+                else:
+                    # Query or transport error: the batch may have applied
+                    logging.error(f"❌ Receipt resolution failed for batch {transaction_id}: {e}")
+                    for transfer, on_complete in batch:
+                        self.receipt_resolver.complete(transfer, 'FAILED', str(e), on_complete)
+                    return
+            
+            if status == 'SUCCESS':
+                logging.info(f"✅ Batch {transaction_id[:20]}... delivered to {len(batch)} recipients")
+                for transfer, on_complete in batch:
+                    self.receipt_resolver.complete(transfer, status, on_complete=on_complete)
+                return
+            logging.warning(f"Batch {transaction_id} failed ({status}) - submitting deliveries individually")
+        
+        self.batch_fallbacks += 1
+        for transfer, on_complete in batch:
+            self._submit_single(transfer, on_complete)
+    
+    def submit_transfer(self, recipient_account: str, amount: int, memo: str = None,
+                        on_complete: Callable[[PendingTransfer], None] = None) -> Dict:
         """
-        Transfer tokens to a recipient account
+        Submit a token transfer and return as soon as it is accepted
+        
+        With batching enabled the transfer is queued (status QUEUED, no
+        transaction ID yet) and sent with other deliveries arriving in the same
+        window. The receipt is resolved by the background receipt pool; poll
+        it with get_transfer_status(transfer_id) or pass on_complete.
         
         Args:
             recipient_account: Hedera account ID (e.g., "0.0.1234")
             amount: Number of tokens to transfer
             memo: Optional transaction memo
+            on_complete: Optional callback run with the PendingTransfer once resolved
             
         Returns:
-            Transaction result dictionary
+            Transfer result dictionary with pending=True
         """
+        def record(resolved: PendingTransfer):
+            self.transaction_history.append({
+                'type': 'token_transfer_simulation' if resolved.simulation else 'token_transfer',
+                'transaction_id': resolved.transaction_id,
+                'recipient': resolved.recipient,
+                'amount': resolved.amount,
+                'status': resolved.status,
+                'timestamp': resolved.resolved_at,
+                'memo': resolved.memo,
+                'network': self.config.network
+            })
+            if on_complete:
+                on_complete(resolved)
+        
         try:
-            if not self.client:
-                return self._simulate_token_transfer(recipient_account, amount, memo)
-            
-            # Real Hedera transaction
-            recipient_id = AccountId.fromString(recipient_account)
-            sender_id = AccountId.fromString(self.config.my_account_id)
-            token_id = TokenId.fromString(self.config.token_id)
-            
-            transaction_memo = f"{self.config.memo_prefix}{memo or 'Token transfer'}"
-            
-            logging.info(f"🚀 Initiating token transfer: {amount} tokens to {recipient_account}")
-            
-            # Create transfer transaction
-            transfer_tx = (
-                TransferTransaction()
-                .addTokenTransfer(token_id, sender_id, -amount)
-                .addTokenTransfer(token_id, recipient_id, amount)
-                .setTransactionMemo(transaction_memo)
-                .setMaxTransactionFee(self.config.max_transaction_fee)
-            )
-            
-            # Execute transaction
-            tx_response = transfer_tx.execute(self.client)
-            receipt = tx_response.getReceipt(self.client)
-            
-            transaction_id = str(tx_response.transactionId)
-            status = str(receipt.status)
-            
-            # Log transaction
-            tx_record = {
-                'type': 'token_transfer',
-                'transaction_id': transaction_id,
-                'recipient': recipient_account,
-                'amount': amount,
-                'status': status,
-                'timestamp': datetime.now().isoformat(),
-                'memo': transaction_memo,
-                'network_fee': None  # Would get from transaction record
-            }
+            simulation = not self._use_network()
+            default_memo = 'Simulated transfer' if simulation else 'Token transfer'
+            transaction_memo = f"{self.config.memo_prefix}{memo or default_memo}"
+            
+            if self.batcher:
+                transfer = PendingTransfer(None, recipient_account, amount, transaction_memo, None,
+                                           simulation=simulation, transfer_id=f"delivery-{uuid.uuid4().hex[:16]}")
+                self.receipt_resolver.register(transfer)
+                self.batcher.add(transfer, record)
+                
+                logging.info(f"📥 Token transfer queued for batching - Transfer ID: {transfer.transfer_id}")
+                return transfer.to_dict()
             
-            self.transaction_history.append(tx_record)
+            transaction_id, resolve = self._execute_transfer(recipient_account, amount, transaction_memo)
+            transfer = PendingTransfer(transaction_id, recipient_account, amount, transaction_memo,
+                                       self._get_explorer_url(transaction_id), simulation=simulation)
+            self.receipt_resolver.track(transfer, resolve, record)
             
-            logging.info(f"✅ Token transfer completed - TX ID: {transaction_id[:20]}...")
-            
-            return {
-                'success': True,
-                'transaction_id': transaction_id,
-                'status': status,
-                'recipient': recipient_account,
-                'amount': amount,
-                'memo': transaction_memo,
-                'timestamp': datetime.now().isoformat(),
-                'explorer_url': self._get_explorer_url(transaction_id)
-            }
+            logging.info(f"📤 Token transfer submitted - TX ID: {transfer.transaction_id[:20]}...")
+            return transfer.to_dict()
             
         except Exception as e:
-            logging.error(f"❌ Token transfer failed: {e}")
+            logging.error(f"❌ Token transfer submission failed: {e}")
             return {
                 'success': False,
                 'error': str(e),
@@ -171,66 +594,68 @@ class HederaTokenManager:
                 'timestamp': datetime.now().isoformat()
             }
     
-    def _simulate_token_transfer(self, recipient_account: str, amount: int, memo: str = None) -> Dict:
-        """Simulate token transfer for demo purposes"""
-        import time
-        import random
+    def get_transfer_status(self, transfer_id: str) -> Optional[Dict]:
+        """
+        Check the progress of a submitted transfer
         
+        Args:
+            transfer_id: transfer_id from the submission result
+        
+        Returns:
+            Transfer result dictionary, or None if the transfer is not tracked
+        """
+        transfer = self.receipt_resolver.get(transfer_id)
+        return transfer.to_dict() if transfer else None
+    
+    def transfer_tokens(self, recipient_account: str, amount: int, memo: str = None) -> Dict:
+        """
+        Transfer tokens to a recipient account and wait for the receipt
+        
+        Args:
+            recipient_account: Hedera account ID (e.g., "0.0.1234")
+            amount: Number of tokens to transfer
+            memo: Optional transaction memo
+            
+        Returns:
+            Transaction result dictionary
+        """
+        result = self.submit_transfer(recipient_account, amount, memo)
+        if not result.get('success'):
+            return result
+        
+        transfer = self.receipt_resolver.get(result['transfer_id'])
+        result = transfer.wait(self.config.transaction_timeout)
+        if result['pending']:
+            result['success'] = False
+            result['error'] = f"Receipt not received within {self.config.transaction_timeout}s"
+        
+        if result['success']:
+            logging.info(f"✅ Token transfer completed - TX ID: {result['transaction_id'][:20]}...")
+        else:
+            logging.error(f"❌ Token transfer failed: {result['error']}")
+        
+        return result
+    
+    def _simulate_transaction_id(self) -> str:
+        """Generate a mock transaction ID for demo purposes"""
+        return f"0.0.{random.randint(1000, 9999)}@{int(datetime.now().timestamp())}.{random.randint(100000000, 999999999)}"
+    
+    def _simulate_receipt(self) -> str:
+        """Simulate waiting for consensus and return the receipt status"""
         # Simulate processing delay
         time.sleep(random.uniform(1.0, 3.0))
         
-        # Generate mock transaction ID
-        transaction_id = f"0.0.{random.randint(1000, 9999)}@{int(datetime.now().timestamp())}.{random.randint(100000000, 999999999)}"
-        
         # Simulate success (90% success rate)
-        success = random.random() > 0.1
+        if random.random() > 0.1:
+            return 'SUCCESS'
         
-        if success:
-            tx_record = {
-                'type': 'token_transfer_simulation',
-                'transaction_id': transaction_id,
-                'recipient': recipient_account,
-                'amount': amount,
-                'status': 'SUCCESS',
-                'timestamp': datetime.now().isoformat(),
-                'memo': memo or 'Simulated transfer',
-                'network': self.config.network
-            }
-            
-            self.transaction_history.append(tx_record)
-            
-            logging.info(f"✅ Simulated token transfer: {amount} tokens to {recipient_account}")
-            
-            return {
-                'success': True,
-                'transaction_id': transaction_id,
-                'status': 'SUCCESS',
-                'recipient': recipient_account,
-                'amount': amount,
-                'memo': memo or 'Simulated transfer',
-                'timestamp': datetime.now().isoformat(),
-                'explorer_url': self._get_explorer_url(transaction_id),
-                'simulation': True
-            }
-        else:
-            error_messages = [
-                "Insufficient token balance",
-                "Account not associated with token",
-                "Network congestion",
-                "Invalid recipient account"
-            ]
-            error = random.choice(error_messages)
-            
-            logging.error(f"❌ Simulated token transfer failed: {error}")
-            
-            return {
-                'success': False,
-                'error': error,
-                'recipient': recipient_account,
-                'amount': amount,
-                'timestamp': datetime.now().isoformat(),
-                'simulation': True
-            }
+        error_messages = [
+            "Insufficient token balance",
+            "Account not associated with token",
+            "Network congestion",
+            "Invalid recipient account"
+        ]
+        raise RuntimeError(random.choice(error_messages))
     
     def get_account_balance(self, account_id: str = None) -> Dict:
         """
@@ -245,18 +670,20 @@ class HederaTokenManager:
         try:
             target_account = account_id or self.config.my_account_id
             
-            if not self.client:
+            if not self._use_network():
                 return self._simulate_balance_query(target_account)
             
             # Real balance query
-            account = AccountId.fromString(target_account)
-            balance_query = AccountBalanceQuery().setAccountId(account)
-            balance = balance_query.execute(self.client)
+            sdk = load_hedera_sdk()
+            account = sdk.AccountId.fromString(target_account)
+            balance_query = sdk.AccountBalanceQuery().setAccountId(account)
+            with self.client_pool.lease() as client:
+                balance = balance_query.execute(client)
             
             # Get token balance if token is associated
             token_balance = 0
             if hasattr(balance, 'tokens') and self.config.token_id:
-                token_id = TokenId.fromString(self.config.token_id)
+                token_id = sdk.TokenId.fromString(self.config.token_id)
                 token_balance = balance.tokens.get(token_id, 0)
             
             return {
@@ -337,6 +764,116 @@ class IntegratedTransactionService:
         except ImportError:
             logging.warning("SMS service not available")
             self.sms_enabled = False
+        
+        try:
+            from utils import transaction_logger
+            self.transaction_logger = transaction_logger
+        except ImportError:
+            logging.warning("Transaction logger not available")
+            self.transaction_logger = None
+    
+    def submit_token_transfer(self, recipient_account: str, amount: int, memo: str = None,
+                              notify_phone: str = None, log_data: Dict = None,
+                              on_complete: Callable[[PendingTransfer], None] = None) -> Dict:
+        """
+        Submit a token transfer without waiting for consensus
+        
+        When the receipt resolves, the outcome is written to the transaction
+        log and, on success, a token delivery SMS is queued for notify_phone.
+        
+        Args:
+            recipient_account: Hedera account ID for token delivery
+            amount: Number of tokens to transfer
+            memo: Optional transaction memo
+            notify_phone: Phone number for the delivery SMS
+            log_data: Extra fields for the transaction log entry
+            on_complete: Optional callback run with the PendingTransfer after
+                the outcome is logged
+            
+        Returns:
+            Submission result (see HederaTokenManager.submit_transfer)
+        """
+        def record(transfer: PendingTransfer):
+            result = transfer.to_dict()
+            
+            if self.transaction_logger:
+                self.transaction_logger.log_transaction('token_transfer', {
+                    **(log_data or {}),
+                    'hedera_transaction_id': transfer.transaction_id,
+                    'transfer_id': transfer.transfer_id,
+                    'batch_size': transfer.batch_size,
+                    'recipient_account': transfer.recipient,
+                    'tokens_sent': transfer.amount,
+                    'memo': transfer.memo,
+                    'explorer_url': transfer.explorer_url,
+                    'simulation': transfer.simulation,
+                    'submitted_at': transfer.submitted_at,
+                    'resolved_at': transfer.resolved_at,
+                    'receipt_status': transfer.status,
+                    'error': transfer.error,
+                    'success': result['success']
+                }, transaction_id=self.transfer_log_id(transfer.transfer_id))
+            
+            if self.sms_enabled and notify_phone and result['success']:
+                self.sms_service.notify_token_transfer(
+                    notify_phone, transfer.amount, transfer.recipient, transfer.transaction_id,
+                    background=True
+                )
+            
+            if on_complete:
+                on_complete(transfer)
+        
+        return self.token_manager.submit_transfer(recipient_account, amount, memo, on_complete=record)
+    
+    @staticmethod
+    def transfer_log_id(transfer_id: str) -> str:
+        """Transaction log ID of a transfer's outcome entry"""
+        return f"TOKEN_TRANSFER_{transfer_id}"
+    
+    def get_transfer_status(self, transfer_id: str) -> Optional[Dict]:
+        """
+        Check the progress of a submitted transfer
+        
+        Transfers submitted by this process are answered from the receipt
+        resolver; otherwise the outcome logged to the (shared) transaction
+        store is returned, so any worker can report a resolved transfer.
+        
+        Args:
+            transfer_id: transfer_id from the submission result
+        
+        Returns:
+            Transfer result dictionary, or None if the transfer is unknown
+        """
+        status = self.token_manager.get_transfer_status(transfer_id)
+        if status is not None or not self.transaction_logger:
+            return status
+        
+        entry = self.transaction_logger.get_transaction(self.transfer_log_id(transfer_id))
+        if not entry:
+            return None
+        
+        data = entry['data']
+        result = {
+            'success': data.get('success', False),
+            'transaction_id': data.get('hedera_transaction_id'),
+            'transfer_id': transfer_id,
+            'status': data.get('receipt_status'),
+            'pending': False,
+            'recipient': data.get('recipient_account'),
+            'amount': data.get('tokens_sent'),
+            'memo': data.get('memo'),
+            'submitted_at': data.get('submitted_at'),
+            'resolved_at': data.get('resolved_at', entry.get('timestamp')),
+            'timestamp': datetime.now().isoformat(),
+            'explorer_url': data.get('explorer_url')
+        }
+        if data.get('error'):
+            result['error'] = data['error']
+        if data.get('batch_size'):
+            result['batch_size'] = data['batch_size']
+        if data.get('simulation'):
+            result['simulation'] = True
+        return result
     
     def process_stock_purchase(self, recipient_phone: str, recipient_account: str, 
                              stock_name: str, quantity: int, price: float) -> Dict:
@@ -359,10 +896,20 @@ class IntegratedTransactionService:
             # Generate transaction reference
             transaction_ref = f"STOCK_{uuid.uuid4().hex[:8].upper()}"
             
-            # Step 1: Transfer tokens to recipient account
+            # Step 1: Submit the token transfer; the delivery and purchase
+            # confirmation SMS are sent once the receipt resolves
+            def confirm_purchase(transfer: PendingTransfer):
+                if self.sms_enabled and transfer.to_dict()['success']:
+                    self.sms_service.notify_stock_purchase(
+                        recipient_phone, stock_name, quantity, price, transaction_ref, background=True
+                    )
+                    logging.info(f"SMS notifications queued for stock purchase {transaction_ref}")
+            
             memo = f"Stock purchase: {quantity} {stock_name}"
-            token_result = self.token_manager.transfer_tokens(
-                recipient_account, quantity, memo
+            token_result = self.submit_token_transfer(
+                recipient_account, quantity, memo, notify_phone=recipient_phone,
+                log_data={'transaction_reference': transaction_ref, 'stock_name': stock_name},
+                on_complete=confirm_purchase
             )
             
             result = {
@@ -373,34 +920,14 @@ class IntegratedTransactionService:
                 'recipient_phone': recipient_phone,
                 'recipient_account': recipient_account,
                 'token_transfer': token_result,
-                'sms_notifications': [],
                 'timestamp': datetime.now().isoformat()
             }
             
-            # Step 2: Send SMS notifications if enabled
-            if self.sms_enabled and token_result['success']:
-                # Stock purchase confirmation SMS
-                sms_result1 = self.sms_service.notify_stock_purchase(
-                    recipient_phone, stock_name, quantity, price, transaction_ref
-                )
-                result['sms_notifications'].append({
-                    'type': 'purchase_confirmation',
-                    'result': sms_result1
-                })
-                
-                # Token delivery confirmation SMS
-                sms_result2 = self.sms_service.notify_token_transfer(
-                    recipient_phone, quantity, recipient_account, token_result['transaction_id']
-                )
-                result['sms_notifications'].append({
-                    'type': 'token_delivery',
-                    'result': sms_result2
-                })
-                
-                logging.info(f"SMS notifications sent for stock purchase {transaction_ref}")
-            
             result['success'] = token_result['success']
-            result['overall_status'] = 'completed' if token_result['success'] else 'failed'
+            if not token_result['success']:
+                result['overall_status'] = 'failed'
+            else:
+                result['overall_status'] = 'processing' if token_result.get('pending') else 'completed'
             
             return result
             
@@ -439,4 +966,4 @@ class IntegratedTransactionService:
         return summary
 
 # Global integrated service instance
-transaction_service = IntegratedTransactionService()
\ No newline at end of file
+transaction_service = LazyService(IntegratedTransactionService, 'transaction_service')
\ No newline at end of file
@@ -0,0 +1,302 @@
+"""
+Hedera Client Pool Module
+Process-wide registry of lazily created Hedera operator clients. The Hedera
+SDK (and the JVM behind it) is only loaded when a client is first needed.
+"""
+
+import os
+import re
+import time
+import logging
+import threading
+import importlib.util
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+_sdk = None
+_sdk_error = None
+_sdk_lock = threading.Lock()
+
+# The SDK runs on pyjnius, which raises every Java error as a
+# jnius.JavaException carrying the Java class name in `.classname` and the
+# toString() of each wrapped cause in `.stacktrace`.
+
+# Java exception classes that mean a client's gRPC channel is unusable. The
+# SDK's status exceptions (PrecheckStatusException, ReceiptStatusException)
+# are answers from a working node and never count.
+CHANNEL_FAILURE_CLASSES = ('io.grpc.StatusRuntimeException', 'java.util.concurrent.TimeoutException')
+# Raised by execute() when the node rejected the transaction before submitting it
+PRECHECK_STATUS_CLASSES = ('com.hedera.hashgraph.sdk.PrecheckStatusException',)
+# Raised by getReceipt() when the transaction reached consensus with a
+# non-SUCCESS status, i.e. it is known not to have applied
+RECEIPT_STATUS_CLASSES = ('com.hedera.hashgraph.sdk.ReceiptStatusException',)
+
+# "Caused by: io.grpc.StatusRuntimeException: UNAVAILABLE: io exception";
+# stack frames ("com.example.Foo.bar(Foo.java:12)") do not match
+_JAVA_THROWABLE_LINE = re.compile(r'^(?:Caused by:\s*)?([A-Za-z_$][\w$]*(?:\.[A-Za-z_$][\w$]*)+)(?::\s*(.*))?$')
+_STATUS_CODE = re.compile(r'\b([A-Z][A-Z0-9_]+)\W*$')
+
+def hedera_sdk_installed() -> bool:
+    """Check whether the Hedera SDK is installed without importing it"""
+    return importlib.util.find_spec('hedera') is not None
+
+def load_hedera_sdk():
+    """
+    Import the Hedera SDK on first use
+
+    Returns:
+        The hedera module, or None if it cannot be loaded (e.g. no JVM)
+    """
+    global _sdk, _sdk_error
+    with _sdk_lock:
+        if _sdk is None and _sdk_error is None:
+            try:
+                import hedera
+                _sdk = hedera
+                logging.info("✅ Hedera SDK loaded")
+            except Exception as e:
+                _sdk_error = str(e)
+                logging.warning(f"Hedera SDK not available - using simulation mode ({e})")
+    return _sdk
+
+def java_exception_chain(error: BaseException) -> List[Tuple[str, Optional[str]]]:
+    """
+    List the Java exceptions behind an SDK error, outermost first
+
+    Args:
+        error: Exception raised by an SDK call
+
+    Returns:
+        (java_class_name, message) pairs for the error and its wrapped causes;
+        empty for errors that did not come from Java
+    """
+    chain = []
+    depth = 0
+    while error is not None and depth < 8:
+        classname = getattr(error, 'classname', None)
+        if classname:
+            chain.append((classname, getattr(error, 'innermessage', None)))
+            for line in getattr(error, 'stacktrace', None) or ():
+                match = _JAVA_THROWABLE_LINE.match(str(line).strip())
+                # The trace opens with the exception itself
+                if match and match.group(1) != chain[-1][0]:
+                    chain.append((match.group(1), match.group(2)))
+        error = error.__cause__
+        depth += 1
+    return chain
+
+def is_channel_failure(error: BaseException) -> bool:
+    """Check whether an SDK error (or its cause chain) means the client should be re-created"""
+    return any(classname in CHANNEL_FAILURE_CLASSES for classname, _ in java_exception_chain(error))
+
+def is_precheck_rejection(error: BaseException) -> bool:
+    """Check whether execute() failed because the node rejected the transaction at precheck"""
+    chain = java_exception_chain(error)
+    return bool(chain) and chain[0][0] in PRECHECK_STATUS_CLASSES
+
+def receipt_failure_status(error: BaseException) -> Optional[str]:
+    """
+    Get the receipt status carried by a ReceiptStatusException
+
+    Args:
+        error: Exception raised by getReceipt()
+
+    Returns:
+        The failure status (e.g. "INSUFFICIENT_TOKEN_BALANCE"), or None when
+        the error is not a failed receipt (e.g. a timeout or transport error)
+    """
+    chain = java_exception_chain(error)
+    if not chain or chain[0][0] not in RECEIPT_STATUS_CLASSES:
+        return None
+    match = _STATUS_CODE.search(chain[0][1] or '')
+    return match.group(1) if match else 'RECEIPT_FAILED'
+
+class HederaClientPool:
+    """
+    Shared operator clients for concurrent submissions and receipt queries
+
+    The SDK Client is thread-safe, so clients are shared rather than checked
+    out exclusively: each lease takes the next of up to `size` clients in
+    round-robin order, and a receipt query waiting for consensus never holds
+    up another submission. Clients unused for longer than
+    `health_check_interval` are probed before use, and clients that fail with
+    a channel error are closed and replaced.
+    """
+
+    def __init__(self, network: str, account_id: str, private_key: str, size: int = 2,
+                 health_check_interval: float = 60.0):
+        """
+        Args:
+            network: 'testnet' or 'mainnet'
+            account_id: Operator account ID
+            private_key: Operator private key
+            size: Number of clients to spread requests over
+            health_check_interval: Idle seconds before a client is probed on use
+        """
+        self.network = network
+        self.account_id = account_id
+        self.private_key = private_key
+        self.size = max(1, size)
+        self.health_check_interval = health_check_interval
+
+        self._clients = [None] * self.size
+        self._last_good = [0.0] * self.size
+        self._slot_locks = [threading.Lock() for _ in range(self.size)]
+        self._next_slot = 0
+        self._created = 0
+        self._recreated = 0
+        self._lock = threading.Lock()
+
+    def available(self) -> bool:
+        """Check whether real clients can be created (loads the SDK)"""
+        return load_hedera_sdk() is not None
+
+    def _create_client(self):
+        """Create and configure one operator client"""
+        sdk = load_hedera_sdk()
+        if sdk is None:
+            raise RuntimeError("Hedera SDK not available")
+
+        client = sdk.Client.forTestnet() if self.network == 'testnet' else sdk.Client.forMainnet()
+        client.setOperator(sdk.AccountId.fromString(self.account_id),
+                           sdk.PrivateKey.fromString(self.private_key))
+
+        with self._lock:
+            self._created += 1
+        logging.info(f"✅ Hedera client created for {self.network} ({self._created}/{self.size})")
+        return client
+
+    def _is_healthy(self, client) -> bool:
+        """Probe a client with a free balance query"""
+        sdk = load_hedera_sdk()
+        try:
+            sdk.AccountBalanceQuery().setAccountId(sdk.AccountId.fromString(self.account_id)).execute(client)
+            return True
+        except Exception as e:
+            logging.warning(f"Hedera client failed health check: {e}")
+            return False
+
+    def _discard(self, slot: int):
+        """Close a slot's broken client (caller holds the slot lock)"""
+        client, self._clients[slot] = self._clients[slot], None
+        try:
+            client.close()
+        except Exception:
+            pass
+        with self._lock:
+            self._created -= 1
+            self._recreated += 1
+
+    def acquire(self) -> Tuple[int, object]:
+        """
+        Get the next client in rotation, creating or replacing it if needed
+
+        Returns:
+            (slot, client) - pass both to release()
+        """
+        with self._lock:
+            slot = self._next_slot
+            self._next_slot = (slot + 1) % self.size
+
+        with self._slot_locks[slot]:
+            client = self._clients[slot]
+            if client is not None and time.monotonic() - self._last_good[slot] >= self.health_check_interval:
+                if self._is_healthy(client):
+                    self._last_good[slot] = time.monotonic()
+                else:
+                    self._discard(slot)
+                    client = None
+            if client is None:
+                client = self._create_client()
+                self._clients[slot] = client
+                self._last_good[slot] = time.monotonic()
+            return slot, client
+
+    def release(self, slot: int, client, healthy: bool = True):
+        """Record the outcome of a lease, replacing the client if its channel failed"""
+        if healthy:
+            self._last_good[slot] = time.monotonic()
+            return
+        with self._slot_locks[slot]:
+            if self._clients[slot] is client:  # another thread may have replaced it already
+                logging.warning("Re-creating Hedera client after channel failure")
+                self._discard(slot)
+
+    @contextmanager
+    def lease(self):
+        """Use a shared client for the duration of a with-block"""
+        slot, client = self.acquire()
+        healthy = True
+        try:
+            yield client
+        except Exception as e:
+            healthy = not is_channel_failure(e)
+            raise
+        finally:
+            self.release(slot, client, healthy)
+
+    def close(self):
+        """Close all clients"""
+        for slot in range(self.size):
+            with self._slot_locks[slot]:
+                client, self._clients[slot] = self._clients[slot], None
+            if client is None:
+                continue
+            try:
+                client.close()
+            except Exception:
+                pass
+            with self._lock:
+                self._created -= 1
+
+    def get_stats(self) -> Dict:
+        """Get pool statistics"""
+        return {
+            'network': self.network,
+            'size': self.size,
+            'created': self._created,
+            'recreated': self._recreated,
+            'sdk_loaded': _sdk is not None
+        }
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_client_pool(config) -> HederaClientPool:
+    """
+    Get the process-wide client pool, creating it on first use
+
+    Args:
+        config: HederaConfig providing network and operator credentials
+
+    Returns:
+        Shared HederaClientPool (no clients are created until leased)
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = HederaClientPool(
+                config.network, config.my_account_id, config.my_private_key,
+                size=int(os.getenv('HEDERA_CLIENT_POOL_SIZE', 2)),
+                health_check_interval=float(os.getenv('HEDERA_CLIENT_HEALTH_INTERVAL', 60))
+            )
+        return _pool
+
+def get_existing_client_pool() -> Optional[HederaClientPool]:
+    """Get the shared pool only if something has already created it"""
+    return _pool
+
+def reset_client_pool() -> bool:
+    """
+    Forget the shared pool without closing its clients (call after fork)
+
+    gRPC channels and the JVM do not survive fork, so a worker must never use
+    clients created by its parent; the next get_client_pool() starts afresh.
+
+    Returns:
+        True if the Hedera SDK (JVM) was already loaded before the fork
+    """
+    global _pool, _pool_lock
+    _pool = None
+    _pool_lock = threading.Lock()
+    return _sdk is not None
@@ -0,0 +1,113 @@
+"""
+HTTP Cache Module
+Serves JSON payloads that rarely change from bytes serialized once per
+payload version, with strong ETags, If-None-Match revalidation (304),
+optional pre-gzipped bodies and Cache-Control headers.
+"""
+
+import os
+import gzip
+import hashlib
+import threading
+from typing import Any, Callable, Dict, NamedTuple, Optional, Tuple
+
+from flask import Response, current_app, request
+
+from json_provider import dumps_bytes
+
+# Bodies smaller than this are not worth compressing
+GZIP_MIN_BYTES = 1024
+
+class RenderedBody(NamedTuple):
+    """A payload serialized for one version"""
+    version: Any
+    body: bytes
+    gzipped: Optional[bytes]
+    etag: str
+
+class PrecomputedResponse:
+    """
+    JSON response serialized once per payload version
+
+    The payload is rebuilt and re-serialized only when version() changes;
+    every other request is served from the stored bytes, or answered with
+    304 Not Modified when the client already holds them. The ETag is hashed
+    from the payload without its volatile keys (e.g. the render timestamp),
+    so every worker, and every re-render, tags the same content alike.
+    """
+
+    def __init__(self, build: Callable[[], Dict], version: Callable[[], Any] = None,
+                 max_age: int = 0, gzip_enabled: bool = True, volatile_keys: Tuple[str, ...] = ('timestamp',)):
+        """
+        Args:
+            build: Returns the payload to serialize
+            version: Returns a value that changes whenever the payload would (None = build once)
+            max_age: Cache-Control max-age in seconds
+            gzip_enabled: Keep a gzip copy for clients that accept it
+            volatile_keys: Top-level payload keys left out of the ETag
+        """
+        self.build = build
+        self.version = version
+        self.max_age = max_age
+        self.gzip_enabled = gzip_enabled
+        self.volatile_keys = volatile_keys
+
+        self._rendered = None  # RenderedBody, replaced wholesale
+        self._lock = threading.Lock()
+        self.renders = 0
+
+    def _render(self, version: Any) -> RenderedBody:
+        payload = self.build()
+        # Serialize through the app's JSON provider so the bytes match jsonify()
+        body = current_app.json.response(payload).get_data()
+        gzipped = gzip.compress(body, 6) if self.gzip_enabled and len(body) >= GZIP_MIN_BYTES else None
+        content = {key: value for key, value in payload.items() if key not in self.volatile_keys}
+        etag = hashlib.sha256(dumps_bytes(content, sort_keys=True)).hexdigest()[:32]
+        self.renders += 1
+        return RenderedBody(version, body, gzipped, etag)
+
+    def get_rendered(self) -> RenderedBody:
+        """Current serialized payload, re-rendering if its version changed"""
+        version = self.version() if self.version else None
+        rendered = self._rendered
+        if rendered is None or rendered.version != version:
+            with self._lock:
+                rendered = self._rendered
+                if rendered is None or rendered.version != version:
+                    rendered = self._rendered = self._render(version)
+        return rendered
+
+    def respond(self) -> Response:
+        """Build the response for the current request"""
+        rendered = self.get_rendered()
+        use_gzip = rendered.gzipped is not None and request.accept_encodings['gzip'] > 0
+        # Each encoding is a different byte sequence, so it gets its own strong ETag
+        etag = f"{rendered.etag}-gz" if use_gzip else rendered.etag
+
+        if request.if_none_match and (request.if_none_match.contains_weak(rendered.etag) or
+                                      request.if_none_match.contains_weak(f"{rendered.etag}-gz")):
+            response = Response(status=304)
+        else:
+            response = Response(rendered.gzipped if use_gzip else rendered.body, mimetype=current_app.json.mimetype)
+            if use_gzip:
+                response.headers['Content-Encoding'] = 'gzip'
+
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = f"public, max-age={self.max_age}"
+        response.vary.add('Accept-Encoding')
+        return response
+
+def create_precomputed_response(build: Callable[[], Dict], version: Callable[[], Any] = None,
+                                max_age_env: str = None, default_max_age: int = 0) -> PrecomputedResponse:
+    """
+    Create a precomputed response configured from the environment
+
+    Args:
+        build: Returns the payload to serialize
+        version: Returns the payload version (None = build once)
+        max_age_env: Environment variable holding the Cache-Control max-age
+        default_max_age: max-age when the variable is not set
+    """
+    max_age = int(os.getenv(max_age_env, default_max_age)) if max_age_env else default_max_age
+    return PrecomputedResponse(build, version, max_age=max_age,
+                               gzip_enabled=os.getenv('HTTP_GZIP_ENABLED', 'true').lower() == 'true')
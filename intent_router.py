@@ -0,0 +1,90 @@
+"""
+Chat Intent Router Module
+Classifies /api/chat messages into intents (Hedera account reply, stock
+list, price query, buy, pay, STK push, AI chat) in a single pass, with every
+pattern compiled once at import.
+"""
+
+import re
+from typing import Dict, NamedTuple
+
+# Hedera account ID sent as a reply to "where should we deliver your tokens?"
+ACCOUNT_ID_PATTERN = re.compile(r'^(0\.\d+\.\d+)$')
+
+# Stock trader commands, matched against the lowercased message
+LIST_STOCKS_PATTERN = re.compile(r'(list|show|top|all|available|kenyan).*stocks?')
+STOCK_KEYWORD_PATTERN = re.compile(r'price|quote|value|cost|worth|stock|share|trading')
+BUY_PATTERN = re.compile(r'buy\s+(\d+)\s+(?:units?\s+(?:of\s+)?)?([a-z0-9\s]+)')
+PAY_FOR_PATTERN = re.compile(r'pay\s+([\d\.]+)\s+for\s+(.+)')
+
+# General M-PESA STK push ("pay 250")
+STK_PUSH_PATTERN = re.compile(r'^pay\s+([\d\.]+)\s*$')
+
+WORD_PATTERN = re.compile(r"[a-z0-9&'-]+")
+
+# Filler words dropped from price queries to leave the stock name or ticker
+QUERY_STOPWORDS = frozenset([
+    'what', 'is', 'the', 'of', 'for', 'price', 'quote', 'stock', 'share', 'current',
+    'today', 'trading', 'at', 'how', 'much'
+])
+
+class Intent(NamedTuple):
+    """A classified chat message: the handler name and its extracted arguments"""
+    name: str
+    args: Dict
+
+CHAT = Intent('chat', {})
+LIST_STOCKS = Intent('list_stocks', {})
+TRADER_HELP = Intent('trader_help', {})
+
+def extract_stock_query(lowered: str) -> str:
+    """Strip filler words from a lowercased price query, leaving the stock name or ticker"""
+    return ' '.join(word for word in WORD_PATTERN.findall(lowered) if word not in QUERY_STOPWORDS)
+
+def classify_message(message: str, recipient_name: str) -> Intent:
+    """
+    Route a chat message to an intent
+
+    The message is lowercased once and every pattern runs against that
+    copy. Checks run in priority order: a Hedera account ID always wins,
+    stock trader commands only apply to the stock trader persona, and
+    anything unmatched goes to the AI chat.
+
+    Args:
+        message: Stripped user message
+        recipient_name: Persona the message was sent to
+
+    Returns:
+        Intent with the handler name and its arguments
+    """
+    account_match = ACCOUNT_ID_PATTERN.match(message)
+    if account_match:
+        return Intent('hedera_account', {'account_id': account_match.group(1)})
+
+    lowered = message.lower()
+
+    if 'stock trader' in recipient_name.lower():
+        # Every list command mentions "stock"; the substring test skips the backtracking search
+        if 'stock' in lowered and LIST_STOCKS_PATTERN.search(lowered):
+            return LIST_STOCKS
+
+        if STOCK_KEYWORD_PATTERN.search(lowered):
+            query = extract_stock_query(lowered)
+            if query:
+                return Intent('stock_query', {'query': query})
+
+        buy_match = BUY_PATTERN.search(lowered)
+        if buy_match:
+            return Intent('buy_stock', {'qty': int(buy_match.group(1)), 'ticker': buy_match.group(2).strip().upper()})
+
+        pay_match = PAY_FOR_PATTERN.search(lowered)
+        if pay_match:
+            return Intent('pay_for_stock', {'amount': float(pay_match.group(1)), 'target': pay_match.group(2).strip()})
+
+        return TRADER_HELP
+
+    stk_match = STK_PUSH_PATTERN.match(lowered)
+    if stk_match:
+        return Intent('stk_push', {'amount': float(stk_match.group(1))})
+
+    return CHAT
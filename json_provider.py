@@ -0,0 +1,134 @@
+"""
+JSON Provider Module
+One JSON encoder for API responses, SSE events and the transaction store.
+orjson is used when it is installed; otherwise the standard library encoder
+is configured to produce the same output (compact, UTF-8, ISO 8601 datetimes).
+"""
+
+import os
+import json
+import logging
+from datetime import date, datetime, time
+from typing import Any, Union
+
+from flask.json.provider import JSONProvider
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+def _default(obj: Any) -> Any:
+    """Encode types neither backend handles natively (Decimal, UUID, sets, markup...)"""
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if hasattr(obj, '__html__'):
+        return str(obj.__html__())
+    return str(obj)
+
+def _stdlib_default(obj: Any) -> Any:
+    # orjson writes these natively; match its format
+    if isinstance(obj, (datetime, date, time)):
+        return obj.isoformat()
+    return _default(obj)
+
+class StdlibJSONBackend:
+    """
+    Standard library json, configured to match the orjson output
+    """
+
+    name = 'stdlib'
+
+    def dumps(self, obj: Any, sort_keys: bool = False, indent: bool = False) -> str:
+        """Serialize to a str"""
+        return json.dumps(obj, default=_stdlib_default, ensure_ascii=False, sort_keys=sort_keys,
+                          indent=2 if indent else None, separators=None if indent else (',', ':'))
+
+    def dumps_bytes(self, obj: Any, sort_keys: bool = False, indent: bool = False) -> bytes:
+        """Serialize to UTF-8 bytes"""
+        return self.dumps(obj, sort_keys, indent).encode('utf-8')
+
+    def loads(self, data: Union[str, bytes]) -> Any:
+        """Parse a str or bytes document"""
+        return json.loads(data)
+
+class OrjsonJSONBackend:
+    """
+    orjson encoder; documents orjson rejects (e.g. integers beyond 64 bits)
+    fall back to the standard library
+    """
+
+    name = 'orjson'
+
+    def __init__(self):
+        self._fallback = StdlibJSONBackend()
+
+    def dumps_bytes(self, obj: Any, sort_keys: bool = False, indent: bool = False) -> bytes:
+        """Serialize to UTF-8 bytes"""
+        option = orjson.OPT_NON_STR_KEYS
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        try:
+            return orjson.dumps(obj, default=_default, option=option)
+        except orjson.JSONEncodeError:
+            return self._fallback.dumps_bytes(obj, sort_keys, indent)
+
+    def dumps(self, obj: Any, sort_keys: bool = False, indent: bool = False) -> str:
+        """Serialize to a str"""
+        return self.dumps_bytes(obj, sort_keys, indent).decode('utf-8')
+
+    def loads(self, data: Union[str, bytes]) -> Any:
+        """Parse a str or bytes document"""
+        return orjson.loads(data)
+
+def create_json_backend(backend: str = None):
+    """
+    Create the JSON backend selected by JSON_BACKEND (auto, orjson or stdlib)
+
+    Args:
+        backend: Backend name (defaults to JSON_BACKEND, then auto)
+
+    Returns:
+        OrjsonJSONBackend when orjson is wanted and installed, else StdlibJSONBackend
+    """
+    backend = (backend or os.getenv('JSON_BACKEND', 'auto')).lower()
+    if backend == 'orjson' and not ORJSON_AVAILABLE:
+        logging.warning("JSON_BACKEND=orjson but orjson is not installed - using the standard library")
+    if backend in ('auto', 'orjson') and ORJSON_AVAILABLE:
+        return OrjsonJSONBackend()
+    return StdlibJSONBackend()
+
+json_backend = create_json_backend()
+
+# Module-level shortcuts bound to the selected backend
+dumps = json_backend.dumps
+dumps_bytes = json_backend.dumps_bytes
+loads = json_backend.loads
+
+class FastJSONProvider(JSONProvider):
+    """
+    Flask JSON provider backed by json_backend
+
+    Responses keep jsonify()'s shape: sorted keys, compact unless the app
+    is in debug mode, and a trailing newline.
+    """
+
+    sort_keys = True
+    compact = None
+    mimetype = 'application/json'
+
+    def dumps(self, obj: Any, **kwargs) -> str:
+        return json_backend.dumps(obj, sort_keys=kwargs.get('sort_keys', self.sort_keys),
+                                  indent=bool(kwargs.get('indent')))
+
+    def loads(self, s: Union[str, bytes], **kwargs) -> Any:
+        return json_backend.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = self.compact is False or (self.compact is None and self._app.debug)
+        body = json_backend.dumps_bytes(obj, sort_keys=self.sort_keys, indent=indent)
+        return self._app.response_class(body + b'\n', mimetype=self.mimetype)
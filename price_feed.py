@@ -0,0 +1,369 @@
+#!/usr/bin/env python3
+"""
+Price Feed Module
+Live stock quotes for the app. A pluggable tick source (CSV replay, mock
+random walk or an HTTP quotes endpoint) feeds an engine that keeps a ring
+buffer of recent ticks per ticker and a latest-quote snapshot that readers
+use without taking a lock.
+
+Select the source with PRICE_FEED_SOURCE (static, mock, replay or http).
+"""
+
+import os
+import csv
+import time
+import random
+import logging
+import argparse
+import threading
+from array import array
+from datetime import datetime
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional
+
+# Seconds to wait before restarting a source that raised
+SOURCE_RETRY_SECONDS = 5.0
+
+# Replay batch size when replaying as fast as possible (speed 0)
+REPLAY_CHUNK = 500
+
+class Tick(NamedTuple):
+    """One price update for a ticker"""
+    ticker: str
+    price: float
+    volume: int
+    timestamp: float  # Unix seconds
+
+class TickBuffer:
+    """
+    Fixed-capacity ring buffer of a ticker's recent ticks
+
+    Prices, timestamps and volumes live in typed arrays (8 bytes each per
+    tick) rather than one Python object per tick.
+    """
+
+    def __init__(self, capacity: int = 256):
+        self.capacity = max(1, capacity)
+        self._prices = array('d', bytes(8 * self.capacity))
+        self._timestamps = array('d', bytes(8 * self.capacity))
+        self._volumes = array('q', bytes(8 * self.capacity))
+        self._next = 0
+        self._count = 0
+
+    def append(self, price: float, volume: int, timestamp: float):
+        index = self._next
+        self._prices[index] = price
+        self._timestamps[index] = timestamp
+        self._volumes[index] = volume
+        self._next = (index + 1) % self.capacity
+        self._count = min(self._count + 1, self.capacity)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def recent(self, ticker: str, limit: int = None) -> List[Tick]:
+        """Most recent ticks, oldest first"""
+        count = self._count if limit is None else max(0, min(limit, self._count))
+        start = (self._next - count) % self.capacity
+        return [Tick(ticker, self._prices[i], self._volumes[i], self._timestamps[i])
+                for i in ((start + offset) % self.capacity for offset in range(count))]
+
+class PriceFeedEngine:
+    """
+    Applies ticks from a source to per-ticker history and a latest-quote snapshot
+
+    The snapshot is a dict that is never modified once published: each
+    batch of ticks builds a new dict and swaps the reference, so readers
+    always see a complete snapshot without locking.
+    """
+
+    def __init__(self, source=None, history_size: int = 256, seed_prices: Dict[str, float] = None):
+        """
+        Args:
+            source: Object with batches(stop_event) yielding lists of Ticks (None = static prices)
+            history_size: Ticks kept per ticker
+            seed_prices: Initial ticker -> price quotes served until the first tick arrives
+        """
+        self.source = source
+        self.history_size = history_size
+
+        self._latest = {}    # ticker -> Tick, replaced wholesale
+        self._buffers = {}   # ticker -> TickBuffer
+        self._listeners = []
+        self._lock = threading.Lock()  # Serializes writers and history reads
+        self._stop = threading.Event()
+        self._thread = None
+
+        self.version = 0  # Bumped on every applied batch; changes whenever any price does
+        self._ticks = 0
+        self._errors = 0
+        self._last_tick_at = None
+
+        if seed_prices:
+            now = time.time()
+            self.apply([Tick(ticker, price, 0, now) for ticker, price in seed_prices.items()])
+
+    def start(self):
+        """Start consuming the source in a background thread"""
+        with self._lock:
+            if self.source is None or self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name='price-feed', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stop consuming the source"""
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                for batch in self.source.batches(self._stop):
+                    self.apply(batch)
+                    if self._stop.is_set():
+                        return
+                logging.info("📉 Price feed source finished")
+                return
+            except Exception as e:
+                with self._lock:
+                    self._errors += 1
+                logging.error(f"❌ Price feed source failed, retrying in {SOURCE_RETRY_SECONDS:.0f}s: {e}")
+                self._stop.wait(SOURCE_RETRY_SECONDS)
+
+    def add_listener(self, callback: Callable[[List[Tick]], None]):
+        """Call callback on the feed thread with the ticks that changed a price, after each batch"""
+        with self._lock:
+            self._listeners.append(callback)
+
+    def apply(self, ticks: List[Tick]):
+        """Record a batch of ticks and publish the new latest-quote snapshot"""
+        if not ticks:
+            return
+        changed = []
+        with self._lock:
+            latest = dict(self._latest)
+            for tick in ticks:
+                buffer = self._buffers.get(tick.ticker)
+                if buffer is None:
+                    buffer = self._buffers[tick.ticker] = TickBuffer(self.history_size)
+                buffer.append(tick.price, tick.volume, tick.timestamp)
+                previous = latest.get(tick.ticker)
+                if previous is None or previous.price != tick.price:
+                    changed.append(tick)
+                latest[tick.ticker] = tick
+            self._latest = latest
+            self.version += 1
+            self._ticks += len(ticks)
+            self._last_tick_at = time.time()
+            listeners = list(self._listeners)
+
+        if changed:
+            for listener in listeners:
+                try:
+                    listener(changed)
+                except Exception as e:
+                    logging.error(f"❌ Price feed listener failed: {e}")
+
+    def latest(self, ticker: str) -> Optional[Tick]:
+        """Latest tick for a ticker (lock-free)"""
+        return self._latest.get(ticker.upper())
+
+    def snapshot(self) -> Dict[str, Tick]:
+        """Latest tick for every ticker (lock-free; treat as read-only)"""
+        return self._latest
+
+    def quote(self, stock: Dict) -> Dict:
+        """A copy of a catalogue entry carrying its live price"""
+        tick = self._latest.get(stock['ticker'])
+        return {**stock, 'price': tick.price} if tick is not None else stock
+
+    def history(self, ticker: str, limit: int = None) -> List[Tick]:
+        """Recent ticks for a ticker, oldest first"""
+        ticker = ticker.upper()
+        with self._lock:
+            buffer = self._buffers.get(ticker)
+            return buffer.recent(ticker, limit) if buffer is not None else []
+
+    def get_stats(self) -> Dict:
+        """Get feed statistics"""
+        with self._lock:
+            return {
+                'source': type(self.source).__name__ if self.source is not None else 'static',
+                'running': self._thread is not None and self._thread.is_alive(),
+                'tickers': len(self._latest),
+                'ticks': self._ticks,
+                'version': self.version,
+                'errors': self._errors,
+                'history_size': self.history_size,
+                'last_tick_age_seconds': round(time.time() - self._last_tick_at, 1) if self._last_tick_at else None
+            }
+
+class MockFeedSource:
+    """
+    Random-walk ticks around the starting prices, for demos and load tests
+    """
+
+    def __init__(self, prices: Dict[str, float], interval: float = 1.0, volatility: float = 0.002,
+                 activity: float = 0.5):
+        """
+        Args:
+            prices: Starting ticker -> price
+            interval: Seconds between batches
+            volatility: Standard deviation of each relative price move
+            activity: Fraction of tickers that trade in each batch
+        """
+        self.prices = dict(prices)
+        self.interval = interval
+        self.volatility = volatility
+        self.activity = activity
+
+    def batches(self, stop: threading.Event) -> Iterator[List[Tick]]:
+        rng = random.Random()
+        while not stop.wait(self.interval):
+            yield self.step(rng)
+
+    def step(self, rng: random.Random) -> List[Tick]:
+        """Move the prices one interval and return the resulting ticks"""
+        now = time.time()
+        batch = []
+        for ticker, price in self.prices.items():
+            if rng.random() < self.activity:
+                price = self.prices[ticker] = max(0.01, round(price * (1 + rng.gauss(0, self.volatility)), 2))
+                batch.append(Tick(ticker, price, rng.randint(1, 50) * 100, now))
+        return batch
+
+class ReplayFeedSource:
+    """
+    Replays ticks from a CSV file with columns timestamp,ticker,price[,volume]
+
+    Timestamps may be Unix seconds or ISO 8601. The gaps between them are
+    replayed scaled by speed (2.0 = twice as fast, 0 = as fast as possible);
+    replayed ticks are stamped with the current time.
+    """
+
+    def __init__(self, path: str, speed: float = 1.0, loop: bool = True):
+        self.path = path
+        self.speed = speed
+        self.loop = loop
+
+    @staticmethod
+    def _parse_time(value: str) -> float:
+        try:
+            return float(value)
+        except ValueError:
+            return datetime.fromisoformat(value).timestamp()
+
+    def _rows(self) -> Iterator[tuple]:
+        with open(self.path, newline='') as f:
+            for row in csv.DictReader(f):
+                yield (self._parse_time(row['timestamp']), row['ticker'].strip().upper(),
+                       float(row['price']), int(float(row.get('volume') or 0)))
+
+    def batches(self, stop: threading.Event) -> Iterator[List[Tick]]:
+        while not stop.is_set():
+            batch, batch_time = [], None
+            for recorded_at, ticker, price, volume in self._rows():
+                # Ticks recorded at the same moment are published together; unpaced
+                # replays publish fixed-size chunks so each snapshot swap covers many ticks
+                flush = len(batch) >= REPLAY_CHUNK if self.speed <= 0 else (batch and recorded_at != batch_time)
+                if flush:
+                    yield batch
+                    if self.speed > 0 and stop.wait(max(0.0, recorded_at - batch_time) / self.speed):
+                        return
+                    batch = []
+                batch_time = recorded_at
+                batch.append(Tick(ticker, price, volume, time.time()))
+            if batch:
+                yield batch
+            if not self.loop:
+                return
+
+class HTTPFeedSource:
+    """
+    Polls a JSON quotes endpoint returning [{"ticker", "price", "volume"?}, ...]
+    (or {"quotes": [...]}) and emits ticks for prices that changed
+    """
+
+    def __init__(self, url: str, interval: float = 1.0, timeout: float = 5.0):
+        self.url = url
+        self.interval = interval
+        self.timeout = timeout
+
+    def batches(self, stop: threading.Event) -> Iterator[List[Tick]]:
+        import requests
+        session = requests.Session()
+        last_prices = {}
+        while not stop.is_set():
+            response = session.get(self.url, timeout=self.timeout)
+            response.raise_for_status()
+            payload = response.json()
+            quotes = payload.get('quotes', []) if isinstance(payload, dict) else payload
+
+            now = time.time()
+            batch = []
+            for quote in quotes:
+                ticker, price = quote['ticker'].upper(), float(quote['price'])
+                if last_prices.get(ticker) != price:
+                    last_prices[ticker] = price
+                    batch.append(Tick(ticker, price, int(quote.get('volume') or 0), now))
+            yield batch
+            stop.wait(self.interval)
+
+def create_price_feed(stocks: List[Dict]) -> PriceFeedEngine:
+    """
+    Create and start the price feed selected by PRICE_FEED_SOURCE
+
+    Args:
+        stocks: Catalogue entries whose prices seed the feed
+
+    Returns:
+        Running PriceFeedEngine ('static' serves the catalogue prices unchanged)
+    """
+    kind = os.getenv('PRICE_FEED_SOURCE', 'static').lower()
+    interval = float(os.getenv('PRICE_FEED_INTERVAL_SECONDS', 1))
+    prices = {stock['ticker']: stock['price'] for stock in stocks}
+
+    if kind == 'static':
+        source = None
+    elif kind == 'mock':
+        source = MockFeedSource(prices, interval=interval,
+                                volatility=float(os.getenv('PRICE_FEED_MOCK_VOLATILITY', 0.002)))
+    elif kind == 'replay':
+        source = ReplayFeedSource(os.getenv('PRICE_FEED_REPLAY_PATH', 'ticks.csv'),
+                                  speed=float(os.getenv('PRICE_FEED_REPLAY_SPEED', 1)),
+                                  loop=os.getenv('PRICE_FEED_REPLAY_LOOP', 'true').lower() == 'true')
+    elif kind == 'http':
+        source = HTTPFeedSource(os.getenv('PRICE_FEED_URL', 'http://localhost:9000/quotes'), interval=interval)
+    else:
+        raise ValueError(f"Unknown price feed source: {kind}")
+
+    engine = PriceFeedEngine(source, history_size=int(os.getenv('PRICE_FEED_HISTORY', 256)), seed_prices=prices)
+    engine.start()
+    logging.info(f"💹 Price feed ready - source: {kind}, {len(prices)} tickers")
+    return engine
+
+def main():
+    """Record a mock random-walk session to a CSV file for ReplayFeedSource"""
+    from stocks import kenya_stocks
+
+    parser = argparse.ArgumentParser(description='Record mock NSE ticks for replay')
+    parser.add_argument('output', help='CSV file to write')
+    parser.add_argument('--minutes', type=float, default=60, help='Trading time to simulate')
+    parser.add_argument('--interval', type=float, default=1.0, help='Seconds between ticks')
+    parser.add_argument('--volatility', type=float, default=0.002, help='Relative price move per tick')
+    args = parser.parse_args()
+
+    source = MockFeedSource({s['ticker']: s['price'] for s in kenya_stocks}, volatility=args.volatility)
+    rng = random.Random(42)
+    start = time.time()
+    steps = int(args.minutes * 60 / args.interval)
+    with open(args.output, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['timestamp', 'ticker', 'price', 'volume'])
+        for step in range(steps):
+            recorded_at = round(start + step * args.interval, 3)
+            for tick in source.step(rng):
+                writer.writerow([recorded_at, tick.ticker, f"{tick.price:.2f}", tick.volume])
+    print(f"Recorded {steps} intervals for {len(source.prices)} tickers to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+"""
+Quote Stream Module
+Fans live quote changes out to Server-Sent Event subscribers. The price feed
+thread is the only publisher: each changed quote is serialized once and
+appended to per-subscriber bounded queues, so a slow client loses its oldest
+updates instead of growing memory or holding up the feed.
+
+Publishing costs nothing per idle subscriber, but each open stream is still
+served by its own request thread (blocked in QuoteSubscription.get), so the
+number of concurrent streams is bounded by the gunicorn thread pool.
+"""
+
+import os
+import logging
+import threading
+from collections import defaultdict, deque
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from price_feed import PriceFeedEngine, Tick
+from json_provider import dumps
+
+def format_quote(tick: Tick) -> str:
+    """Serialize a tick as a 'quote' server-sent event"""
+    payload = {
+        'ticker': tick.ticker,
+        'price': tick.price,
+        'volume': tick.volume,
+        'time': datetime.fromtimestamp(tick.timestamp).isoformat()
+    }
+    return f"event: quote\ndata: {dumps(payload)}\n\n"
+
+class QuoteSubscription:
+    """
+    One subscriber's queue of pending quote events
+    """
+
+    def __init__(self, broadcaster: 'QuoteBroadcaster', tickers: Optional[frozenset], queue_size: int):
+        """
+        Args:
+            broadcaster: Broadcaster the subscription belongs to
+            tickers: Tickers to receive (None for all)
+            queue_size: Pending events kept before the oldest are dropped
+        """
+        self.tickers = tickers
+        self.dropped = 0
+        self.delivered = 0
+        self._broadcaster = broadcaster
+        self._queue = deque(maxlen=queue_size)
+        self._ready = threading.Event()
+
+    def _push(self, frame: str):
+        """Queue an event (publisher side; the deque discards the oldest when full)"""
+        if len(self._queue) == self._queue.maxlen:
+            self.dropped += 1
+        self._queue.append(frame)
+
+    def _push_many(self, frames: List[str]):
+        overflow = len(self._queue) + len(frames) - self._queue.maxlen
+        if overflow > 0:
+            self.dropped += overflow
+        self._queue.extend(frames)
+
+    def get(self, timeout: float) -> List[str]:
+        """
+        Wait for quote events
+
+        Args:
+            timeout: Seconds to wait when nothing is pending
+
+        Returns:
+            All pending SSE frames, oldest first (empty on timeout)
+        """
+        if not self._queue:
+            self._ready.wait(timeout)
+        # Clear before draining: a push after this point sets the event again
+        self._ready.clear()
+        frames = []
+        while True:
+            try:
+                frames.append(self._queue.popleft())
+            except IndexError:
+                break
+        self.delivered += len(frames)
+        return frames
+
+    def close(self):
+        """Stop receiving quotes"""
+        self._broadcaster.unsubscribe(self)
+
+class QuoteBroadcaster:
+    """
+    Single publisher fanning changed quotes out to subscriber queues
+
+    Subscribers are indexed by ticker, so a quote only touches the queues
+    that asked for it. Subscribers hold no thread of their own; the
+    request handler waits on its subscription between writes.
+    """
+
+    def __init__(self, engine: PriceFeedEngine, max_subscribers: int = 5000, queue_size: int = 100):
+        """
+        Args:
+            engine: Price feed to publish from
+            max_subscribers: Open subscriptions allowed before new ones are refused
+            queue_size: Pending events per subscriber before the oldest are dropped
+        """
+        self.engine = engine
+        self.max_subscribers = max_subscribers
+        self.queue_size = queue_size
+
+        self._subscriptions = set()
+        self._by_ticker = defaultdict(set)  # ticker -> subscriptions
+        self._everything = set()            # subscriptions to all tickers
+        self._lock = threading.Lock()
+
+        self._published = 0
+        self._wakeups = 0
+        self._rejected = 0
+
+        engine.add_listener(self.publish)
+
+    def subscribe(self, tickers: Iterable[str] = None) -> Optional[QuoteSubscription]:
+        """
+        Open a subscription
+
+        Args:
+            tickers: Tickers to receive (None or empty for all)
+
+        Returns:
+            QuoteSubscription, or None when max_subscribers are already open
+        """
+        tickers = frozenset(t.upper() for t in tickers) if tickers else None
+        with self._lock:
+            if len(self._subscriptions) >= self.max_subscribers:
+                self._rejected += 1
+                return None
+            subscription = QuoteSubscription(self, tickers, self.queue_size)
+            if tickers is None:
+                self._everything.add(subscription)
+            else:
+                for ticker in tickers:
+                    self._by_ticker[ticker].add(subscription)
+            self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: QuoteSubscription):
+        """Remove a subscription (safe to call more than once)"""
+        with self._lock:
+            if subscription not in self._subscriptions:
+                return
+            self._subscriptions.discard(subscription)
+            if subscription.tickers is None:
+                self._everything.discard(subscription)
+                return
+            for ticker in subscription.tickers:
+                subscribers = self._by_ticker[ticker]
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._by_ticker[ticker]
+
+    def publish(self, ticks: List[Tick]):
+        """Fan changed ticks out to their subscribers (price feed listener)"""
+        # Only the newest quote per ticker in a batch is worth sending
+        frames = {tick.ticker: format_quote(tick) for tick in ticks}
+
+        woken = set()
+        with self._lock:
+            for ticker, frame in frames.items():
+                subscribers = self._by_ticker.get(ticker)
+                if subscribers:
+                    for subscription in subscribers:
+                        subscription._push(frame)
+                    woken.update(subscribers)
+            if self._everything:
+                batch = list(frames.values())
+                for subscription in self._everything:
+                    subscription._push_many(batch)
+                woken.update(self._everything)
+            self._published += len(frames)
+            self._wakeups += len(woken)
+
+        for subscription in woken:
+            subscription._ready.set()
+
+    def snapshot(self, tickers: Iterable[str] = None) -> List[str]:
+        """Current quotes as SSE frames, for a new subscriber's first write"""
+        latest = self.engine.snapshot()
+        wanted = [t.upper() for t in tickers] if tickers else list(latest)
+        return [format_quote(latest[ticker]) for ticker in wanted if ticker in latest]
+
+    def get_stats(self) -> Dict:
+        """Get fan-out statistics"""
+        with self._lock:
+            return {
+                'subscribers': len(self._subscriptions),
+                'max_subscribers': self.max_subscribers,
+                'queue_size': self.queue_size,
+                'quotes_published': self._published,
+                'subscriber_wakeups': self._wakeups,
+                'rejected': self._rejected
+            }
+
+def create_quote_broadcaster(engine: PriceFeedEngine) -> QuoteBroadcaster:
+    """Create the quote broadcaster from QUOTE_STREAM_* settings"""
+    broadcaster = QuoteBroadcaster(
+        engine,
+        max_subscribers=int(os.getenv('QUOTE_STREAM_MAX_SUBSCRIBERS', 5000)),
+        queue_size=int(os.getenv('QUOTE_STREAM_QUEUE_SIZE', 100))
+    )
+    logging.info(f"📡 Quote stream ready - up to {broadcaster.max_subscribers} subscribers, "
+                 f"{broadcaster.queue_size} queued quotes each")
+    return broadcaster
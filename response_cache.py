@@ -0,0 +1,136 @@
+"""
+Chat Response Cache Module
+Caches Bedrock replies for repeated FAQ-style questions so identical turns
+skip the model call. Entries are keyed on the persona, the normalized
+message and a short tail of the conversation, and are bounded by TTL and
+LRU eviction.
+"""
+
+import os
+import re
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional
+
+from json_provider import dumps_bytes
+
+_WHITESPACE = re.compile(r'\s+')
+
+def normalize_message(message: str) -> str:
+    """Normalize a message so trivially different phrasings share a cache entry"""
+    return _WHITESPACE.sub(' ', message.lower()).strip(' ?!.,')
+
+class ResponseCache:
+    """
+    In-process LRU cache of chat replies with a per-entry TTL
+
+    Each worker process keeps its own cache; a miss only costs the model
+    call that would have happened anyway.
+    """
+
+    def __init__(self, max_entries: int = 1000, ttl_seconds: float = 600, history_turns: int = 1,
+                 excluded_personas: Iterable[str] = ()):
+        """
+        Args:
+            max_entries: Replies kept before the least recently used is evicted
+            ttl_seconds: Age after which a cached reply is discarded
+            history_turns: Recent user/assistant turns included in the key (0 ignores history)
+            excluded_personas: Persona names (lowercase) whose replies are never cached
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.history_turns = history_turns
+        self.excluded_personas = {name.strip().lower() for name in excluded_personas if name.strip()}
+
+        self._entries = OrderedDict()  # key -> (reply, stored_at)
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._bypassed = 0
+        self._evicted = 0
+        self._expired = 0
+
+    def caches(self, persona: str) -> bool:
+        """Check whether replies for a persona may be cached"""
+        if persona.lower() in self.excluded_personas:
+            with self._lock:
+                self._bypassed += 1
+            return False
+        return True
+
+    def make_key(self, session: Dict, message: str) -> str:
+        """
+        Build the cache key for the next turn of a session
+
+        Args:
+            session: Session dict with 'persona_instruction' and 'history'
+            message: The new user message
+        """
+        history = session['history'][-2 * self.history_turns:] if self.history_turns > 0 else []
+        material = dumps_bytes([
+            session['persona_instruction'],
+            [normalize_message(turn['content'][0]['text']) for turn in history],
+            normalize_message(message)
+        ])
+        return hashlib.sha256(material).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Look up a cached reply"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[1] >= self.ttl_seconds:
+                del self._entries[key]
+                self._expired += 1
+                entry = None
+            if entry is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry[0]
+
+    def put(self, key: str, reply: str):
+        """Cache a reply, evicting the least recently used entries beyond max_entries"""
+        with self._lock:
+            self._entries[key] = (reply, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._evicted += 1
+
+    def clear(self):
+        """Drop every cached reply"""
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict:
+        """Get cache statistics"""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl_seconds,
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_rate': round(self._hits / lookups, 3) if lookups else 0.0,
+                'bypassed': self._bypassed,
+                'evicted': self._evicted,
+                'expired': self._expired,
+                'excluded_personas': sorted(self.excluded_personas)
+            }
+
+def create_response_cache() -> Optional[ResponseCache]:
+    """Create the chat response cache from CHAT_CACHE_* settings (None when disabled)"""
+    if os.getenv('CHAT_CACHE_ENABLED', 'true').lower() != 'true':
+        return None
+    return ResponseCache(
+        max_entries=int(os.getenv('CHAT_CACHE_MAX_ENTRIES', 1000)),
+        ttl_seconds=float(os.getenv('CHAT_CACHE_TTL_MINUTES', 10)) * 60,
+        history_turns=int(os.getenv('CHAT_CACHE_HISTORY_TURNS', 1)),
+        # Price estimates go stale quickly, so the stock trader is not cached by default
+        excluded_personas=os.getenv('CHAT_CACHE_EXCLUDE_PERSONAS', 'stock trader').split(',')
+    )
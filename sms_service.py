@@ -5,34 +5,94 @@ delivery reports, and integration with the main application.
 """
 
 import os
+import atexit
+import heapq
+import itertools
 import logging
-import requests
+import queue
+import random
+import threading
+import time
 import json
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional
 import uuid
 
+from africastalking_client import AfricasTalkingConfig, create_transport, is_retryable_error
+from utils import LazyService
+
 class AfricasTalkingSMS:
     """
     AfricasTalking SMS API wrapper for sending SMS messages
     """
     
-    def __init__(self):
-        self.username = os.getenv('AFRICASTALKING_USERNAME', 'sandbox')
-        self.api_key = os.getenv('AFRICASTALKING_API_KEY', 'your_api_key_here')
-        self.base_url = "https://api.sandbox.africastalking.com/version1/messaging"
+    # Recipient status codes AfricasTalking reports for accepted messages
+    SUCCESS_STATUS_CODES = (100, 101, 102)
+    
+    # Recipient failures that may succeed later (InternalServerError, GatewayError);
+    # the rest - InvalidPhoneNumber, UserInBlacklist, InsufficientBalance... - are permanent
+    RETRYABLE_STATUS_CODES = (500, 501)
+    
+    def __init__(self, config: AfricasTalkingConfig = None, transport=None):
+        self.config = config or AfricasTalkingConfig()
+        self.username = self.config.username
+        self.api_key = self.config.api_key
+        self.base_url = f"{self.config.base_url}/messaging"
         
-        # For production, use: https://api.africastalking.com/version1/messaging
-        if self.username != 'sandbox':
-            self.base_url = "https://api.africastalking.com/version1/messaging"
-            
-        self.headers = {
-            'Accept': 'application/json',
-            'Content-Type': 'application/x-www-form-urlencoded',
-            'apiKey': self.api_key
-        }
+        # Pooled HTTP session or in-process fake, per AFRICASTALKING_TRANSPORT
+        self.transport = transport or create_transport(self.config)
         
-        logging.info(f"AfricasTalking SMS initialized - Username: {self.username}")
+        # Recipients per multi-recipient bulk request
+        self.bulk_chunk_size = int(os.getenv('AFRICASTALKING_BULK_CHUNK_SIZE', 100))
+        
+        logging.info(f"AfricasTalking SMS initialized - Username: {self.username}, Transport: {self.transport.name}")
+    
+    @staticmethod
+    def _normalize_number(to: str) -> str:
+        """Ensure phone number is in international format"""
+        if not to.startswith('+'):
+            if to.startswith('0'):
+                return '+254' + to[1:]  # Convert Kenyan number
+            elif to.startswith('254'):
+                return '+' + to
+            else:
+                return '+254' + to
+        return to
+    
+    def _post_messaging(self, payload: Dict) -> Dict:
+        """
+        POST to the messaging endpoint and return the decoded response
+        
+        The `to` field may hold a comma-separated list of recipients.
+        """
+        return self.transport.request('POST', self.base_url, payload)
+    
+    def _parse_recipients(self, api_response: Dict) -> Dict[str, Dict]:
+        """Turn the Recipients array into per-number send results"""
+        results = {}
+        for recipient in api_response.get('SMSMessageData', {}).get('Recipients', []):
+            number = recipient.get('number')
+            if recipient.get('statusCode') in self.SUCCESS_STATUS_CODES:
+                results[number] = {
+                    'success': True,
+                    'message_id': recipient.get('messageId'),
+                    'status': 'sent',
+                    'cost': recipient.get('cost'),
+                    'recipient': number,
+                    'delivery_status': 'pending',
+                    'api_response': recipient
+                }
+            else:
+                results[number] = {
+                    'success': False,
+                    'error': recipient.get('status', 'Rejected'),
+                    'status': 'failed',
+                    'recipient': number,
+                    'retryable': recipient.get('statusCode') in self.RETRYABLE_STATUS_CODES,
+                    'api_response': recipient
+                }
+        return results
         
     def send_sms(self, to: str, message: str, sender_id: str = None) -> Dict:
         """
@@ -47,58 +107,12 @@ class AfricasTalkingSMS:
             Dict with status, message_id, cost, and delivery info
         """
         try:
-            # Ensure phone number is in correct format
-            if not to.startswith('+'):
-                if to.startswith('0'):
-                    to = '+254' + to[1:]  # Convert Kenyan number
-                elif to.startswith('254'):
-                    to = '+' + to
-                else:
-                    to = '+254' + to
-                    
-            payload = {
-                'username': self.username,
-                'to': to,
-                'message': message
-            }
-            
-            if sender_id:
-                payload['from'] = sender_id
+            to = self._normalize_number(to)
+            payload = self._build_payload(to, message, sender_id)
                 
             logging.info(f"Sending SMS to {to}: {message[:50]}...")
             
-            # Simulate API response for demo purposes
-            # In real implementation, you would make actual HTTP request:
-            # response = requests.post(f"{self.base_url}", headers=self.headers, data=payload)
-            
-            # Simulated successful response
-            message_id = f"ATXid_{uuid.uuid4().hex[:16]}"
-            cost = "KES 1.00"  # Standard SMS cost
-            
-            simulated_response = {
-                'SMSMessageData': {
-                    'Message': 'Sent to 1/1 Total Cost: ' + cost,
-                    'Recipients': [{
-                        'statusCode': 101,  # Success status
-                        'number': to,
-                        'status': 'Success',
-                        'cost': cost,
-                        'messageId': message_id
-                    }]
-                }
-            }
-            
-            logging.info(f"SMS sent successfully to {to} - Message ID: {message_id}")
-            
-            return {
-                'success': True,
-                'message_id': message_id,
-                'status': 'sent',
-                'cost': cost,
-                'recipient': to,
-                'delivery_status': 'pending',
-                'api_response': simulated_response
-            }
+            return self._send_result(to, self._post_messaging(payload))
             
         except Exception as e:
             logging.error(f"Failed to send SMS to {to}: {str(e)}")
@@ -106,9 +120,84 @@ class AfricasTalkingSMS:
                 'success': False,
                 'error': str(e),
                 'status': 'failed',
-                'recipient': to
+                'recipient': to,
+                'retryable': is_retryable_error(e)
             }
     
+    def _build_payload(self, to: str, message: str, sender_id: str = None) -> Dict:
+        """Build the messaging form payload for one or more recipients"""
+        payload = {
+            'username': self.username,
+            'to': to,
+            'message': message
+        }
+        
+        if sender_id:
+            payload['from'] = sender_id
+        
+        return payload
+    
+    def _send_result(self, to: str, api_response: Dict) -> Dict:
+        """Turn a single-recipient messaging response into a send result"""
+        result = self._parse_recipients(api_response).get(to) or {
+            'success': False,
+            'error': api_response.get('SMSMessageData', {}).get('Message', 'No recipient in response'),
+            'status': 'failed',
+            'recipient': to
+        }
+        result['api_response'] = api_response
+        
+        if result['success']:
+            logging.info(f"SMS sent successfully to {to} - Message ID: {result['message_id']}")
+        else:
+            logging.warning(f"SMS to {to} rejected: {result['error']}")
+        
+        return result
+    
+    def send_bulk_messages(self, messages: List[Dict]) -> List[Dict]:
+        """
+        Send many messages using multi-recipient requests
+        
+        Messages sharing the same text and sender ID are grouped and sent in
+        chunks of `bulk_chunk_size` recipients per request.
+        
+        Args:
+            messages: Dicts with 'to', 'message' and optional 'sender_id'
+            
+        Returns:
+            One result per input message, in input order
+        """
+        results = [None] * len(messages)
+        groups = OrderedDict()
+        for position, item in enumerate(messages):
+            key = (item['message'], item.get('sender_id'))
+            groups.setdefault(key, []).append((position, self._normalize_number(item['to'])))
+        
+        for (message, sender_id), members in groups.items():
+            for start in range(0, len(members), self.bulk_chunk_size):
+                chunk = members[start:start + self.bulk_chunk_size]
+                payload = self._build_payload(','.join(number for _, number in chunk), message, sender_id)
+                
+                try:
+                    logging.info(f"Sending bulk SMS to {len(chunk)} recipients: {message[:50]}...")
+                    parsed = self._parse_recipients(self._post_messaging(payload))
+                except Exception as e:
+                    logging.error(f"Bulk SMS request failed for {len(chunk)} recipients: {e}")
+                    parsed = {}
+                    error = str(e)
+                else:
+                    error = 'No result for recipient in response'
+                
+                for position, number in chunk:
+                    results[position] = parsed.get(number) or {
+                        'success': False,
+                        'error': error,
+                        'status': 'failed',
+                        'recipient': number
+                    }
+        
+        return results
+    
     def send_bulk_sms(self, recipients: List[str], message: str, sender_id: str = None) -> List[Dict]:
         """
         Send SMS to multiple recipients
@@ -121,13 +210,10 @@ class AfricasTalkingSMS:
         Returns:
             List of delivery results for each recipient
         """
-        results = []
-        
-        for recipient in recipients:
-            result = self.send_sms(recipient, message, sender_id)
-            results.append(result)
-            
-        return results
+        return self.send_bulk_messages([
+            {'to': recipient, 'message': message, 'sender_id': sender_id}
+            for recipient in recipients
+        ])
     
     def get_delivery_reports(self, message_id: str) -> Dict:
         """
@@ -213,6 +299,254 @@ class SMSTemplates:
             f"Transaction cost, Ksh0.00."
         )
 
+class SMSDispatchHandle:
+    """
+    Pollable handle for an SMS queued on the dispatch queue
+    """
+    
+    def __init__(self, message_type: str, recipient: str):
+        self.dispatch_id = f"SMSQ_{uuid.uuid4().hex[:12]}"
+        self.message_type = message_type
+        self.recipient = recipient
+        self.status = 'queued'  # queued, sending, retrying, sent, failed, rejected
+        self.attempts = 0
+        self.result = None
+        self.created_at = datetime.now().isoformat()
+        self.completed_at = None
+        self._done = threading.Event()
+    
+    def done(self) -> bool:
+        """Check whether sending has finished (successfully or not)"""
+        return self._done.is_set()
+    
+    def wait(self, timeout: float = None) -> Optional[Dict]:
+        """Block until sending finishes and return the send result"""
+        self._done.wait(timeout)
+        return self.result
+    
+    def _finish(self, status: str, result: Dict):
+        self.status = status
+        self.result = result
+        self.completed_at = datetime.now().isoformat()
+        self._done.set()
+    
+    def to_dict(self) -> Dict:
+        """Serialize the handle for API responses"""
+        return {
+            'dispatch_id': self.dispatch_id,
+            'type': self.message_type,
+            'recipient': self.recipient,
+            'status': self.status,
+            'queued': True,
+            'success': self.result.get('success') if self.result else None,
+            'attempts': self.attempts,
+            'message_id': self.result.get('message_id') if self.result else None,
+            'error': self.result.get('error') if self.result else None,
+            'created_at': self.created_at,
+            'completed_at': self.completed_at
+        }
+
+class SMSDispatchQueue:
+    """
+    Bounded in-process queue drained by a pool of SMS sender threads
+    
+    Submitting never blocks for longer than `enqueue_timeout`: when the queue
+    is full the handle is returned already rejected. Sends that fail with a
+    retryable error (result['retryable']) are put back on the queue after a
+    jittered exponential backoff; the wait happens on a timer thread, never
+    on a sender thread. Permanent failures finish immediately.
+    """
+    
+    def __init__(self, send_func: Callable[..., Dict], workers: int = 4, max_queue_size: int = 1000,
+                 max_retries: int = 3, retry_delay: float = 1.0, enqueue_timeout: float = 0.5,
+                 max_tracked_handles: int = 10000):
+        """
+        Args:
+            send_func: Callable performing one send attempt and returning a result dict
+            workers: Number of sender threads
+            max_queue_size: Queued messages before submissions are rejected
+            max_retries: Retries after the first failed attempt
+            retry_delay: Base backoff delay in seconds
+            enqueue_timeout: Seconds to wait for queue space before rejecting
+            max_tracked_handles: Completed handles kept for status polling
+        """
+        self.send_func = send_func
+        self.workers = workers
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.enqueue_timeout = enqueue_timeout
+        self.max_tracked_handles = max_tracked_handles
+        
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._handles = OrderedDict()
+        self._handles_lock = threading.Lock()
+        self._threads = []
+        self._threads_lock = threading.Lock()
+        self._stopping = False
+        
+        # Sends waiting out their backoff: heap of (due, sequence, item)
+        self._retries = []
+        self._retries_cond = threading.Condition()
+        self._retry_thread = None
+        self._retry_sequence = itertools.count()
+        self._delayed = 0  # scheduled and not yet back on the queue
+    
+    def _ensure_workers(self):
+        """Start sender threads on first use"""
+        if self._threads:
+            return
+        with self._threads_lock:
+            if self._threads:
+                return
+            self._stopping = False
+            for index in range(self.workers):
+                thread = threading.Thread(target=self._worker_loop, name=f"sms-dispatch-{index}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+    
+    def _track(self, handle: SMSDispatchHandle):
+        with self._handles_lock:
+            self._handles[handle.dispatch_id] = handle
+            while len(self._handles) > self.max_tracked_handles:
+                self._handles.popitem(last=False)
+    
+    def submit(self, message_type: str, recipient: str, *send_args,
+               on_complete: Callable[[SMSDispatchHandle], None] = None, **send_kwargs) -> SMSDispatchHandle:
+        """
+        Queue an SMS for background delivery
+        
+        Args:
+            message_type: Label used in handles and logs
+            recipient: Recipient phone number
+            send_args/send_kwargs: Passed to send_func after the recipient
+            on_complete: Optional callback run on the sender thread when done
+            
+        Returns:
+            Handle to poll for the delivery outcome
+        """
+        handle = SMSDispatchHandle(message_type, recipient)
+        self._track(handle)
+        self._ensure_workers()
+        
+        try:
+            self._queue.put((handle, (recipient,) + send_args, send_kwargs, on_complete),
+                            timeout=self.enqueue_timeout)
+        except queue.Full:
+            logging.warning(f"SMS dispatch queue full - rejecting {message_type} SMS to {recipient}")
+            handle._finish('rejected', {
+                'success': False,
+                'error': 'SMS dispatch queue is full',
+                'status': 'rejected',
+                'recipient': recipient
+            })
+        
+        return handle
+    
+    def get_handle(self, dispatch_id: str) -> Optional[SMSDispatchHandle]:
+        """Look up a handle by dispatch ID"""
+        with self._handles_lock:
+            return self._handles.get(dispatch_id)
+    
+    def _backoff(self, attempt: int) -> float:
+        """Exponential backoff with full jitter around the base delay"""
+        return self.retry_delay * (2 ** (attempt - 1)) * random.uniform(0.5, 1.5)
+    
+    def _worker_loop(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                self._queue.task_done()
+                return
+            
+            handle, args, kwargs, on_complete = item
+            try:
+                if self._deliver(handle, args, kwargs):
+                    if on_complete:
+                        on_complete(handle)
+                else:
+                    delay = self._backoff(handle.attempts)
+                    logging.warning(f"SMS {handle.dispatch_id} attempt {handle.attempts} failed, retrying in {delay:.2f}s")
+                    self._schedule_retry(item, delay)
+            except Exception as e:
+                logging.error(f"SMS dispatch callback failed for {handle.dispatch_id}: {e}")
+            finally:
+                self._queue.task_done()
+    
+    def _deliver(self, handle: SMSDispatchHandle, args: tuple, kwargs: Dict) -> bool:
+        """
+        Make one send attempt
+        
+        Returns:
+            True when the handle is finished, False when the send should be retried
+        """
+        handle.attempts += 1
+        handle.status = 'sending'
+        try:
+            result = self.send_func(*args, **kwargs)
+        except Exception as e:
+            result = {'success': False, 'error': str(e), 'status': 'failed', 'recipient': handle.recipient,
+                      'retryable': is_retryable_error(e)}
+        
+        if (result.get('success') or not result.get('retryable') or
+                handle.attempts > self.max_retries or self._stopping):
+            handle._finish('sent' if result.get('success') else 'failed', result)
+            return True
+        
+        handle.status = 'retrying'
+        return False
+    
+    def _schedule_retry(self, item: tuple, delay: float):
+        """Put a send back on the queue once its backoff has passed"""
+        with self._retries_cond:
+            heapq.heappush(self._retries, (time.monotonic() + delay, next(self._retry_sequence), item))
+            self._delayed += 1
+            if self._retry_thread is None:
+                self._retry_thread = threading.Thread(target=self._retry_loop, name="sms-retry", daemon=True)
+                self._retry_thread.start()
+            self._retries_cond.notify()
+    
+    def _retry_loop(self):
+        while True:
+            with self._retries_cond:
+                while not self._retries or self._retries[0][0] > time.monotonic():
+                    self._retries_cond.wait(self._retries[0][0] - time.monotonic() if self._retries else None)
+                _, _, item = heapq.heappop(self._retries)
+            
+            # Outside the condition: a full queue must not stop senders from scheduling retries
+            self._queue.put(item)
+            with self._retries_cond:
+                self._delayed -= 1
+    
+    def pending(self) -> int:
+        """Number of messages waiting, in flight or waiting to be retried"""
+        return self._queue.unfinished_tasks + self._delayed
+    
+    def flush(self, timeout: float = 30.0) -> bool:
+        """
+        Wait for queued messages to be delivered
+        
+        Returns:
+            True if the queue drained before the timeout
+        """
+        deadline = time.monotonic() + timeout
+        while self.pending():
+            if time.monotonic() >= deadline:
+                logging.warning(f"SMS dispatch flush timed out with {self.pending()} message(s) pending")
+                return False
+            time.sleep(0.05)
+        return True
+    
+    def shutdown(self, timeout: float = 30.0):
+        """Flush pending messages and stop the sender threads"""
+        self.flush(timeout)
+        self._stopping = True
+        with self._threads_lock:
+            for _ in self._threads:
+                self._queue.put(None)
+            for thread in self._threads:
+                thread.join(timeout=1.0)
+            self._threads = []
+
 class SMSNotificationService:
     """
     High-level SMS notification service that integrates with the main app
@@ -222,31 +556,70 @@ class SMSNotificationService:
         self.sms_client = AfricasTalkingSMS()
         self.message_log = []  # Store sent messages for tracking
         
-    def notify_stock_purchase(self, recipient_phone: str, stock_name: str, 
-                            quantity: int, price: float, transaction_id: str) -> Dict:
-        """
-        Send stock purchase confirmation SMS
-        """
-        message = SMSTemplates.stock_purchase_confirmation(
-            stock_name, quantity, price, transaction_id
+        # Background delivery honours the AfricasTalking retry policy
+        at_config = self.sms_client.config
+        self.dispatcher = SMSDispatchQueue(
+            self.sms_client.send_sms,
+            workers=int(os.getenv('SMS_DISPATCH_WORKERS', 4)),
+            max_queue_size=int(os.getenv('SMS_DISPATCH_QUEUE_SIZE', 1000)),
+            max_retries=at_config.max_retries,
+            retry_delay=at_config.retry_delay
         )
+        atexit.register(self.dispatcher.shutdown)
         
-        result = self.sms_client.send_sms(recipient_phone, message, sender_id="STOCKS")
-        
-        # Log the message
+        # Concurrent per-message sender for bulk bursts, started on first use
+        self._async_sender = None
+        self._async_lock = threading.Lock()
+    
+    def _log_message(self, message_type: str, recipient_phone: str, message: str, result: Dict):
+        """Record a finished message in the message log"""
         self.message_log.append({
-            'type': 'stock_purchase',
+            'type': message_type,
             'recipient': recipient_phone,
             'message': message,
             'result': result,
             'timestamp': datetime.now().isoformat()
         })
+    
+    def _send(self, message_type: str, recipient_phone: str, message: str,
+              sender_id: str, background: bool) -> Dict:
+        """
+        Send a message now, or queue it when background is set
         
-        logging.info(f"Stock purchase SMS sent to {recipient_phone} - Success: {result['success']}")
+        Background sends return the dispatch handle as a dict right away;
+        poll it with get_dispatch_status().
+        """
+        if background:
+            handle = self.dispatcher.submit(
+                message_type, recipient_phone, message, sender_id,
+                on_complete=lambda h: self._log_message(message_type, recipient_phone, message, h.result)
+            )
+            logging.info(f"{message_type} SMS to {recipient_phone} queued - Dispatch ID: {handle.dispatch_id}")
+            return handle.to_dict()
+        
+        result = self.sms_client.send_sms(recipient_phone, message, sender_id=sender_id)
+        self._log_message(message_type, recipient_phone, message, result)
+        return result
+    
+    def notify_stock_purchase(self, recipient_phone: str, stock_name: str, 
+                            quantity: int, price: float, transaction_id: str,
+                            background: bool = False) -> Dict:
+        """
+        Send stock purchase confirmation SMS
+        """
+        message = SMSTemplates.stock_purchase_confirmation(
+            stock_name, quantity, price, transaction_id
+        )
+        
+        result = self._send('stock_purchase', recipient_phone, message, "STOCKS", background)
+        
+        if not background:
+            logging.info(f"Stock purchase SMS sent to {recipient_phone} - Success: {result['success']}")
         return result
     
     def notify_token_transfer(self, recipient_phone: str, amount: int, 
-                           recipient_account: str, transaction_id: str) -> Dict:
+                           recipient_account: str, transaction_id: str,
+                           background: bool = False) -> Dict:
         """
         Send token transfer notification SMS
         """
@@ -254,22 +627,15 @@ class SMSNotificationService:
             amount, recipient_account, transaction_id
         )
         
-        result = self.sms_client.send_sms(recipient_phone, message, sender_id="HBAR")
-        
-        # Log the message
-        self.message_log.append({
-            'type': 'token_transfer',
-            'recipient': recipient_phone,
-            'message': message,
-            'result': result,
-            'timestamp': datetime.now().isoformat()
-        })
+        result = self._send('token_transfer', recipient_phone, message, "HBAR", background)
         
-        logging.info(f"Token transfer SMS sent to {recipient_phone} - Success: {result['success']}")
+        if not background:
+            logging.info(f"Token transfer SMS sent to {recipient_phone} - Success: {result['success']}")
         return result
     
     def send_mpesa_confirmation(self, recipient_phone: str, amount: float, 
-                              recipient_name: str, balance: float, transaction_id: str) -> Dict:
+                              recipient_name: str, balance: float, transaction_id: str,
+                              background: bool = False) -> Dict:
         """
         Send M-PESA style confirmation SMS
         """
@@ -277,20 +643,47 @@ class SMSNotificationService:
             amount, recipient_name, balance, transaction_id
         )
         
-        result = self.sms_client.send_sms(recipient_phone, message, sender_id="MPESA")
+        result = self._send('mpesa_confirmation', recipient_phone, message, "MPESA", background)
         
-        # Log the message
-        self.message_log.append({
-            'type': 'mpesa_confirmation',
-            'recipient': recipient_phone,
-            'message': message,
-            'result': result,
-            'timestamp': datetime.now().isoformat()
-        })
-        
-        logging.info(f"M-PESA confirmation SMS sent to {recipient_phone} - Success: {result['success']}")
+        if not background:
+            logging.info(f"M-PESA confirmation SMS sent to {recipient_phone} - Success: {result['success']}")
         return result
     
+    def get_async_sender(self):
+        """Get the concurrent async sender, starting its event loop on first use"""
+        with self._async_lock:
+            if self._async_sender is None:
+                from async_sms import AsyncAfricasTalkingSMS, AsyncSMSSender
+                self._async_sender = AsyncSMSSender(
+                    AsyncAfricasTalkingSMS(self.sms_client.config, self.sms_client.transport)
+                )
+                atexit.register(self._async_sender.shutdown)
+            return self._async_sender
+    
+    def send_bulk(self, messages: List[Dict], mode: str = 'batched') -> List[Dict]:
+        """
+        Send many messages
+        
+        Args:
+            messages: Dicts with 'to', 'message' and optional 'sender_id'
+            mode: 'batched' for multi-recipient requests, 'concurrent' for
+                  one async request per message
+            
+        Returns:
+            One result per message, in input order
+        """
+        if mode == 'concurrent':
+            results = self.get_async_sender().send_batch(messages)
+        else:
+            results = self.sms_client.send_bulk_messages(messages)
+        
+        for item, result in zip(messages, results):
+            self._log_message('bulk', result.get('recipient', item['to']), item['message'], result)
+        
+        sent = sum(1 for result in results if result.get('success'))
+        logging.info(f"Bulk SMS sent ({mode}) - {sent}/{len(results)} accepted")
+        return results
+    
     def get_message_history(self, limit: int = 50) -> List[Dict]:
         """
         Get recent SMS message history
@@ -302,6 +695,13 @@ class SMSNotificationService:
         Check delivery status of a sent message
         """
         return self.sms_client.get_delivery_reports(message_id)
+    
+    def get_dispatch_status(self, dispatch_id: str) -> Optional[Dict]:
+        """
+        Check the status of a message queued with background=True
+        """
+        handle = self.dispatcher.get_handle(dispatch_id)
+        return handle.to_dict() if handle else None
 
 # Global SMS service instance
-sms_service = SMSNotificationService()
\ No newline at end of file
+sms_service = LazyService(SMSNotificationService, 'sms_service')
\ No newline at end of file
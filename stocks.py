@@ -0,0 +1,229 @@
+"""
+Kenya Stocks Module
+NSE stock catalogue and lookup helpers shared by the web app and the CLI.
+"""
+
+import re
+import math
+import random
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+from utils import LazyService
+from price_feed import create_price_feed
+
+NGRAM = 3
+
+# Minimum Dice similarity between a query word and a ticker/name word for a fuzzy match
+FUZZY_THRESHOLD = 0.6
+
+_TOKEN_PATTERN = re.compile(r"[A-Z0-9&'-]+")
+
+# --- Kenya Stocks Database ---
+kenya_stocks = [
+    {'ticker': 'SAF', 'name': 'Safaricom PLC', 'price': 22.50, 'sector': 'Telecommunications', 'market_cap': '902B KES'},
+    {'ticker': 'EQTY', 'name': 'Equity Group Holdings', 'price': 45.75, 'sector': 'Banking', 'market_cap': '172B KES'},
+    {'ticker': 'KCB', 'name': 'KCB Group', 'price': 38.25, 'sector': 'Banking', 'market_cap': '156B KES'},
+    {'ticker': 'EABL', 'name': 'East African Breweries', 'price': 185.00, 'sector': 'Consumer Goods', 'market_cap': '140B KES'},
+    {'ticker': 'BAT', 'name': 'British American Tobacco Kenya', 'price': 425.00, 'sector': 'Consumer Goods', 'market_cap': '85B KES'},
+    {'ticker': 'COOP', 'name': 'Co-operative Bank', 'price': 14.50, 'sector': 'Banking', 'market_cap': '95B KES'},
+    {'ticker': 'ABSA', 'name': 'ABSA Bank Kenya', 'price': 12.80, 'sector': 'Banking', 'market_cap': '72B KES'},
+    {'ticker': 'BAMB', 'name': 'Bamburi Cement', 'price': 28.50, 'sector': 'Construction', 'market_cap': '35B KES'},
+    {'ticker': 'KPLC', 'name': 'Kenya Power & Lighting', 'price': 1.85, 'sector': 'Energy', 'market_cap': '12B KES'},
+    {'ticker': 'SCBK', 'name': 'Standard Chartered Bank Kenya', 'price': 165.00, 'sector': 'Banking', 'market_cap': '58B KES'},
+    {'ticker': 'DTBK', 'name': 'Diamond Trust Bank', 'price': 65.00, 'sector': 'Banking', 'market_cap': '26B KES'},
+    {'ticker': 'NBK', 'name': 'National Bank of Kenya', 'price': 6.50, 'sector': 'Banking', 'market_cap': '8B KES'},
+    {'ticker': 'SASINI', 'name': 'Sasini PLC', 'price': 11.25, 'sector': 'Agriculture', 'market_cap': '4B KES'},
+    {'ticker': 'TOTL', 'name': 'TotalEnergies Marketing Kenya', 'price': 4.20, 'sector': 'Energy', 'market_cap': '3.5B KES'},
+    {'ticker': 'UNGA', 'name': 'Unga Group', 'price': 32.00, 'sector': 'Consumer Goods', 'market_cap': '6B KES'},
+]
+
+def _ngrams(text: str) -> set:
+    return {text[i:i + NGRAM] for i in range(len(text) - NGRAM + 1)}
+
+class StockCatalog:
+    """
+    Indexed stock lookups by ticker, name and misspelled name
+
+    find() returns what the original linear scan did (exact ticker first,
+    then the first stock in catalog order whose name contains the query or
+    is contained in it), but uses hash and n-gram indexes instead of
+    upper-casing and scanning every name on every call. Misspelling-tolerant
+    matching is opt-in (find(fuzzy=True)) or ranked by search(), since a
+    fuzzy hit can be a different instrument ("Jubilee Holdings" scores
+    closest to Equity Group Holdings).
+    """
+
+    def __init__(self, stocks: List[Dict]):
+        """
+        Args:
+            stocks: Stock dicts with at least 'ticker' and 'name'; order sets match priority
+        """
+        self.stocks = stocks
+        self._by_ticker = {}
+        self._names = []                       # uppercase names in catalog order
+        self._name_grams = defaultdict(set)    # trigram -> indexes of names containing it
+        self._name_starts = defaultdict(list)  # leading trigram -> indexes of names starting with it
+        self._short_names = []                 # indexes of names shorter than a trigram
+        self._tokens = defaultdict(list)       # ticker or name word -> indexes
+        self._token_grams = defaultdict(set)   # padded trigram -> tokens containing it
+        self._token_gram_sets = {}             # token -> its padded trigrams
+
+        for index, stock in enumerate(stocks):
+            ticker = stock['ticker'].upper()
+            name = stock['name'].upper()
+            self._by_ticker.setdefault(ticker, stock)
+            self._names.append(name)
+
+            for gram in _ngrams(name):
+                self._name_grams[gram].add(index)
+            if len(name) >= NGRAM:
+                self._name_starts[name[:NGRAM]].append(index)
+            else:
+                self._short_names.append(index)
+
+            for token in {ticker, *_TOKEN_PATTERN.findall(name)}:
+                if len(token) < NGRAM:
+                    continue
+                self._tokens[token].append(index)
+                if token not in self._token_gram_sets:
+                    grams = self._token_gram_sets[token] = _ngrams(f" {token} ")
+                    for gram in grams:
+                        self._token_grams[gram].add(token)
+
+    def __len__(self) -> int:
+        return len(self.stocks)
+
+    def get(self, ticker: str) -> Optional[Dict]:
+        """Look up a stock by exact ticker"""
+        return self._by_ticker.get(ticker.upper().strip())
+
+    def find(self, query: str, fuzzy: bool = False) -> Optional[Dict]:
+        """
+        Find a stock by ticker or name
+
+        Args:
+            query: Ticker, name, part of a name, or text containing a name
+            fuzzy: Fall back to a misspelling-tolerant search when nothing matches
+                exactly; never use it where the result is bought or paid for
+
+        Returns:
+            The matching stock dict, or None
+        """
+        query = query.upper().strip()
+
+        stock = self._by_ticker.get(query)
+        if stock is not None:
+            return stock
+
+        index = self._find_name(query)
+        if index is not None:
+            return self.stocks[index]
+
+        if fuzzy:
+            # Only accept a fuzzy match that clearly beats every other stock
+            ranked = self._rank(query, 2)
+            if ranked and (len(ranked) == 1 or ranked[0][1] > ranked[1][1]):
+                return self.stocks[ranked[0][0]]
+        return None
+
+    def _find_name(self, query: str) -> Optional[int]:
+        """Index of the first stock whose name contains the query or is contained in it"""
+        best = None
+
+        # Names containing the query: every trigram of the query must be in the name
+        if len(query) >= NGRAM:
+            postings = sorted((self._name_grams.get(gram, ()) for gram in _ngrams(query)), key=len)
+            if postings[0]:
+                for index in sorted(set(postings[0]).intersection(*postings[1:])):
+                    if query in self._names[index]:
+                        best = index
+                        break
+        else:
+            best = next((index for index, name in enumerate(self._names) if query in name), None)
+
+        # Names contained in the query ("SAFARICOM PLC SHARES"): look names up by their leading trigram
+        limit = len(self._names) if best is None else best
+        for index in self._short_names:
+            if index < limit and self._names[index] in query:
+                best = limit = index
+                break
+        for start in range(len(query) - NGRAM + 1):
+            for index in self._name_starts.get(query[start:start + NGRAM], ()):
+                if index >= limit:
+                    break
+                if query.startswith(self._names[index], start):
+                    best = limit = index
+                    break
+        return best
+
+    def _rank(self, query: str, limit: int) -> List[tuple]:
+        """(index, score) of the best fuzzy matches, scoring each query word against ticker and name words"""
+        scores = defaultdict(float)
+        for word in _TOKEN_PATTERN.findall(query.upper()):
+            if len(word) < NGRAM:
+                continue
+            grams = _ngrams(f" {word} ")
+
+            # A token reaching the threshold shares at least `required` trigrams with the word,
+            # so it must contain one of the rarest len(grams) - required + 1 of them
+            required = math.ceil(FUZZY_THRESHOLD * len(grams) / (2 - FUZZY_THRESHOLD))
+            rarest = sorted(grams, key=lambda gram: len(self._token_grams.get(gram, ())))
+            candidates = set()
+            for gram in rarest[:len(grams) - required + 1]:
+                candidates.update(self._token_grams.get(gram, ()))
+
+            best = {}
+            for token in candidates:
+                token_grams = self._token_gram_sets[token]
+                similarity = 2 * len(grams & token_grams) / (len(grams) + len(token_grams))
+                if similarity >= FUZZY_THRESHOLD:
+                    for index in self._tokens[token]:
+                        if similarity > best.get(index, 0):
+                            best[index] = similarity
+            for index, similarity in best.items():
+                scores[index] += similarity
+
+        return sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:limit]
+
+    def search(self, query: str, limit: int = 5) -> List[Dict]:
+        """
+        Rank stocks by fuzzy similarity to the query
+
+        Args:
+            query: Free text, possibly misspelled ("safricom", "kenya powr lighting")
+            limit: Maximum number of results
+
+        Returns:
+            Stock dicts, best match first
+        """
+        return [self.stocks[index] for index, _ in self._rank(query, limit)]
+
+stock_catalog = StockCatalog(kenya_stocks)
+
+# Live quotes; the engine (and its feed thread) starts on the first price lookup
+price_feed = LazyService(lambda: create_price_feed(kenya_stocks), 'price_feed')
+
+def find_stock(query):
+    """Find a stock by ticker or name (flexible matching), priced from the live feed"""
+    stock = stock_catalog.find(query, fuzzy=False)
+    return price_feed.quote(stock) if stock else None
+
+def suggest_stocks(query, limit=3):
+    """Stocks whose ticker or name resembles a query that found nothing, for "did you mean" replies"""
+    return stock_catalog.search(query, limit)
+
+def list_stocks():
+    """All stocks in catalogue order, priced from the live feed"""
+    return [price_feed.quote(stock) for stock in kenya_stocks]
+
+def generate_stock_advice(stock):
+    """Generate realistic stock advice"""
+    advice_templates = [
+        f"{stock['name']} is showing stable performance in the {stock['sector']} sector.",
+        f"With a market cap of {stock['market_cap']}, {stock['name']} is a solid choice for medium-term investment.",
+        f"{stock['name']} has been performing well in recent trading sessions.",
+        f"As a leader in {stock['sector']}, {stock['name']} offers good growth potential.",
+        f"{stock['name']} is a blue-chip stock worth considering for your portfolio."
+    ]
+    return random.choice(advice_templates)
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Hedera delivery batch tests
+Checks which batch failures fall back to individual transfers and which fail
+closed, using fake SDK errors and clients so no JVM is needed.
+"""
+
+import os
+import sys
+
+# Add the app directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from hbar_manager import HederaTokenManager, PendingTransfer
+from test_hedera_pool import FakeClientPool, FakeJavaException, failed_receipt, max_attempts_after_unavailable
+
+class FakeTransactionResponse:
+    """Receipt handle whose getReceipt() raises the given error"""
+
+    def __init__(self, error):
+        self.error = error
+
+    def getReceipt(self, client):
+        raise self.error
+
+def make_manager():
+    """Token manager whose batches go to a fake network; individual sends are recorded"""
+    manager = HederaTokenManager()
+    manager.client_pool = FakeClientPool('testnet', '0.0.1001', 'key', size=1)
+    manager.resent = []
+    manager._submit_single = lambda transfer, on_complete: manager.resent.append(transfer.recipient)
+    return manager
+
+def make_batch(completed):
+    return [
+        (PendingTransfer(None, f"0.0.{2000 + n}", 5, 'memo', None, transfer_id=f"delivery-{n}"), completed.append)
+        for n in range(3)
+    ]
+
+def fail_execute(manager, error):
+    def execute_batch(transfers):
+        raise error
+    manager._execute_batch = execute_batch
+
+def fail_receipt(manager, error):
+    def execute_batch(transfers):
+        tx_response = FakeTransactionResponse(error)
+        return '0.0.1001@1700000000.000000001', lambda: manager._resolve_receipt(tx_response)
+    manager._execute_batch = execute_batch
+
+def test_submission_timeout_fails_closed():
+    manager, completed = make_manager(), []
+    fail_execute(manager, FakeJavaException('java.util.concurrent.TimeoutException'))
+
+    manager._submit_batch(make_batch(completed))
+
+    assert manager.resent == []
+    assert [transfer.status for transfer in completed] == ['FAILED'] * 3
+    assert manager.batch_fallbacks == 0
+
+def test_submission_transport_failure_fails_closed():
+    manager, completed = make_manager(), []
+    fail_execute(manager, max_attempts_after_unavailable())
+
+    manager._submit_batch(make_batch(completed))
+
+    assert manager.resent == []
+    assert [transfer.status for transfer in completed] == ['FAILED'] * 3
+
+def test_unrecognised_submission_error_fails_closed():
+    manager, completed = make_manager(), []
+    fail_execute(manager, RuntimeError('unexpected'))
+
+    manager._submit_batch(make_batch(completed))
+
+    assert manager.resent == []
+    assert len(completed) == 3
+
+def test_precheck_rejection_falls_back_to_individual_sends():
+    manager, completed = make_manager(), []
+    fail_execute(manager, FakeJavaException('com.hedera.hashgraph.sdk.PrecheckStatusException',
+                                            'Hedera transaction failed pre-check with the status INVALID_ACCOUNT_ID'))
+
+    manager._submit_batch(make_batch(completed))
+
+    assert manager.resent == ['0.0.2000', '0.0.2001', '0.0.2002']
+    assert completed == []
+
+def test_failed_receipt_falls_back_to_individual_sends():
+    manager, completed = make_manager(), []
+    fail_receipt(manager, failed_receipt())
+
+    manager._submit_batch(make_batch(completed))
+
+    assert manager.resent == ['0.0.2000', '0.0.2001', '0.0.2002']
+    assert manager.batch_fallbacks == 1
+
+def test_receipt_timeout_fails_closed():
+    manager, completed = make_manager(), []
+    fail_receipt(manager, FakeJavaException('java.util.concurrent.TimeoutException'))
+
+    manager._submit_batch(make_batch(completed))
+
+    assert manager.resent == []
+    assert [transfer.status for transfer in completed] == ['FAILED'] * 3
+
+def main():
+    """Run all tests"""
+    tests = [value for name, value in sorted(globals().items()) if name.startswith('test_')]
+    for test in tests:
+        test()
+        print(f"✅ {test.__name__}")
+
+if __name__ == "__main__":
+    main()
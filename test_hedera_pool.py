@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Hedera client pool tests
+Checks how SDK errors are classified, using stand-ins for the
+jnius.JavaException the SDK raises, so no JVM is needed.
+"""
+
+import os
+import sys
+
+# Add the app directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from hedera_pool import (HederaClientPool, is_channel_failure, is_precheck_rejection,
+                         java_exception_chain, receipt_failure_status)
+
+class FakeJavaException(Exception):
+    """Same shape as jnius.JavaException: classname, innermessage and stacktrace"""
+
+    def __init__(self, classname, innermessage=None, stacktrace=None):
+        super().__init__(f"JVM exception occurred: {innermessage or classname}")
+        self.classname = classname
+        self.innermessage = innermessage
+        self.stacktrace = stacktrace or []
+
+class FakeClient:
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+class FakeClientPool(HederaClientPool):
+    """Pool handing out FakeClients instead of SDK clients"""
+
+    def _create_client(self):
+        with self._lock:
+            self._created += 1
+        return FakeClient()
+
+def grpc_unavailable():
+    return FakeJavaException('io.grpc.StatusRuntimeException', 'UNAVAILABLE: io exception')
+
+def max_attempts_after_unavailable():
+    return FakeJavaException(
+        'com.hedera.hashgraph.sdk.MaxAttemptsExceededException',
+        'exceeded maximum attempts for request with last exception being',
+        [
+            'com.hedera.hashgraph.sdk.MaxAttemptsExceededException: exceeded maximum attempts',
+            'com.hedera.hashgraph.sdk.Executable.execute(Executable.java:410)',
+            'Caused by: io.grpc.StatusRuntimeException: UNAVAILABLE: io exception',
+            'io.grpc.stub.ClientCalls.toStatusRuntimeException(ClientCalls.java:271)',
+        ]
+    )
+
+def failed_receipt():
+    return FakeJavaException(
+        'com.hedera.hashgraph.sdk.ReceiptStatusException',
+        'receipt for transaction 0.0.1001@1700000000.000000001 raised status TOKEN_NOT_ASSOCIATED_TO_ACCOUNT'
+    )
+
+def test_channel_failures_match_on_java_class_name():
+    assert is_channel_failure(grpc_unavailable())
+    assert is_channel_failure(FakeJavaException('java.util.concurrent.TimeoutException'))
+    assert is_channel_failure(max_attempts_after_unavailable())
+
+def test_status_answers_and_python_errors_are_not_channel_failures():
+    assert not is_channel_failure(failed_receipt())
+    assert not is_channel_failure(FakeJavaException('com.hedera.hashgraph.sdk.PrecheckStatusException',
+                                                    'Hedera transaction failed pre-check with the status INVALID_SIGNATURE'))
+    assert not is_channel_failure(RuntimeError('UNAVAILABLE Channel shutdown'))
+
+def test_wrapped_python_cause_is_followed():
+    try:
+        try:
+            raise grpc_unavailable()
+        except FakeJavaException as e:
+            raise RuntimeError('receipt query failed') from e
+    except RuntimeError as wrapped:
+        assert is_channel_failure(wrapped)
+
+def test_stack_frames_are_not_read_as_causes():
+    chain = java_exception_chain(max_attempts_after_unavailable())
+    assert [classname for classname, _ in chain] == [
+        'com.hedera.hashgraph.sdk.MaxAttemptsExceededException',
+        'io.grpc.StatusRuntimeException',
+    ]
+
+def test_precheck_rejection():
+    rejected = FakeJavaException('com.hedera.hashgraph.sdk.PrecheckStatusException',
+                                 'Hedera transaction failed pre-check with the status INVALID_ACCOUNT_ID')
+    assert is_precheck_rejection(rejected)
+    assert not is_precheck_rejection(grpc_unavailable())
+    assert not is_precheck_rejection(max_attempts_after_unavailable())
+
+def test_receipt_failure_status():
+    assert receipt_failure_status(failed_receipt()) == 'TOKEN_NOT_ASSOCIATED_TO_ACCOUNT'
+    assert receipt_failure_status(FakeJavaException('com.hedera.hashgraph.sdk.ReceiptStatusException')) == 'RECEIPT_FAILED'
+    assert receipt_failure_status(FakeJavaException('java.util.concurrent.TimeoutException')) is None
+    assert receipt_failure_status(RuntimeError('INVALID_ACCOUNT_ID')) is None
+
+def test_lease_replaces_client_after_channel_failure():
+    pool = FakeClientPool('testnet', '0.0.1001', 'key', size=1)
+
+    with pool.lease() as client:
+        pass
+    try:
+        with pool.lease() as same_client:
+            raise grpc_unavailable()
+    except FakeJavaException:
+        pass
+    assert same_client is client and client.closed
+
+    with pool.lease() as replacement:
+        pass
+    assert replacement is not client
+    assert pool.get_stats()['recreated'] == 1
+
+def test_lease_keeps_client_after_status_error():
+    pool = FakeClientPool('testnet', '0.0.1001', 'key', size=1)
+
+    try:
+        with pool.lease() as client:
+            raise failed_receipt()
+    except FakeJavaException:
+        pass
+    with pool.lease() as same_client:
+        pass
+    assert same_client is client and not client.closed
+
+def main():
+    """Run all tests"""
+    tests = [value for name, value in sorted(globals().items()) if name.startswith('test_')]
+    for test in tests:
+        test()
+        print(f"✅ {test.__name__}")
+
+if __name__ == "__main__":
+    main()
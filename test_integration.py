@@ -12,8 +12,9 @@ from datetime import datetime
 # Add the app directory to the Python path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from sms_service import sms_service, SMSTemplates
-from africastalking_client import api_client, PhoneNumberValidator
+from sms_service import sms_service, SMSTemplates, AfricasTalkingSMS
+from africastalking_stub import start_stub_server
+from africastalking_client import api_client, AfricasTalkingConfig, PhoneNumberValidator, create_transport
 from hbar_manager import transaction_service
 from utils import (
     transaction_logger, PhoneNumberUtils, SMSCostCalculator, 
@@ -128,6 +129,28 @@ def test_sms_sending():
         delivery = sms_service.sms_client.get_delivery_reports(result['message_id'])
         print(f"  Delivery Status: {delivery.get('status', 'unknown')}")
 
+def test_bulk_sms():
+    """Test multi-recipient bulk SMS against the local stub server"""
+    print("\n📨 Testing Bulk SMS (local stub server)...")
+    
+    server, url = start_stub_server()
+    config = AfricasTalkingConfig()
+    config.base_url = url
+    client = AfricasTalkingSMS(config, create_transport(config, 'http'))
+    client.bulk_chunk_size = 2
+    
+    try:
+        server.fail_next = 1  # First request gets a 503 and is retried
+        recipients = ["+254700000001", "+254700000002", "+254700000003", "12345"]
+        results = client.send_bulk_sms(recipients, "Market update: SAF up 2%", "TEXTAHBAR")
+        
+        print(f"Bulk SMS Result:")
+        print(f"  HTTP Requests: {server.request_count}")
+        for result in results:
+            print(f"  {result['recipient']}: {'✅' if result['success'] else '❌'} {result.get('message_id') or result.get('error')}")
+    finally:
+        server.shutdown()
+
 def test_hedera_functionality():
     """Test Hedera token management"""
     print("\n⚡ Testing Hedera Functionality...")
@@ -218,6 +241,7 @@ def main():
         test_sms_cost_calculation()
         test_sms_templates()
         test_sms_sending()
+        test_bulk_sms()
         test_hedera_functionality()
         test_integrated_stock_purchase()
         test_transaction_logging()
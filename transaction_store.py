@@ -0,0 +1,646 @@
+"""
+Transaction Storage Module
+This module provides the pluggable persistence layer behind TransactionLogger:
+an append-only JSON Lines journal with an in-memory lookup index, or a
+SQLite database shared by all worker processes.
+"""
+
+import os
+import atexit
+import logging
+import sqlite3
+import threading
+import time
+from bisect import bisect_right
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from json_provider import dumps, dumps_bytes, loads
+
+def _number(value):
+    """Numeric field value, or 0 for anything else"""
+    return value if isinstance(value, (int, float)) and not isinstance(value, bool) else 0
+
+def entry_totals(entry: Dict) -> Tuple[float, float]:
+    """Get the (amount, tokens_sent) a transaction entry records"""
+    data = entry.get('data') or {}
+    return _number(data.get('amount')), _number(data.get('tokens_sent'))
+
+def summarize_aggregates(rows, transaction_type: str = None) -> Dict:
+    """
+    Build transaction statistics from aggregate rows
+
+    Args:
+        rows: (type, status, count, amount, tokens) tuples, one per type and status
+        transaction_type: Only count this type
+
+    Returns:
+        Totals, success/failure counts, per-type counts and per-type breakdown
+    """
+    stats = {
+        'total_transactions': 0,
+        'successful_transactions': 0,
+        'failed_transactions': 0,
+        'amount_total': 0,
+        'tokens_sent': 0,
+        'transaction_types': {},
+        'by_type': {}
+    }
+    for row_type, status, count, amount, tokens in rows:
+        if transaction_type and row_type != transaction_type:
+            continue
+        outcome = 'successful_transactions' if status else 'failed_transactions'
+        breakdown = stats['by_type'].setdefault(row_type, {
+            'successful_transactions': 0, 'failed_transactions': 0, 'amount_total': 0, 'tokens_sent': 0
+        })
+        for totals in (stats, breakdown):
+            totals[outcome] += count
+            totals['amount_total'] += amount
+            totals['tokens_sent'] += tokens
+        stats['total_transactions'] += count
+        stats['transaction_types'][row_type] = stats['transaction_types'].get(row_type, 0) + count
+    return stats
+
+class TransactionAggregates:
+    """
+    Running counts and amount/token totals per transaction type and status
+    """
+
+    def __init__(self):
+        self.cells = {}  # (type, status) -> [count, amount, tokens]
+
+    def add(self, entry: Dict):
+        """Count one entry in O(1)"""
+        amount, tokens = entry_totals(entry)
+        key = (entry.get('type', 'unknown'), 1 if entry.get('status') else 0)
+        cell = self.cells.get(key)
+        if cell is None:
+            self.cells[key] = [1, amount, tokens]
+        else:
+            cell[0] += 1
+            cell[1] += amount
+            cell[2] += tokens
+
+    def rows(self) -> List[Tuple]:
+        """(type, status, count, amount, tokens) tuples"""
+        return [(key[0], key[1], *cell) for key, cell in self.cells.items()]
+
+class TransactionJournal:
+    """
+    Append-only JSON Lines journal split into rotating segment files
+    """
+
+    SEGMENT_PREFIX = "segment-"
+    SEGMENT_SUFFIX = ".jsonl"
+
+    def __init__(self, directory: str, max_segment_bytes: int = 8 * 1024 * 1024,
+                 fsync_batch_size: int = 32, fsync_interval: float = 1.0):
+        """
+        Args:
+            directory: Directory holding the journal segments
+            max_segment_bytes: Size after which a new segment is started
+            fsync_batch_size: Number of appends between forced fsyncs
+            fsync_interval: Maximum seconds between fsyncs while appending
+        """
+        self.directory = directory
+        self.max_segment_bytes = max_segment_bytes
+        self.fsync_batch_size = fsync_batch_size
+        self.fsync_interval = fsync_interval
+
+        self._lock = threading.Lock()
+        self._active_file = None
+        self._active_index = 0
+        self._pending_sync = 0
+        self._last_sync = time.monotonic()
+
+        os.makedirs(self.directory, exist_ok=True)
+        atexit.register(self.close)
+
+    def _segment_path(self, index: int) -> str:
+        """Get the file path for a segment number"""
+        return os.path.join(self.directory, f"{self.SEGMENT_PREFIX}{index:06d}{self.SEGMENT_SUFFIX}")
+
+    def _segment_indexes(self) -> List[int]:
+        """List existing segment numbers in write order"""
+        indexes = []
+        for name in os.listdir(self.directory):
+            if name.startswith(self.SEGMENT_PREFIX) and name.endswith(self.SEGMENT_SUFFIX):
+                number = name[len(self.SEGMENT_PREFIX):-len(self.SEGMENT_SUFFIX)]
+                if number.isdigit():
+                    indexes.append(int(number))
+        return sorted(indexes)
+
+    def _open_segment(self, index: int):
+        """Open a segment for appending, making it the active one"""
+        if self._active_file:
+            self._sync_locked()
+            self._active_file.close()
+        self._active_index = index
+        self._active_file = open(self._segment_path(index), 'ab')
+
+    def _sync_locked(self):
+        """fsync the active segment (caller holds the lock)"""
+        if self._active_file and self._pending_sync:
+            self._active_file.flush()
+            os.fsync(self._active_file.fileno())
+        self._pending_sync = 0
+        self._last_sync = time.monotonic()
+
+    def append(self, entry: Dict):
+        """
+        Append one entry to the journal
+
+        Writes are flushed to the OS immediately; fsync is batched and happens
+        every `fsync_batch_size` appends or `fsync_interval` seconds.
+        """
+        line = dumps_bytes(entry) + b'\n'
+
+        with self._lock:
+            if not self._active_file:
+                indexes = self._segment_indexes()
+                self._open_segment(indexes[-1] if indexes else 1)
+
+            position = self._active_file.tell()
+            if position and position + len(line) > self.max_segment_bytes:
+                self._open_segment(self._active_index + 1)
+
+            self._active_file.write(line)
+            self._active_file.flush()
+            self._pending_sync += 1
+
+            if (self._pending_sync >= self.fsync_batch_size or
+                    time.monotonic() - self._last_sync >= self.fsync_interval):
+                self._sync_locked()
+
+    def sync(self):
+        """Force pending appends to disk"""
+        with self._lock:
+            self._sync_locked()
+
+    def close(self):
+        """Sync and close the active segment"""
+        with self._lock:
+            if self._active_file:
+                self._sync_locked()
+                self._active_file.close()
+                self._active_file = None
+
+    def is_empty(self) -> bool:
+        """Check whether the journal holds any entries"""
+        return not any(
+            os.path.getsize(self._segment_path(index)) for index in self._segment_indexes()
+        )
+
+    def read_entries(self) -> Iterator[Dict]:
+        """Yield all journal entries in write order"""
+        for index in self._segment_indexes():
+            path = self._segment_path(index)
+            with open(path, 'rb') as f:
+                for line_number, line in enumerate(f, 1):
+                    if not line.strip():
+                        continue
+                    try:
+                        yield loads(line)
+                    except ValueError:
+                        # A torn write at the tail of a segment after a crash
+                        logging.warning(f"Skipping corrupt journal line {path}:{line_number}")
+
+    def migrate_legacy_file(self, legacy_file: str) -> int:
+        """
+        Import a legacy transactions.json array into the journal
+
+        Args:
+            legacy_file: Path to the old full-rewrite JSON log
+
+        Returns:
+            Number of entries migrated
+        """
+        with open(legacy_file, 'rb') as f:
+            legacy_entries = loads(f.read())
+
+        for entry in legacy_entries:
+            self.append(entry)
+        self.sync()
+
+        os.replace(legacy_file, f"{legacy_file}.migrated")
+        logging.info(f"Migrated {len(legacy_entries)} transactions from {legacy_file} to journal")
+        return len(legacy_entries)
+
+    def compact(self) -> Dict:
+        """
+        Rewrite all segments into densely packed segments
+
+        Entries sharing a transaction_id are collapsed to the last one written.
+        This is an offline operation: run it while no process is appending.
+
+        Returns:
+            Compaction statistics
+        """
+        with self._lock:
+            if self._active_file:
+                self._sync_locked()
+                self._active_file.close()
+                self._active_file = None
+
+            old_indexes = self._segment_indexes()
+            entries = {}
+            read_count = 0
+            for entry in self.read_entries():
+                read_count += 1
+                key = entry.get('transaction_id') or f"__anonymous_{read_count}"
+                entries.pop(key, None)
+                entries[key] = entry
+
+            # Write the compacted copy after the existing segments so a crash
+            # mid-compaction leaves duplicates (collapsed next time), never gaps
+            next_index = (old_indexes[-1] + 1) if old_indexes else 1
+            new_indexes = [next_index]
+            out = open(self._segment_path(next_index) + '.tmp', 'wb')
+            try:
+                for entry in entries.values():
+                    line = dumps_bytes(entry) + b'\n'
+                    if out.tell() and out.tell() + len(line) > self.max_segment_bytes:
+                        out.flush()
+                        os.fsync(out.fileno())
+                        out.close()
+                        next_index += 1
+                        new_indexes.append(next_index)
+                        out = open(self._segment_path(next_index) + '.tmp', 'wb')
+                    out.write(line)
+                out.flush()
+                os.fsync(out.fileno())
+            finally:
+                out.close()
+
+            for index in new_indexes:
+                os.replace(self._segment_path(index) + '.tmp', self._segment_path(index))
+            for index in old_indexes:
+                os.remove(self._segment_path(index))
+
+        stats = {
+            'segments_before': len(old_indexes),
+            'segments_after': len(new_indexes),
+            'entries_before': read_count,
+            'entries_after': len(entries)
+        }
+        logging.info(f"Transaction journal compacted: {stats}")
+        return stats
+
+class TransactionIndex:
+    """
+    In-memory index over logged transactions by ID and by type
+
+    Positions in `entries` double as the 1-based sequence numbers used as
+    pagination cursors; `by_type` holds per-type lists of those positions, so
+    typed pages binary-search and index them in O(1) per step.
+    `aggregates` keeps running statistics over everything indexed.
+    """
+
+    def __init__(self):
+        self.entries = []
+        self.by_id = {}
+        self.by_type = {}
+        self.aggregates = TransactionAggregates()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __iter__(self) -> Iterator[Dict]:
+        return iter(self.entries)
+
+    def add(self, entry: Dict):
+        """Index a transaction entry (entries must arrive in log order)"""
+        self.entries.append(entry)
+        self.by_id[entry.get('transaction_id')] = entry
+
+        transaction_type = entry.get('type')
+        if transaction_type not in self.by_type:
+            self.by_type[transaction_type] = []
+        self.by_type[transaction_type].append(len(self.entries))
+        self.aggregates.add(entry)
+
+    def get(self, transaction_id: str) -> Optional[Dict]:
+        """Look up a transaction by ID in O(1)"""
+        return self.by_id.get(transaction_id)
+
+    def latest(self, transaction_type: str = None, limit: int = 50) -> List[Dict]:
+        """
+        Get the most recent transactions, oldest first
+
+        Costs O(limit) regardless of history size.
+        """
+        if not transaction_type:
+            if not self.entries:
+                return []
+            return self.entries[-limit:]
+
+        positions = self.by_type.get(transaction_type)
+        if not positions:
+            return []
+        return [self.entries[seq - 1] for seq in positions[-limit:]]
+
+    def page(self, transaction_type: str = None, since: str = None,
+             cursor: int = None, limit: int = 50) -> Tuple[List[Dict], Optional[int]]:
+        """
+        Get a page of transactions in log order after a cursor
+
+        Args:
+            transaction_type: Optional type filter
+            since: Optional ISO timestamp lower bound (inclusive)
+            cursor: Sequence number of the last entry already seen
+            limit: Page size
+
+        Returns:
+            (entries, next_cursor) where next_cursor is None on the last page
+        """
+        if transaction_type:
+            positions = self.by_type.get(transaction_type, ())
+        else:
+            positions = range(1, len(self.entries) + 1)
+
+        start = bisect_right(positions, cursor) if cursor else 0
+        if since:
+            # Entries are appended in time order, so binary search the bound too
+            low, high = start, len(positions)
+            while low < high:
+                middle = (low + high) // 2
+                if self.entries[positions[middle] - 1].get('timestamp', '') < since:
+                    low = middle + 1
+                else:
+                    high = middle
+            start = low
+
+        selected = [positions[i] for i in range(start, min(start + limit, len(positions)))]
+        next_cursor = selected[-1] if selected and start + limit < len(positions) else None
+        return [self.entries[seq - 1] for seq in selected], next_cursor
+
+
+class JournalTransactionStore:
+    """
+    Transaction store backed by the JSON Lines journal and an in-memory index
+
+    Appends write the journal and update the index under one lock, so index
+    positions (the pagination cursors) always follow journal order.
+    """
+
+    backend = 'journal'
+
+    def __init__(self, directory: str):
+        self.journal = TransactionJournal(directory)
+        self.index = TransactionIndex()
+        self._lock = threading.Lock()
+        for entry in self.journal.read_entries():
+            self.index.add(entry)
+
+    def is_empty(self) -> bool:
+        return len(self.index) == 0
+
+    def migrate_legacy_file(self, legacy_file: str) -> int:
+        """Import a legacy transactions.json array"""
+        with self._lock:
+            count = self.journal.migrate_legacy_file(legacy_file)
+            index = TransactionIndex()
+            for entry in self.journal.read_entries():
+                index.add(entry)
+            self.index = index
+        return count
+
+    def append(self, entry: Dict):
+        with self._lock:
+            self.journal.append(entry)
+            self.index.add(entry)
+
+    def get(self, transaction_id: str) -> Optional[Dict]:
+        return self.index.get(transaction_id)
+
+    def latest(self, transaction_type: str = None, limit: int = 50) -> List[Dict]:
+        return self.index.latest(transaction_type, limit)
+
+    def page(self, transaction_type: str = None, since: str = None,
+             cursor: int = None, limit: int = 50) -> Tuple[List[Dict], Optional[int]]:
+        return self.index.page(transaction_type, since, cursor, limit)
+
+    def aggregates(self, transaction_type: str = None) -> Dict:
+        with self._lock:
+            rows = self.index.aggregates.rows()
+        return summarize_aggregates(rows, transaction_type)
+
+    def sync(self):
+        self.journal.sync()
+
+    def compact(self) -> Dict:
+        return self.journal.compact()
+
+
+class SQLiteTransactionStore:
+    """
+    Transaction store backed by SQLite in WAL mode
+
+    Every gunicorn worker opening the same database file sees one consistent
+    log, and nothing is held in memory beyond the rows a query returns.
+    Statistics live in transaction_aggregates, updated in the same
+    transaction as each insert.
+    """
+
+    backend = 'sqlite'
+
+    SCHEMA = (
+        """CREATE TABLE IF NOT EXISTS transactions (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            transaction_id TEXT NOT NULL UNIQUE,
+            type TEXT NOT NULL,
+            timestamp TEXT NOT NULL,
+            status INTEGER NOT NULL,
+            entry TEXT NOT NULL
+        )""",
+        "CREATE INDEX IF NOT EXISTS idx_transactions_type ON transactions (type, seq)",
+        "CREATE INDEX IF NOT EXISTS idx_transactions_timestamp ON transactions (timestamp)",
+        """CREATE TABLE IF NOT EXISTS transaction_aggregates (
+            type TEXT NOT NULL,
+            status INTEGER NOT NULL,
+            count INTEGER NOT NULL,
+            amount NUMERIC NOT NULL,
+            tokens NUMERIC NOT NULL,
+            PRIMARY KEY (type, status)
+        )""",
+    )
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._local = threading.local()
+
+        connection = self._connection()
+        with connection:
+            for statement in self.SCHEMA:
+                connection.execute(statement)
+        self._backfill_aggregates(connection)
+
+    def _connection(self) -> sqlite3.Connection:
+        """Get this thread's connection, opening it on first use"""
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.db_path, timeout=5.0)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def _backfill_aggregates(self, connection: sqlite3.Connection):
+        """Build the aggregates of a database written before they were kept (runs once)"""
+        if connection.execute("SELECT 1 FROM transaction_aggregates LIMIT 1").fetchone():
+            return
+        # Take the write lock so workers starting together rebuild once and no append slips in between
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            empty = connection.execute("SELECT 1 FROM transaction_aggregates LIMIT 1").fetchone() is None
+            if empty:
+                aggregates = TransactionAggregates()
+                for entry, in connection.execute("SELECT entry FROM transactions"):
+                    aggregates.add(loads(entry))
+                connection.executemany(
+                    "INSERT INTO transaction_aggregates (type, status, count, amount, tokens) VALUES (?, ?, ?, ?, ?)",
+                    aggregates.rows()
+                )
+            connection.commit()
+        except Exception:
+            connection.rollback()
+            raise
+        if empty and aggregates.cells:
+            logging.info(f"Built transaction aggregates for {self.db_path}")
+
+    def is_empty(self) -> bool:
+        return self._connection().execute("SELECT 1 FROM transactions LIMIT 1").fetchone() is None
+
+    def migrate_legacy_file(self, legacy_file: str) -> int:
+        """Import a legacy transactions.json array"""
+        with open(legacy_file, 'rb') as f:
+            legacy_entries = loads(f.read())
+
+        connection = self._connection()
+        with connection:
+            for entry in legacy_entries:
+                self._insert(connection, entry, ignore_duplicates=True)
+
+        os.replace(legacy_file, f"{legacy_file}.migrated")
+        logging.info(f"Migrated {len(legacy_entries)} transactions from {legacy_file} to {self.db_path}")
+        return len(legacy_entries)
+
+    def _insert(self, connection: sqlite3.Connection, entry: Dict, ignore_duplicates: bool = False):
+        """Insert an entry and count it in the aggregates (caller commits both together)"""
+        verb = "INSERT OR IGNORE" if ignore_duplicates else "INSERT"
+        cursor = connection.execute(
+            f"{verb} INTO transactions (transaction_id, type, timestamp, status, entry) VALUES (?, ?, ?, ?, ?)",
+            (
+                entry.get('transaction_id'),
+                entry.get('type'),
+                entry.get('timestamp', ''),
+                1 if entry.get('status') else 0,
+                dumps(entry)
+            )
+        )
+        if cursor.rowcount != 1:
+            return  # duplicate ignored
+        amount, tokens = entry_totals(entry)
+        connection.execute(
+            """INSERT INTO transaction_aggregates (type, status, count, amount, tokens) VALUES (?, ?, 1, ?, ?)
+               ON CONFLICT (type, status) DO UPDATE SET
+                   count = count + 1, amount = amount + excluded.amount, tokens = tokens + excluded.tokens""",
+            (entry.get('type'), 1 if entry.get('status') else 0, amount, tokens)
+        )
+
+    def append(self, entry: Dict):
+        connection = self._connection()
+        with connection:
+            self._insert(connection, entry)
+
+    def get(self, transaction_id: str) -> Optional[Dict]:
+        row = self._connection().execute(
+            "SELECT entry FROM transactions WHERE transaction_id = ?", (transaction_id,)
+        ).fetchone()
+        return loads(row[0]) if row else None
+
+    def latest(self, transaction_type: str = None, limit: int = 50) -> List[Dict]:
+        if limit <= 0:
+            return [loads(entry) for entry, in self._iter_rows(transaction_type)][-limit:]
+
+        if transaction_type:
+            rows = self._connection().execute(
+                "SELECT entry FROM transactions WHERE type = ? ORDER BY seq DESC LIMIT ?",
+                (transaction_type, limit)
+            ).fetchall()
+        else:
+            rows = self._connection().execute(
+                "SELECT entry FROM transactions ORDER BY seq DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [loads(entry) for entry, in reversed(rows)]
+
+    def _iter_rows(self, transaction_type: str = None):
+        if transaction_type:
+            return self._connection().execute(
+                "SELECT entry FROM transactions WHERE type = ? ORDER BY seq", (transaction_type,)
+            )
+        return self._connection().execute("SELECT entry FROM transactions ORDER BY seq")
+
+    def page(self, transaction_type: str = None, since: str = None,
+             cursor: int = None, limit: int = 50) -> Tuple[List[Dict], Optional[int]]:
+        clauses, params = ["seq > ?"], [cursor or 0]
+        if transaction_type:
+            clauses.append("type = ?")
+            params.append(transaction_type)
+        if since:
+            clauses.append("timestamp >= ?")
+            params.append(since)
+
+        rows = self._connection().execute(
+            f"SELECT seq, entry FROM transactions WHERE {' AND '.join(clauses)} ORDER BY seq LIMIT ?",
+            params + [limit + 1]
+        ).fetchall()
+
+        next_cursor = rows[limit - 1][0] if len(rows) > limit else None
+        return [loads(entry) for _, entry in rows[:limit]], next_cursor
+
+    def aggregates(self, transaction_type: str = None) -> Dict:
+        if transaction_type:
+            rows = self._connection().execute(
+                "SELECT type, status, count, amount, tokens FROM transaction_aggregates WHERE type = ?",
+                (transaction_type,)
+            ).fetchall()
+        else:
+            rows = self._connection().execute(
+                "SELECT type, status, count, amount, tokens FROM transaction_aggregates"
+            ).fetchall()
+        return summarize_aggregates(rows)
+
+    def sync(self):
+        self._connection().execute("PRAGMA wal_checkpoint(PASSIVE)")
+
+    def compact(self) -> Dict:
+        connection = self._connection()
+        size_before = os.path.getsize(self.db_path)
+        connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        connection.execute("VACUUM")
+        count = connection.execute("SELECT COUNT(*) FROM transactions").fetchone()[0]
+        return {
+            'entries_before': count,
+            'entries_after': count,
+            'bytes_before': size_before,
+            'bytes_after': os.path.getsize(self.db_path)
+        }
+
+
+def create_transaction_store(backend: str = None, log_file: str = "transactions.json"):
+    """
+    Create the transaction store selected by TRANSACTION_STORE (journal or sqlite)
+
+    Args:
+        backend: Backend name; defaults to the TRANSACTION_STORE environment variable
+        log_file: Legacy JSON log path, used to derive default storage locations
+    """
+    backend = (backend or os.getenv('TRANSACTION_STORE', 'journal')).lower()
+    base_name = os.path.splitext(log_file)[0]
+
+    if backend == 'sqlite':
+        return SQLiteTransactionStore(os.getenv('TRANSACTION_DB_PATH', f"{base_name}.db"))
+    if backend == 'journal':
+        return JournalTransactionStore(os.getenv('TRANSACTION_JOURNAL_DIR', f"{base_name}.journal"))
+
+    raise ValueError(f"Unknown transaction store backend: {backend}")
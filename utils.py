@@ -8,42 +8,51 @@ import os
 import json
 import logging
 import re
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import deque
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Union
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 import uuid
 
+from transaction_store import create_transaction_store
+
 class TransactionLogger:
     """
     Enhanced transaction logging with structured data
+
+    Entries are persisted through a pluggable store (see transaction_store);
+    a legacy transactions.json file is migrated into it on first start.
     """
     
-    def __init__(self, log_file: str = "transactions.json"):
+    def __init__(self, log_file: str = "transactions.json", backend: str = None):
         self.log_file = log_file
-        self.transactions = []
+        self.store = create_transaction_store(backend, log_file)
         self.load_existing_logs()
     
     def load_existing_logs(self):
-        """Load existing transaction logs from file"""
+        """Migrate the legacy JSON transaction log into the store if needed"""
         try:
-            if os.path.exists(self.log_file):
-                with open(self.log_file, 'r') as f:
-                    self.transactions = json.load(f)
+            if os.path.exists(self.log_file) and self.store.is_empty():
+                self.store.migrate_legacy_file(self.log_file)
         except Exception as e:
             logging.warning(f"Could not load existing transaction logs: {e}")
-            self.transactions = []
     
-    def log_transaction(self, transaction_type: str, data: Dict) -> str:
+    def log_transaction(self, transaction_type: str, data: Dict, transaction_id: str = None) -> str:
         """
         Log a new transaction with structured data
         
         Args:
             transaction_type: Type of transaction (sms, token_transfer, stock_purchase)
             data: Transaction data dictionary
+            transaction_id: Optional fixed ID, for entries looked up by a known key
             
         Returns:
             Transaction ID
         """
-        transaction_id = f"{transaction_type.upper()}_{uuid.uuid4().hex[:8]}"
+        transaction_id = transaction_id or f"{transaction_type.upper()}_{uuid.uuid4().hex[:8]}"
         
         log_entry = {
             'transaction_id': transaction_id,
@@ -53,35 +62,63 @@ class TransactionLogger:
             'status': data.get('success', False)
         }
         
-        self.transactions.append(log_entry)
-        self.save_logs()
+        try:
+            self.store.append(log_entry)
+        except Exception as e:
+            logging.error(f"Failed to persist transaction: {e}")
         
         logging.info(f"Transaction logged: {transaction_id} ({transaction_type})")
         return transaction_id
     
     def save_logs(self):
-        """Save transaction logs to file"""
+        """Flush pending writes to disk"""
         try:
-            with open(self.log_file, 'w') as f:
-                json.dump(self.transactions, f, indent=2, default=str)
+            self.store.sync()
         except Exception as e:
             logging.error(f"Failed to save transaction logs: {e}")
     
+    def compact_logs(self) -> Dict:
+        """Compact the underlying storage (run while the app is stopped)"""
+        return self.store.compact()
+    
     def get_transactions(self, transaction_type: str = None, limit: int = 50) -> List[Dict]:
         """Get transaction history with optional filtering"""
-        filtered = self.transactions
-        
-        if transaction_type:
-            filtered = [tx for tx in filtered if tx['type'] == transaction_type]
+        return self.store.latest(transaction_type, limit)
+    
+    def get_transactions_page(self, transaction_type: str = None, since: str = None,
+                              cursor: int = None, limit: int = 50) -> Tuple[List[Dict], Optional[int]]:
+        """
+        Get one page of transaction history in log order
         
-        return filtered[-limit:] if filtered else []
+        Args:
+            transaction_type: Optional type filter
+            since: Optional ISO timestamp lower bound
+            cursor: next_cursor value from the previous page
+            limit: Page size
+            
+        Returns:
+            (transactions, next_cursor) - next_cursor is None on the last page
+        """
+        return self.store.page(transaction_type, since, cursor, limit)
     
     def get_transaction(self, transaction_id: str) -> Optional[Dict]:
         """Get specific transaction by ID"""
-        for tx in self.transactions:
-            if tx['transaction_id'] == transaction_id:
-                return tx
-        return None
+        return self.store.get(transaction_id)
+    
+    def get_statistics(self, transaction_type: str = None) -> Dict:
+        """
+        Get statistics over the whole transaction history
+        
+        Counts per type and status and amount/token totals are kept up to
+        date as transactions are logged, so this does not scan the history.
+        
+        Args:
+            transaction_type: Optional type filter
+            
+        Returns:
+            Totals, success/failure counts, per-type counts and per-type breakdown
+        """
+        return self.store.aggregates(transaction_type)
 
 class PhoneNumberUtils:
     """
@@ -285,37 +322,289 @@ class MessageFormatter:
         
         return f"{base_message}\n🔍 Error: {error}\n📞 Please contact support if this persists."
 
+class SQLiteRateLimitStore:
+    """
+    Rate limit counters shared by every worker process on a node
+
+    Counters live in a small file-backed SQLite table and use a sliding
+    window counter (current fixed window plus the weighted previous one).
+    Each check-and-increment runs in one IMMEDIATE transaction, so it is
+    atomic across processes.
+    """
+    
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._local = threading.local()
+        self._next_cleanup = 0.0
+        
+        self._connection().execute(
+            """CREATE TABLE IF NOT EXISTS rate_limits (
+                scope TEXT NOT NULL,
+                identifier TEXT NOT NULL,
+                window INTEGER NOT NULL,
+                count INTEGER NOT NULL,
+                PRIMARY KEY (scope, identifier, window)
+            ) WITHOUT ROWID"""
+        )
+    
+    def _connection(self) -> sqlite3.Connection:
+        """Get this thread's connection, opening it on first use"""
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.db_path, timeout=5.0, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            # Counters are disposable; skip fsync to keep checks in the microseconds
+            connection.execute("PRAGMA synchronous=OFF")
+            self._local.connection = connection
+        return connection
+    
+    def hit(self, scope: str, identifier: str, max_requests: int,
+            window_seconds: float, record: bool = True, count: int = 1) -> Tuple[bool, float]:
+        """
+        Atomically check the limit and optionally count the request
+        
+        Args:
+            scope: Limiter name (keeps SMS and API counters apart)
+            identifier: Caller identifier
+            max_requests: Allowed requests per window
+            window_seconds: Window length
+            record: Count the request when it is allowed
+            count: Requests this call stands for (e.g. recipients of a bulk SMS)
+            
+        Returns:
+            (allowed, retry_after_seconds)
+        """
+        now = time.time()
+        window = int(now // window_seconds)
+        elapsed = (now % window_seconds) / window_seconds
+        connection = self._connection()
+        
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            counts = dict(connection.execute(
+                "SELECT window, count FROM rate_limits WHERE scope = ? AND identifier = ? AND window >= ?",
+                (scope, identifier, window - 1)
+            ).fetchall())
+            current, previous = counts.get(window, 0), counts.get(window - 1, 0)
+            allowed = previous * (1 - elapsed) + current + count - 1 < max_requests
+            
+            if allowed and record:
+                connection.execute(
+                    """INSERT INTO rate_limits (scope, identifier, window, count) VALUES (?, ?, ?, ?)
+                    ON CONFLICT (scope, identifier, window) DO UPDATE SET count = count + excluded.count""",
+                    (scope, identifier, window, count)
+                )
+            if now >= self._next_cleanup:
+                connection.execute("DELETE FROM rate_limits WHERE window < ?", (window - 1,))
+                self._next_cleanup = now + window_seconds
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+        
+        if allowed:
+            return True, 0.0
+        headroom = max_requests - current - (count - 1)
+        if headroom > 0 and previous:
+            # Wait until the previous window's weight decays enough
+            needed = 1 - headroom / previous
+            return False, max(0.0, (needed - elapsed) * window_seconds)
+        return False, (1 - elapsed) * window_seconds
+
 class RateLimiter:
     """
-    Simple rate limiting for API calls and SMS sending
+    Sliding-window rate limiting for API calls and SMS sending
+
+    Each identifier owns a ring buffer of time.monotonic() stamps bounded at
+    max_requests, so a check only touches that caller's bucket. Buckets idle
+    for a whole window are evicted once per window.
+
+    When a shared store is given, counting is delegated to it instead so the
+    limit holds across all worker processes rather than per process.
     """
     
-    def __init__(self, max_requests: int = 60, window_minutes: int = 1):
+    def __init__(self, max_requests: int = 60, window_minutes: int = 1,
+                 name: str = "default", store: Optional[SQLiteRateLimitStore] = None):
+        self.name = name
+        self.store = store
         self.max_requests = max_requests
         self.window_seconds = window_minutes * 60
-        self.requests = []
+        self.buckets = {}
+        self._lock = threading.Lock()
+        self._next_sweep = time.monotonic() + self.window_seconds
     
-    def can_make_request(self, identifier: str = "default") -> bool:
-        """Check if request is allowed under rate limit"""
-        now = datetime.now()
-        window_start = now - timedelta(seconds=self.window_seconds)
+    def _get_bucket(self, identifier: str, now: float) -> deque:
+        """Get the identifier's bucket with expired stamps dropped"""
+        if now >= self._next_sweep:
+            self._evict_idle_buckets(now)
         
-        # Clean old requests
-        self.requests = [req for req in self.requests if req['timestamp'] > window_start]
+        bucket = self.buckets.get(identifier)
+        if bucket is None:
+            bucket = self.buckets[identifier] = deque(maxlen=self.max_requests)
         
-        # Count requests for this identifier
-        identifier_requests = [req for req in self.requests if req['identifier'] == identifier]
-        
-        return len(identifier_requests) < self.max_requests
+        window_start = now - self.window_seconds
+        while bucket and bucket[0] <= window_start:
+            bucket.popleft()
+        return bucket
+    
+    def _evict_idle_buckets(self, now: float):
+        """Drop buckets whose newest request has left the window"""
+        window_start = now - self.window_seconds
+        idle = [key for key, bucket in self.buckets.items() if not bucket or bucket[-1] <= window_start]
+        for key in idle:
+            del self.buckets[key]
+        self._next_sweep = now + self.window_seconds
+    
+    def can_make_request(self, identifier: str = "default") -> bool:
+        """Check if request is allowed under rate limit"""
+        if self.store:
+            return self.store.hit(self.name, identifier, self.max_requests, self.window_seconds, record=False)[0]
+        with self._lock:
+            return len(self._get_bucket(identifier, time.monotonic())) < self.max_requests
     
     def record_request(self, identifier: str = "default"):
         """Record a new request"""
-        self.requests.append({
-            'identifier': identifier,
-            'timestamp': datetime.now()
-        })
+        if self.store:
+            self.store.hit(self.name, identifier, float('inf'), self.window_seconds)
+            return
+        with self._lock:
+            now = time.monotonic()
+            self._get_bucket(identifier, now).append(now)
+    
+    def try_acquire(self, identifier: str = "default", count: int = 1) -> bool:
+        """
+        Atomically check the limit and record the request if allowed
+        
+        Args:
+            identifier: Caller identifier
+            count: Requests to record at once (all or none)
+        """
+        if self.store:
+            return self.store.hit(self.name, identifier, self.max_requests, self.window_seconds, count=count)[0]
+        with self._lock:
+            now = time.monotonic()
+            bucket = self._get_bucket(identifier, now)
+            if len(bucket) + count > self.max_requests:
+                return False
+            bucket.extend([now] * count)
+            return True
+    
+    def retry_after(self, identifier: str = "default", count: int = 1) -> float:
+        """Seconds until the identifier may make `count` more requests"""
+        if self.store:
+            return self.store.hit(self.name, identifier, self.max_requests, self.window_seconds,
+                                  record=False, count=count)[1]
+        if count > self.max_requests:
+            return float(self.window_seconds)
+        with self._lock:
+            now = time.monotonic()
+            bucket = self._get_bucket(identifier, now)
+            excess = len(bucket) + count - self.max_requests
+            if excess <= 0:
+                return 0.0
+            return max(0.0, bucket[excess - 1] + self.window_seconds - now)
+
+# Every LazyService, so a freshly forked worker can drop inherited instances
+_lazy_services = []
+
+class LazyService:
+    """
+    Module-level service proxy that builds the real instance on first use
+    
+    Keeps imports cheap: `sms_service.send(...)` works as before, but the
+    service (and whatever SDKs or connections it opens) is only created when
+    an attribute is first accessed. reset_instance() drops it so the next
+    access rebuilds it, e.g. in a freshly forked worker.
+    """
+    
+    def __init__(self, factory: Callable[[], Any], name: str = None):
+        object.__setattr__(self, '_factory', factory)
+        object.__setattr__(self, '_name', name or getattr(factory, '__name__', 'service'))
+        object.__setattr__(self, '_instance', None)
+        object.__setattr__(self, '_initialized', False)
+        object.__setattr__(self, '_lock', threading.Lock())
+        _lazy_services.append(self)
+    
+    def get_instance(self) -> Any:
+        """Get the underlying service, creating it on first call"""
+        if not self._initialized:
+            with self._lock:
+                if not self._initialized:
+                    object.__setattr__(self, '_instance', self._factory())
+                    object.__setattr__(self, '_initialized', True)
+                    logging.debug(f"Lazy service created: {self._name}")
+        return self._instance
+    
+    def is_initialized(self) -> bool:
+        """Check whether the service has been created"""
+        return self._initialized
+    
+    def reset_instance(self):
+        """Forget the current instance; the next access creates a new one"""
+        with self._lock:
+            object.__setattr__(self, '_instance', None)
+            object.__setattr__(self, '_initialized', False)
+    
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.get_instance(), name)
+    
+    def __setattr__(self, name: str, value: Any):
+        setattr(self.get_instance(), name, value)
+    
+    def __repr__(self) -> str:
+        state = repr(self._instance) if self._initialized else 'not created'
+        return f"<LazyService {self._name}: {state}>"
+
+def reset_lazy_services() -> List[str]:
+    """
+    Reset every LazyService (call in a worker right after fork)
+    
+    Returns:
+        Names of services that had been created before the reset
+    """
+    created = [service._name for service in _lazy_services if service.is_initialized()]
+    for service in _lazy_services:
+        object.__setattr__(service, '_lock', threading.Lock())  # a lock held at fork time stays held
+        service.reset_instance()
+    return created
+
+_environment_loaded = False
+
+def load_environment():
+    """Load variables from .env once (kept out of module import)"""
+    global _environment_loaded
+    if _environment_loaded:
+        return
+    _environment_loaded = True
+    try:
+        from dotenv import load_dotenv
+        load_dotenv()
+    except ImportError:
+        logging.warning("python-dotenv not installed - .env file not loaded")
 
 # Global utility instances
-transaction_logger = TransactionLogger()
-sms_rate_limiter = RateLimiter(max_requests=30, window_minutes=1)  # 30 SMS per minute
-api_rate_limiter = RateLimiter(max_requests=100, window_minutes=1)  # 100 API calls per minute
\ No newline at end of file
+def create_rate_limit_store() -> Optional[SQLiteRateLimitStore]:
+    """Create the rate limit store selected by RATE_LIMIT_STORE (sqlite or memory)"""
+    backend = os.getenv('RATE_LIMIT_STORE', 'sqlite').lower()
+    if backend == 'memory':
+        return None
+    if backend == 'sqlite':
+        db_path = os.getenv('RATE_LIMIT_DB_PATH', os.path.join(tempfile.gettempdir(), 'textahbar_ratelimit.db'))
+        try:
+            return SQLiteRateLimitStore(db_path)
+        except Exception as e:
+            logging.warning(f"Shared rate limit store unavailable, limiting per process: {e}")
+            return None
+    raise ValueError(f"Unknown rate limit store: {backend}")
+
+# Created on first use so importing utils stays cheap and .env is read first
+transaction_logger = LazyService(TransactionLogger, 'transaction_logger')
+rate_limit_store = LazyService(create_rate_limit_store, 'rate_limit_store')
+sms_rate_limiter = LazyService(  # 30 SMS per minute
+    lambda: RateLimiter(max_requests=30, window_minutes=1, name='sms', store=rate_limit_store.get_instance()),
+    'sms_rate_limiter'
+)
+api_rate_limiter = LazyService(  # 100 API calls per minute
+    lambda: RateLimiter(max_requests=100, window_minutes=1, name='api', store=rate_limit_store.get_instance()),
+    'api_rate_limiter'
+)
\ No newline at end of file